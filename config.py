@@ -8,8 +8,8 @@ in one place.
 
 import os
 import logging
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, FrozenSet
 
 from dotenv import load_dotenv
 
@@ -58,6 +58,60 @@ def _collect_region_admins_from_env() -> Dict[str, List[int]]:
 	return mapping
 
 
+def _collect_region_dsns_from_env() -> Dict[str, str]:
+	"""Parse DB_URL_<REGION> / DATABASE_URL_<REGION> into region code (lowercase) -> DSN."""
+	dsns: Dict[str, str] = {}
+	for key, value in os.environ.items():
+		if not value:
+			continue
+		for prefix in ("DB_URL_", "DATABASE_URL_"):
+			if key.startswith(prefix):
+				region_code = key[len(prefix):].lower()
+				if region_code:
+					dsns[region_code] = value
+				break
+	return dsns
+
+
+def _parse_int(raw: str, default: int) -> int:
+	try:
+		return int((raw or "").strip())
+	except ValueError:
+		return default
+
+
+def _parse_float(raw: str, default: float) -> float:
+	try:
+		return float((raw or "").strip())
+	except ValueError:
+		return default
+
+
+def _collect_pool_sizes_from_env(default_min: int, default_max: int) -> Dict[str, Tuple[int, int]]:
+	"""Parse DB_POOL_MIN_SIZE_<NAME> / DB_POOL_MAX_SIZE_<NAME> overrides.
+
+	<NAME> is a region code (TOSHKENT, SAMARQAND, ...), CLIENTS or DEFAULT.
+	Names without an override fall back to DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE.
+	"""
+	mins: Dict[str, int] = {}
+	maxs: Dict[str, int] = {}
+	for key, value in os.environ.items():
+		if key.startswith("DB_POOL_MIN_SIZE_"):
+			name = key[len("DB_POOL_MIN_SIZE_"):].strip().lower()
+			if name:
+				mins[name] = _parse_int(value, default_min)
+		elif key.startswith("DB_POOL_MAX_SIZE_"):
+			name = key[len("DB_POOL_MAX_SIZE_"):].strip().lower()
+			if name:
+				maxs[name] = _parse_int(value, default_max)
+	sizes: Dict[str, Tuple[int, int]] = {}
+	for name in set(mins) | set(maxs):
+		lo = mins.get(name, default_min)
+		hi = maxs.get(name, default_max)
+		sizes[name] = (lo, max(lo, hi))
+	return sizes
+
+
 @dataclass(frozen=True)
 class Settings:
 	bot_token: str
@@ -66,6 +120,41 @@ class Settings:
 	zayavka_group_id: int
 	log_level: str
 	region_admin_ids: Dict[str, List[int]]
+	region_dsns: Dict[str, str] = field(default_factory=dict)
+	db_pool_min_size: int = 1
+	db_pool_max_size: int = 5
+	db_pool_sizes: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+	db_acquire_timeout: float = 10.0
+	fsm_storage: str = "memory"
+	fsm_storage_db: str = "clients"
+	fsm_state_ttl: int = 7 * 24 * 3600
+	run_mode: str = "polling"
+	webhook_url: str = ""
+	webhook_path: str = "/webhook"
+	webhook_host: str = "0.0.0.0"
+	webhook_port: int = 8080
+	webhook_secret: str = ""
+	workers: int = 1
+	max_concurrent_updates: int = 100
+	send_global_per_second: int = 30
+	send_chat_per_second: int = 1
+	send_group_per_minute: int = 20
+	role_cache_max_size: int = 10000
+	role_cache_ttl: float = 300.0
+	role_cache_negative_ttl: float = 30.0
+	outbox_batch_size: int = 50
+	outbox_poll_interval: float = 1.0
+	outbox_max_attempts: int = 5
+	inbox_counter_ttl: float = 60.0
+	inbox_push_debounce: float = 2.0
+	audit_batch_size: int = 200
+	audit_flush_interval_ms: int = 500
+	audit_queue_size: int = 10000
+	activity_flush_interval: float = 5.0
+	activity_online_window: float = 300.0
+	start_upsert_window_ms: int = 10
+	start_upsert_batch_size: int = 200
+	region_fanout_timeout: float = 3.0
 
 	@property
 	def numeric_log_level(self) -> int:
@@ -80,6 +169,43 @@ class Settings:
 		zayavka_group_id = _parse_group_id(os.getenv("ZAYAVKA_GROUP_ID", "0"))
 		log_level = os.getenv("LOG_LEVEL", "INFO").strip()
 		region_admin_ids = _collect_region_admins_from_env()
+		region_dsns = _collect_region_dsns_from_env()
+		db_pool_min_size = max(0, _parse_int(os.getenv("DB_POOL_MIN_SIZE", "1"), 1))
+		db_pool_max_size = max(1, db_pool_min_size, _parse_int(os.getenv("DB_POOL_MAX_SIZE", "5"), 5))
+		db_pool_sizes = _collect_pool_sizes_from_env(db_pool_min_size, db_pool_max_size)
+		db_acquire_timeout = max(0.1, _parse_float(os.getenv("DB_ACQUIRE_TIMEOUT", "10"), 10.0))
+		fsm_storage = (os.getenv("FSM_STORAGE", "memory").strip().lower() or "memory")
+		fsm_storage_db = (os.getenv("FSM_STORAGE_DB", "clients").strip().lower() or "clients")
+		fsm_state_ttl = max(0, _parse_int(os.getenv("FSM_STATE_TTL", str(7 * 24 * 3600)), 7 * 24 * 3600))
+		run_mode = (os.getenv("RUN_MODE", "polling").strip().lower() or "polling")
+		webhook_url = os.getenv("WEBHOOK_URL", "").strip().rstrip("/")
+		webhook_path = os.getenv("WEBHOOK_PATH", "/webhook").strip() or "/webhook"
+		if not webhook_path.startswith("/"):
+			webhook_path = "/" + webhook_path
+		webhook_host = os.getenv("WEBHOOK_HOST", "0.0.0.0").strip() or "0.0.0.0"
+		webhook_port = _parse_int(os.getenv("WEBHOOK_PORT", "8080"), 8080)
+		webhook_secret = os.getenv("WEBHOOK_SECRET", "").strip()
+		workers = max(1, _parse_int(os.getenv("WORKERS", "1"), 1))
+		max_concurrent_updates = max(1, _parse_int(os.getenv("MAX_CONCURRENT_UPDATES", "100"), 100))
+		send_global_per_second = max(1, _parse_int(os.getenv("SEND_GLOBAL_PER_SECOND", "30"), 30))
+		send_chat_per_second = max(1, _parse_int(os.getenv("SEND_CHAT_PER_SECOND", "1"), 1))
+		send_group_per_minute = max(1, _parse_int(os.getenv("SEND_GROUP_PER_MINUTE", "20"), 20))
+		role_cache_max_size = max(1, _parse_int(os.getenv("ROLE_CACHE_MAX_SIZE", "10000"), 10000))
+		role_cache_ttl = max(0.0, _parse_float(os.getenv("ROLE_CACHE_TTL", "300"), 300.0))
+		role_cache_negative_ttl = max(0.0, _parse_float(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "30"), 30.0))
+		outbox_batch_size = max(1, _parse_int(os.getenv("OUTBOX_BATCH_SIZE", "50"), 50))
+		outbox_poll_interval = max(0.05, _parse_float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"), 1.0))
+		outbox_max_attempts = max(1, _parse_int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"), 5))
+		inbox_counter_ttl = max(0.0, _parse_float(os.getenv("INBOX_COUNTER_TTL", "60"), 60.0))
+		inbox_push_debounce = max(0.0, _parse_float(os.getenv("INBOX_PUSH_DEBOUNCE", "2.0"), 2.0))
+		audit_batch_size = max(1, _parse_int(os.getenv("AUDIT_BATCH_SIZE", "200"), 200))
+		audit_flush_interval_ms = max(1, _parse_int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"), 500))
+		audit_queue_size = max(0, _parse_int(os.getenv("AUDIT_QUEUE_SIZE", "10000"), 10000))
+		activity_flush_interval = max(0.1, _parse_float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"), 5.0))
+		activity_online_window = max(0.0, _parse_float(os.getenv("ACTIVITY_ONLINE_WINDOW", "300"), 300.0))
+		start_upsert_window_ms = max(0, _parse_int(os.getenv("START_UPSERT_WINDOW_MS", "10"), 10))
+		start_upsert_batch_size = max(1, _parse_int(os.getenv("START_UPSERT_BATCH_SIZE", "200"), 200))
+		region_fanout_timeout = max(0.1, _parse_float(os.getenv("REGION_FANOUT_TIMEOUT", "3.0"), 3.0))
 
 		# Derive BOT_ID from token if not explicitly provided
 		try:
@@ -99,29 +225,136 @@ class Settings:
 			zayavka_group_id=zayavka_group_id,
 			log_level=log_level,
 			region_admin_ids=region_admin_ids,
+			region_dsns=region_dsns,
+			db_pool_min_size=db_pool_min_size,
+			db_pool_max_size=db_pool_max_size,
+			db_pool_sizes=db_pool_sizes,
+			db_acquire_timeout=db_acquire_timeout,
+			fsm_storage=fsm_storage,
+			fsm_storage_db=fsm_storage_db,
+			fsm_state_ttl=fsm_state_ttl,
+			run_mode=run_mode,
+			webhook_url=webhook_url,
+			webhook_path=webhook_path,
+			webhook_host=webhook_host,
+			webhook_port=webhook_port,
+			webhook_secret=webhook_secret,
+			workers=workers,
+			max_concurrent_updates=max_concurrent_updates,
+			send_global_per_second=send_global_per_second,
+			send_chat_per_second=send_chat_per_second,
+			send_group_per_minute=send_group_per_minute,
+			role_cache_max_size=role_cache_max_size,
+			role_cache_ttl=role_cache_ttl,
+			role_cache_negative_ttl=role_cache_negative_ttl,
+			outbox_batch_size=outbox_batch_size,
+			outbox_poll_interval=outbox_poll_interval,
+			outbox_max_attempts=outbox_max_attempts,
+			inbox_counter_ttl=inbox_counter_ttl,
+			inbox_push_debounce=inbox_push_debounce,
+			audit_batch_size=audit_batch_size,
+			audit_flush_interval_ms=audit_flush_interval_ms,
+			audit_queue_size=audit_queue_size,
+			activity_flush_interval=activity_flush_interval,
+			activity_online_window=activity_online_window,
+			start_upsert_window_ms=start_upsert_window_ms,
+			start_upsert_batch_size=start_upsert_batch_size,
+			region_fanout_timeout=region_fanout_timeout,
+		)
+
+
+@dataclass(frozen=True)
+class RegionConfig:
+	code: str
+	dsn: str
+	min_size: int
+	max_size: int
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+	"""Lookups compiled once from Settings; replaced as a whole on reload.
+
+	Readers take `_snapshot` once per call, so a reload in between never mixes
+	old and new values.
+	"""
+	settings: Settings
+	global_admins: FrozenSet[int]
+	region_admins: Dict[str, FrozenSet[int]]
+	# telegram_id -> sorted region codes where the user is an env admin
+	admin_regions: Dict[int, Tuple[str, ...]]
+	regions: Dict[str, RegionConfig]
+	region_codes: Tuple[str, ...]
+
+	@staticmethod
+	def compile(settings: Settings) -> "ConfigSnapshot":
+		region_admins = {code: frozenset(ids) for code, ids in settings.region_admin_ids.items()}
+		admin_regions: Dict[int, List[str]] = {}
+		for code in sorted(region_admins):
+			for telegram_id in region_admins[code]:
+				admin_regions.setdefault(telegram_id, []).append(code)
+		default_sizes = (settings.db_pool_min_size, settings.db_pool_max_size)
+		regions = {
+			code: RegionConfig(code, dsn, *settings.db_pool_sizes.get(code, default_sizes))
+			for code, dsn in settings.region_dsns.items()
+		}
+		return ConfigSnapshot(
+			settings=settings,
+			global_admins=frozenset(settings.admin_ids),
+			region_admins=region_admins,
+			admin_regions={telegram_id: tuple(codes) for telegram_id, codes in admin_regions.items()},
+			regions=regions,
+			region_codes=tuple(sorted(regions)),
 		)
 
 
 # Eagerly load settings at import time
 settings = Settings.from_env()
+_snapshot = ConfigSnapshot.compile(settings)
 
 
 def get_settings() -> Settings:
+	return _snapshot.settings
+
+
+def get_snapshot() -> ConfigSnapshot:
+	return _snapshot
+
+
+def reload_settings() -> Settings:
+	"""Re-read .env / environment and swap the module-level settings.
+
+	The compiled snapshot is rebuilt first and then swapped in one assignment.
+	Code that needs to observe reloads should go through get_settings() or the
+	helpers below rather than holding on to an imported `settings` object.
+	"""
+	global settings, _snapshot
+	load_dotenv(override=True)
+	snapshot = ConfigSnapshot.compile(Settings.from_env())
+	_snapshot = snapshot
+	settings = snapshot.settings
 	return settings
 
 
+def get_pool_size(name: str) -> Tuple[int, int]:
+	"""Return (min_size, max_size) for the pool named by region code, 'clients' or 'default'."""
+	snapshot = _snapshot
+	code = (name or "").lower()
+	region = snapshot.regions.get(code)
+	if region is not None:
+		return region.min_size, region.max_size
+	s = snapshot.settings
+	return s.db_pool_sizes.get(code, (s.db_pool_min_size, s.db_pool_max_size))
+
+
 def is_global_admin(telegram_id: int) -> bool:
-	return telegram_id in settings.admin_ids
+	return telegram_id in _snapshot.global_admins
 
 
 def is_region_admin(telegram_id: int, region_code: str) -> bool:
 	code = (region_code or "").lower()
-	return telegram_id in set(settings.region_admin_ids.get(code, []))
+	return telegram_id in _snapshot.region_admins.get(code, frozenset())
 
 
 def get_admin_regions(telegram_id: int) -> List[str]:
-	regions: List[str] = []
-	for code, ids in settings.region_admin_ids.items():
-		if telegram_id in set(ids):
-			regions.append(code)
-	return sorted(regions)
\ No newline at end of file
+	return list(_snapshot.admin_regions.get(telegram_id, ()))
@@ -1,13 +1,34 @@
 """Audit logger helper.
 
 Use to write actions into audit_log.
+
+- log_action: with `conn`, or inside an open unit-of-work transaction for the
+  region (database.unit_of_work), the row is inserted on that connection and
+  commits / rolls back with the business write; otherwise it is handed to the
+  write-behind buffer
+  (utils.audit_writer) and written in batches with COPY. Without a running
+  writer (scripts, tests) it falls back to a direct INSERT.
+- write_audit_records: batch COPY used by the writer
 """
 
-from typing import Any, Dict, Optional
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .db_router import router, current_unit_of_work
+
+logger = logging.getLogger(__name__)
 
-from .db_router import DBRouter
+AUDIT_COLUMNS: Tuple[str, ...] = (
+	"actor_user_id", "actor_role", "action", "entity_type", "entity_id", "request_id", "target_user_id",
+	"channel", "params", "before_data", "after_data", "status", "error_message", "source_ip", "user_agent",
+	"message_id", "correlation_id", "session_id", "created_at",
+)
 
-router = DBRouter()
+
+def _jsonb(value: Optional[Dict[str, Any]]) -> Optional[str]:
+	return None if value is None else json.dumps(value, ensure_ascii=False, default=str)
 
 
 async def log_action(
@@ -31,21 +52,56 @@ async def log_action(
 	message_id: Optional[int] = None,
 	correlation_id: Optional[str] = None,
 	session_id: Optional[str] = None,
+	conn: Optional[Any] = None,
 ) -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		row = await conn.fetchrow(
-			"""
-			INSERT INTO audit_log(
-				actor_user_id, actor_role, action, entity_type, entity_id, request_id, target_user_id,
-				channel, params, before_data, after_data, status, error_message, source_ip, user_agent,
-				message_id, correlation_id, session_id
-			) VALUES (
-				$1,$2,$3,$4,$5,$6,$7,$8, COALESCE($9,'{}'::jsonb), $10,$11,$12,$13,$14,$15,$16,$17,$18
-			) RETURNING id
-			""",
-			actor_user_id, actor_role, action, entity_type, entity_id, request_id, target_user_id,
-			channel, params, before_data, after_data, status, error_message, source_ip, user_agent,
-			message_id, correlation_id, session_id,
-		)
-		return int(row["id"]) if row else 0
\ No newline at end of file
+	"""Record an action; returns the audit_log id, or 0 when it was buffered."""
+	record = (
+		actor_user_id, actor_role, action, entity_type, entity_id, request_id, target_user_id,
+		channel, _jsonb(params or {}), _jsonb(before_data), _jsonb(after_data), status, error_message,
+		source_ip, user_agent, message_id, correlation_id, session_id, datetime.now(timezone.utc),
+	)
+	if conn is None:
+		from utils.audit_writer import audit_writer
+		uow = current_unit_of_work.get()
+		in_uow_transaction = uow is not None and uow.in_transaction and uow.owns(region_code)
+		if audit_writer.running and not in_uow_transaction:
+			await audit_writer.enqueue(region_code, record)
+			return 0
+	async with router.acquire(region_code, conn) as conn:
+		return await _insert_record(conn, record)
+
+
+async def _insert_record(conn: Any, record: Sequence[Any]) -> int:
+	row = await conn.fetchrow(
+		f"""
+		INSERT INTO audit_log({", ".join(AUDIT_COLUMNS)})
+		VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9::jsonb,$10::jsonb,$11::jsonb,$12,$13,$14,$15,$16,$17,$18,$19)
+		RETURNING id
+		""",
+		*record,
+	)
+	return int(row["id"]) if row else 0
+
+
+async def write_audit_records(region_code: str, records: List[Sequence[Any]]) -> int:
+	"""COPY a batch of records (AUDIT_COLUMNS order) into audit_log; returns rows written.
+
+	If the COPY is rejected (e.g. one row breaks a foreign key) the batch is
+	retried row by row so only the bad rows are dropped.
+	"""
+	if not records:
+		return 0
+	async with router.acquire(region_code) as conn:
+		try:
+			await conn.copy_records_to_table("audit_log", records=records, columns=list(AUDIT_COLUMNS))
+			return len(records)
+		except Exception as e:
+			logger.warning(f"Audit COPY of {len(records)} rows to {region_code} failed, retrying per row: {e}")
+		written = 0
+		for record in records:
+			try:
+				await _insert_record(conn, record)
+				written += 1
+			except Exception as e:
+				logger.warning(f"Audit row dropped ({record[2]} by {record[0]}): {e}")
+		return written
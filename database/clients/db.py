@@ -1,37 +1,22 @@
 """Clients DB connection (pool).
 
 Uses env var CLIENTS_DB_URL (or CLIENTS_DATABASE_URL) for DSN.
+The pool itself is owned by the shared registry in `database.db_router`.
 """
 
-import os
-import asyncio
-from typing import Optional
-
 import asyncpg  # type: ignore
 
-_pool: Optional[asyncpg.Pool] = None
-_lock = asyncio.Lock()
+from ..db_router import router
 
 
 async def get_pool() -> asyncpg.Pool:
-	"""Get (or create) global asyncpg pool for Clients DB."""
-	global _pool
-	if _pool is not None:
-		return _pool
-	async with _lock:
-		if _pool is not None:
-			return _pool
-		dsn = os.environ.get("CLIENTS_DB_URL") or os.environ.get("CLIENTS_DATABASE_URL")
-		if not dsn:
-			raise RuntimeError("CLIENTS_DB_URL/CLIENTS_DATABASE_URL is not set")
-		_pool = await asyncpg.create_pool(dsn)
-		return _pool
+	"""Get (or create) the shared asyncpg pool for Clients DB."""
+	try:
+		return await router.get_pool("clients")
+	except KeyError:
+		raise RuntimeError("CLIENTS_DB_URL/CLIENTS_DATABASE_URL is not set")
 
 
 async def close_pool() -> None:
-	"""Close the global pool if opened."""
-	global _pool
-	async with _lock:
-		if _pool is not None:
-			await _pool.close()
-			_pool = None
\ No newline at end of file
+	"""Close the clients pool if opened."""
+	await router.close_pool("clients")
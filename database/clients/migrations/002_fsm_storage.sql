@@ -0,0 +1,20 @@
+BEGIN;
+
+-- Shared FSM storage for bot workers (database.fsm_storage.PostgresStorage)
+CREATE TABLE IF NOT EXISTS fsm_storage (
+	bot_id                  BIGINT NOT NULL,
+	chat_id                 BIGINT NOT NULL,
+	user_id                 BIGINT NOT NULL,
+	thread_id               BIGINT NOT NULL DEFAULT 0,
+	business_connection_id  TEXT NOT NULL DEFAULT '',
+	destiny                 TEXT NOT NULL DEFAULT 'default',
+	state                   TEXT,
+	data                    JSONB NOT NULL DEFAULT '{}'::jsonb,
+	version                 BIGINT NOT NULL DEFAULT 1,
+	expires_at              TIMESTAMPTZ,
+	updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	PRIMARY KEY (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny)
+);
+CREATE INDEX IF NOT EXISTS idx_fsm_expires ON fsm_storage(expires_at) WHERE expires_at IS NOT NULL;
+
+COMMIT;
@@ -1,12 +1,14 @@
 """Clients DB queries.
 
 Minimal helpers for /start and global search.
+- upsert_global_users: batched /start upsert (utils.onboarding), reports insert vs update
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 from .db import get_pool
+from ..invalidation_bus import publish, USER_UPDATED
 
 
 async def ensure_global_user(telegram_id: int, full_name: str = None, username: str = None,
@@ -40,6 +42,35 @@ async def ensure_global_user(telegram_id: int, full_name: str = None, username:
 		return int(row["id"]) if row else -1
 
 
+async def upsert_global_users(rows: List[Tuple[int, Optional[str], Optional[str], str]]) -> Dict[int, Dict[str, Any]]:
+	"""Upsert many /start profiles (telegram_id, full_name, username, language) in one statement.
+
+	Returns telegram_id -> {"id", "created"}; `created` comes from the upsert
+	itself (xmax = 0 only for a freshly inserted row), so no lookup beforehand.
+	Phone, address and abonent_id are left as they are. telegram_ids must be unique.
+	"""
+	if not rows:
+		return {}
+	ids, names, usernames, languages = (list(col) for col in zip(*rows))
+	pool = await get_pool()
+	async with pool.acquire() as conn:
+		result = await conn.fetch(
+			"""
+			INSERT INTO users(telegram_id, full_name, username, language, is_active, created_at, updated_at)
+			SELECT v.telegram_id, v.full_name, v.username, v.language, true, NOW(), NOW()
+			FROM unnest($1::bigint[], $2::text[], $3::text[], $4::varchar[]) AS v(telegram_id, full_name, username, language)
+			ON CONFLICT (telegram_id) DO UPDATE SET
+				full_name  = COALESCE(EXCLUDED.full_name, users.full_name),
+				username   = COALESCE(EXCLUDED.username, users.username),
+				language   = EXCLUDED.language,
+				updated_at = NOW()
+			RETURNING telegram_id, id, (xmax = 0) AS created
+			""",
+			ids, names, usernames, languages,
+		)
+		return {r["telegram_id"]: {"id": int(r["id"]), "created": bool(r["created"])} for r in result}
+
+
 async def get_by_telegram_id(telegram_id: int) -> Optional[Dict[str, Any]]:
 	pool = await get_pool()
 	async with pool.acquire() as conn:
@@ -60,4 +91,5 @@ async def delete_by_telegram_id(telegram_id: int) -> bool:
 	pool = await get_pool()
 	async with pool.acquire() as conn:
 		res = await conn.execute("DELETE FROM users WHERE telegram_id = $1", telegram_id)
+		await publish(USER_UPDATED, telegram_id, conn=conn)
 		return res.startswith("DELETE")
\ No newline at end of file
@@ -2,15 +2,18 @@
 
 - ensure_user_in_region (JIT upsert)
 - get_user_by_telegram_id / get_user_role
+- get_users_by_ids / get_users_by_telegram_ids (batch, used by utils.data_loader)
+- set_last_activity / set_last_activity_many (coalesced by utils.activity_tracker)
+- search_users_all_regions (admin search, all regions at once)
 - promote/demote staff
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
+from .invalidation_bus import publish, ROLE_CHANGED
+from .region_fanout import fetch_all
 
 
 async def ensure_user_in_region(region_code: str, telegram_id: int,
@@ -22,9 +25,12 @@ async def ensure_user_in_region(region_code: str, telegram_id: int,
 		address: Optional[str] = None) -> int:
 	"""Upsert user by telegram_id in the regional users table and return id.
 	- Default role remains unchanged on conflict; new users default to 'client'.
+	- last_activity of an existing user is left to utils.activity_tracker when it is running.
 	"""
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	from utils.activity_tracker import activity_tracker
+
+	bump_activity = not activity_tracker.touch(region_code, telegram_id)
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO users(telegram_id, full_name, username, phone, role, language, is_active, address, abonent_id, last_activity, created_at, updated_at)
@@ -37,54 +43,121 @@ async def ensure_user_in_region(region_code: str, telegram_id: int,
 				language = COALESCE(EXCLUDED.language, users.language),
 				address = COALESCE(EXCLUDED.address, users.address),
 				abonent_id = COALESCE(EXCLUDED.abonent_id, users.abonent_id),
-				last_activity = NOW(),
+				last_activity = CASE WHEN $8 THEN NOW() ELSE users.last_activity END,
 				updated_at = NOW()
 			RETURNING id
 			""",
-			telegram_id, full_name, username, phone, language, address, abonent_id,
+			telegram_id, full_name, username, phone, language, address, abonent_id, bump_activity,
 		)
 		return int(row["id"]) if row else 0
 
 
 async def get_user_by_telegram_id(region_code: str, telegram_id: int) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT * FROM users WHERE telegram_id=$1", telegram_id)
 		return dict(row) if row else None
 
 
+async def get_users_by_ids(region_code: str, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+	"""users.id -> user row for a batch of ids in one query (missing ids are left out)."""
+	if not user_ids:
+		return {}
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch("SELECT * FROM users WHERE id = ANY($1::int[])", list(user_ids))
+		return {r["id"]: dict(r) for r in rows}
+
+
+async def get_users_by_telegram_ids(region_code: str, telegram_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+	"""telegram_id -> user row for a batch of telegram ids in one query."""
+	if not telegram_ids:
+		return {}
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch("SELECT * FROM users WHERE telegram_id = ANY($1::bigint[])", list(telegram_ids))
+		return {r["telegram_id"]: dict(r) for r in rows}
+
+
 async def get_user_role(region_code: str, telegram_id: int) -> Optional[str]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT role FROM users WHERE telegram_id=$1", telegram_id)
 		return row["role"] if row else None
 
 
 async def promote_staff(region_code: str, telegram_id: int, new_role: str) -> bool:
 	"""Set user's role to a staff role (e.g., technician, manager)."""
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(
 			"UPDATE users SET role=$1, updated_at=NOW() WHERE telegram_id=$2",
 			new_role, telegram_id,
 		)
+		await publish(ROLE_CHANGED, telegram_id, region=region_code, conn=conn)
 		return res.upper().startswith("UPDATE")
 
 
 async def demote_to_client(region_code: str, telegram_id: int) -> bool:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(
 			"UPDATE users SET role='client', updated_at=NOW() WHERE telegram_id=$1",
 			telegram_id,
 		)
+		await publish(ROLE_CHANGED, telegram_id, region=region_code, conn=conn)
 		return res.upper().startswith("UPDATE")
 
 
 async def set_last_activity(region_code: str, telegram_id: int) -> None:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	"""Record activity; coalesced by utils.activity_tracker when it is running."""
+	from utils.activity_tracker import activity_tracker
+
+	if activity_tracker.touch(region_code, telegram_id):
+		return
+	async with router.acquire(region_code) as conn:
 		await conn.execute(
 			"UPDATE users SET last_activity=NOW(), updated_at=NOW() WHERE telegram_id=$1",
 			telegram_id,
-		)
\ No newline at end of file
+		)
+
+
+async def set_last_activity_many(region_code: str, telegram_ids: List[int], seen_at: List[datetime]) -> int:
+	"""Write many last_activity values in one statement (never moves one backwards)."""
+	if not telegram_ids:
+		return 0
+	async with router.acquire(region_code) as conn:
+		res = await conn.execute(
+			"""
+			UPDATE users u SET last_activity = v.seen_at
+			FROM unnest($1::bigint[], $2::timestamptz[]) AS v(telegram_id, seen_at)
+			WHERE u.telegram_id = v.telegram_id
+			  AND (u.last_activity IS NULL OR u.last_activity < v.seen_at)
+			""",
+			list(telegram_ids), list(seen_at),
+		)
+		try:
+			return int(res.split()[-1])
+		except (AttributeError, ValueError, IndexError):
+			return 0
+
+
+async def search_users_all_regions(query: str, limit: int = 20, regions: Optional[List[str]] = None,
+		timeout: Optional[float] = None) -> Dict[str, Any]:
+	"""Find users by name, username, phone or telegram id in every region concurrently.
+
+	Returns {"items": [user rows with 'region', sorted by name], "missing":
+	[regions that timed out or failed], "partial": bool}.
+	"""
+	text = (query or "").strip()
+	if not text:
+		return {"items": [], "missing": [], "partial": False}
+	# User input is matched literally: escape LIKE wildcards (backslash is the default ESCAPE)
+	pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+	res = await fetch_all(
+		"""
+		SELECT id, telegram_id, full_name, username, phone, role, is_active, last_activity
+		FROM users
+		WHERE full_name ILIKE $1 OR username ILIKE $1 OR phone LIKE $1 OR telegram_id::text = $2
+		ORDER BY full_name NULLS LAST, id
+		LIMIT $3
+		""",
+		pattern, text, limit,
+		regions=regions, timeout=timeout,
+	)
+	items = res.merged(key=lambda r: ((r["full_name"] or "").lower(), r["region"], r["id"]), limit=limit)
+	return {"items": items, "missing": res.missing, "partial": res.partial}
@@ -1,46 +1,154 @@
 """DB router (region -> async DB pool).
 
-Minimal implementation using asyncpg with lazy-initialized pools.
+Process-wide asyncpg pool registry. Every query module, `utils.db` and
+`database.clients.db` share the single `router` instance defined here, so a
+region (or the 'clients' / 'default' database) only ever gets one pool.
+
+Pool names:
+- region codes discovered by `region_config` (toshkent, samarqand, ...)
+- 'clients' (CLIENTS_DB_URL / CLIENTS_DATABASE_URL)
+- 'default' (DATABASE_URL or DB_HOST/DB_NAME/... parts)
+
+Sizing comes from `config.get_pool_size`. Pools are warmed up eagerly by
+`warm_up()` at bot setup and closed together by `close_all()`.
+
+Query modules take connections through `router.acquire(region_code, conn)`:
+an explicit `conn` wins, then the open transaction of the update's unit of
+work (`database.unit_of_work`), then a pool acquire for this one query.
+Pool acquires wait at most DB_ACQUIRE_TIMEOUT seconds
+(asyncio.TimeoutError), so an exhausted pool fails the update instead of
+hanging it.
 """
 
 import asyncio
-from typing import Dict, Optional
+import contextvars
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import asyncpg  # type: ignore
 
-from .region_config import get_dsn_for_region
+from .region_config import get_dsn_for_region, get_region_codes
+
+logger = logging.getLogger(__name__)
+
+_NAMED_DATABASES = ("clients", "default")
+
+# UnitOfWork bound by middlewares.unit_of_work_middleware for the current update
+current_unit_of_work: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("unit_of_work", default=None)
+
+
+def _get_named_dsn(name: str) -> Optional[str]:
+	from utils.db_config import get_database_url
+	return get_database_url(name)
+
+
+def get_dsn(name: str) -> str:
+	"""Resolve DSN for a pool name (region code, 'clients' or 'default').
+
+	Raises KeyError if not configured.
+	"""
+	code = (name or "").lower()
+	if code in _NAMED_DATABASES:
+		dsn = _get_named_dsn(code)
+		if not dsn:
+			raise KeyError(f"No DSN configured for database '{code}'")
+		return dsn
+	return get_dsn_for_region(code)
+
+
+def get_configured_names() -> List[str]:
+	"""All pool names that have a DSN configured (regions first)."""
+	names = list(get_region_codes())
+	for name in _NAMED_DATABASES:
+		if name not in names and _get_named_dsn(name):
+			names.append(name)
+	return names
 
 
 class DBRouter:
 	def __init__(self) -> None:
 		self._pools: Dict[str, asyncpg.Pool] = {}
-		self._lock = asyncio.Lock()
+		self._locks: Dict[str, asyncio.Lock] = {}
+
+	def _lock_for(self, code: str) -> asyncio.Lock:
+		lock = self._locks.get(code)
+		if lock is None:
+			lock = self._locks[code] = asyncio.Lock()
+		return lock
 
 	async def get_pool(self, region_code: str) -> asyncpg.Pool:
 		code = (region_code or "").lower()
-		if code in self._pools:
-			return self._pools[code]
-		async with self._lock:
+		pool = self._pools.get(code)
+		if pool is not None:
+			return pool
+		async with self._lock_for(code):
 			if code in self._pools:
 				return self._pools[code]
-			dsn = get_dsn_for_region(code)
-			pool = await asyncpg.create_pool(dsn)  # relies on DSN string
+			from config import get_pool_size
+			dsn = get_dsn(code)
+			min_size, max_size = get_pool_size(code)
+			pool = await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size)
 			self._pools[code] = pool
+			logger.info(f"Database pool initialized: {code} (min={min_size}, max={max_size})")
 			return pool
 
-	async def close_all(self) -> None:
-		async with self._lock:
-			for pool in self._pools.values():
+	def acquire_timeout(self) -> float:
+		from config import get_settings
+		return get_settings().db_acquire_timeout
+
+	@asynccontextmanager
+	async def acquire(self, region_code: str, conn: Optional[Any] = None) -> AsyncIterator[Any]:
+		"""Connection for one query helper: `conn` if given, else the update's
+		unit-of-work transaction for this region, else one from the pool."""
+		if conn is not None:
+			yield conn
+			return
+		uow = current_unit_of_work.get()
+		if uow is not None and uow.in_transaction and uow.owns(region_code):
+			yield await uow.connection()
+			return
+		pool = await self.get_pool(region_code)
+		async with pool.acquire(timeout=self.acquire_timeout()) as c:
+			yield c
+
+	def peek(self, name: str) -> Optional[asyncpg.Pool]:
+		"""Return an already opened pool without creating one."""
+		return self._pools.get((name or "").lower())
+
+	async def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, asyncpg.Pool]:
+		"""Open pools for all configured databases concurrently.
+
+		Failures are logged and skipped so one unreachable region doesn't block startup.
+		"""
+		names = names if names is not None else get_configured_names()
+		results = await asyncio.gather(*(self.get_pool(n) for n in names), return_exceptions=True)
+		for name, res in zip(names, results):
+			if isinstance(res, BaseException):
+				logger.warning(f"Failed to init pool '{name}': {res}")
+		if not self._pools:
+			logger.info("No database URLs configured; no pools initialized")
+		return dict(self._pools)
+
+	async def close_pool(self, name: str) -> None:
+		code = (name or "").lower()
+		async with self._lock_for(code):
+			pool = self._pools.pop(code, None)
+			if pool is not None:
 				await pool.close()
-			self._pools.clear()
+				logger.info(f"Database pool closed: {code}")
+
+	async def close_all(self) -> None:
+		for name in list(self._pools.keys()):
+			try:
+				await self.close_pool(name)
+			except Exception as e:
+				logger.warning(f"Failed to close pool '{name}': {e}")
 
 
-# global router instance (optional usage)
-router: Optional[DBRouter] = None
+# Shared process-wide router; import this instead of creating a new DBRouter
+router: DBRouter = DBRouter()
 
 
 async def get_router() -> DBRouter:
-	global router
-	if router is None:
-		router = DBRouter()
-	return router
\ No newline at end of file
+	return router
@@ -4,9 +4,7 @@
 """
 from typing import Any, Dict, List, Optional
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
 
 
 async def insert_export(region_code: str, user_id: int, export_type: str,
@@ -14,9 +12,8 @@ async def insert_export(region_code: str, user_id: int, export_type: str,
 		file_name: Optional[str] = None, file_size_bytes: Optional[int] = None,
 		file_hash: Optional[str] = None, filters_applied: Optional[Dict[str, Any]] = None,
 		record_count: Optional[int] = None) -> int:
-	pool = await router.get_pool(region_code)
 	filters_applied = filters_applied or {}
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO excel_exports(user_id, export_type, date_range_start, date_range_end, file_name,
@@ -45,7 +42,6 @@ async def list_exports(region_code: str, user_id: Optional[int] = None, export_t
 	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 	sql = f"SELECT * FROM excel_exports {where} ORDER BY created_at DESC LIMIT ${idx} OFFSET ${idx+1}"
 	args.extend([limit, offset])
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(sql, *args)
 		return [dict(r) for r in rows]
\ No newline at end of file
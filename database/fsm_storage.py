@@ -0,0 +1,309 @@
+"""Persistent FSM storage (aiogram BaseStorage) on Postgres.
+
+Lets several bot processes share FSM state (active_region, inbox indexes,
+in-progress orders) and keeps it across restarts.
+
+- write coalescing: inside `session(key)` (opened per update by
+  FSMSessionMiddleware) the row is read once and all set_state / set_data /
+  update_data calls are applied in memory, then written once on exit
+- compare-and-set: every row has a `version`; a write only succeeds against
+  the version it was read at. On conflict the fresh row is re-read and our
+  changes are re-applied on top (update_data keys are merged, set_data /
+  set_state win), so concurrent updates for one user don't clobber each other
+- TTL: every write pushes `expires_at` forward; expired rows read as empty and
+  are purged periodically
+- values must be JSON: aiogram objects (e.g. a Location) are stored as their
+  JSON dump and datetimes as ISO strings, converted when set_data /
+  update_data is called; anything else is rejected there with a TypeError
+
+Schema: database/clients/migrations/002_fsm_storage.sql
+"""
+
+import asyncio
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from .db_router import router
+
+logger = logging.getLogger(__name__)
+
+_CAS_RETRIES = 3
+_PURGE_INTERVAL = 3600.0
+
+_KeyTuple = Tuple[int, int, int, int, str, str]
+
+
+def _key_tuple(key: StorageKey) -> _KeyTuple:
+	return (
+		key.bot_id,
+		key.chat_id,
+		key.user_id,
+		key.thread_id or 0,
+		getattr(key, "business_connection_id", None) or "",
+		key.destiny,
+	)
+
+
+def _json_default(value: Any) -> Any:
+	model_dump = getattr(value, "model_dump", None)
+	if callable(model_dump):
+		# aiogram types (pydantic models)
+		return model_dump(mode="json", exclude_none=True)
+	if isinstance(value, (datetime, date, time)):
+		return value.isoformat()
+	if isinstance(value, Enum):
+		return value.value
+	if isinstance(value, Decimal):
+		return str(value)
+	if isinstance(value, (set, frozenset, tuple)):
+		return list(value)
+	raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _jsonable(data: Dict[str, Any]) -> Dict[str, Any]:
+	"""FSM data as it will be stored (and read back), so get_data looks the same before and after a flush."""
+	try:
+		return json.loads(json.dumps(data, default=_json_default))
+	except (TypeError, ValueError) as e:
+		raise TypeError(f"FSM data must be JSON serializable: {e}") from e
+
+
+class _Entry:
+	__slots__ = ("state", "data", "version", "dirty_state", "replace_data", "patch")
+
+	def __init__(self, state: Optional[str], data: Dict[str, Any], version: int) -> None:
+		self.state = state
+		self.data = data
+		self.version = version
+		self.dirty_state = False
+		self.replace_data = False
+		self.patch: Dict[str, Any] = {}
+
+	@property
+	def dirty(self) -> bool:
+		return self.dirty_state or self.replace_data or bool(self.patch)
+
+	def clear_dirty(self) -> None:
+		self.dirty_state = False
+		self.replace_data = False
+		self.patch = {}
+
+
+class _Session:
+	__slots__ = ("entry", "refs", "lock")
+
+	def __init__(self) -> None:
+		self.entry: Optional[_Entry] = None
+		self.refs = 0
+		self.lock = asyncio.Lock()
+
+
+_WHERE_KEY = (
+	"bot_id=$1 AND chat_id=$2 AND user_id=$3 AND thread_id=$4 "
+	"AND business_connection_id=$5 AND destiny=$6"
+)
+
+
+class PostgresStorage(BaseStorage):
+	def __init__(self, pool_name: str = "clients", state_ttl: Optional[int] = 7 * 24 * 3600) -> None:
+		self.pool_name = pool_name
+		self.state_ttl = state_ttl
+		self._sessions: Dict[_KeyTuple, _Session] = {}
+		self._purge_task: Optional[asyncio.Task] = None
+
+	# ----- loading / flushing -----
+	async def _fetch(self, conn: Any, k: _KeyTuple) -> _Entry:
+		row = await conn.fetchrow(
+			f"""
+			SELECT state, data, version,
+				(expires_at IS NULL OR expires_at > NOW()) AS alive
+			FROM fsm_storage WHERE {_WHERE_KEY}
+			""",
+			*k,
+		)
+		if not row:
+			return _Entry(None, {}, 0)
+		if not row["alive"]:
+			# keep the version so the next write can replace the expired row
+			return _Entry(None, {}, row["version"])
+		data = row["data"]
+		if isinstance(data, str):
+			data = json.loads(data)
+		return _Entry(row["state"], dict(data or {}), row["version"])
+
+	async def _load(self, k: _KeyTuple) -> _Entry:
+		pool = await router.get_pool(self.pool_name)
+		async with pool.acquire() as conn:
+			return await self._fetch(conn, k)
+
+	async def _write(self, conn: Any, k: _KeyTuple, entry: _Entry) -> Optional[int]:
+		payload = json.dumps(entry.data)
+		if entry.version == 0:
+			row = await conn.fetchrow(
+				"""
+				INSERT INTO fsm_storage(bot_id, chat_id, user_id, thread_id, business_connection_id, destiny,
+					state, data, version, expires_at, updated_at)
+				VALUES ($1,$2,$3,$4,$5,$6,$7,$8::jsonb,1,
+					CASE WHEN $9::int IS NULL THEN NULL ELSE NOW() + make_interval(secs => $9::int) END, NOW())
+				ON CONFLICT DO NOTHING
+				RETURNING version
+				""",
+				*k, entry.state, payload, self.state_ttl,
+			)
+		else:
+			row = await conn.fetchrow(
+				f"""
+				UPDATE fsm_storage SET
+					state=$7, data=$8::jsonb, version=version+1,
+					expires_at=CASE WHEN $9::int IS NULL THEN NULL ELSE NOW() + make_interval(secs => $9::int) END,
+					updated_at=NOW()
+				WHERE {_WHERE_KEY} AND version=$10
+				RETURNING version
+				""",
+				*k, entry.state, payload, self.state_ttl, entry.version,
+			)
+		return int(row["version"]) if row else None
+
+	async def _flush(self, k: _KeyTuple, entry: _Entry) -> None:
+		if not entry.dirty:
+			return
+		pool = await router.get_pool(self.pool_name)
+		async with pool.acquire() as conn:
+			for _ in range(_CAS_RETRIES):
+				version = await self._write(conn, k, entry)
+				if version is not None:
+					entry.version = version
+					entry.clear_dirty()
+					return
+				# Someone else wrote first: rebase our changes onto the fresh row
+				fresh = await self._fetch(conn, k)
+				if not entry.dirty_state:
+					entry.state = fresh.state
+				if not entry.replace_data:
+					merged = dict(fresh.data)
+					merged.update(entry.patch)
+					entry.data = merged
+				entry.version = fresh.version
+		logger.warning(f"FSM write for {k} lost the version race {_CAS_RETRIES} times; changes dropped")
+		entry.clear_dirty()
+
+	# ----- sessions (write coalescing) -----
+	@asynccontextmanager
+	async def session(self, key: StorageKey) -> AsyncIterator[None]:
+		"""Read the row at most once and write it at most once for the enclosed block."""
+		k = _key_tuple(key)
+		sess = self._sessions.get(k)
+		if sess is None:
+			sess = self._sessions[k] = _Session()
+		sess.refs += 1
+		try:
+			yield
+		finally:
+			try:
+				if sess.entry is not None:
+					await self._flush(k, sess.entry)
+			finally:
+				sess.refs -= 1
+				if sess.refs == 0 and self._sessions.get(k) is sess:
+					del self._sessions[k]
+
+	async def _entry(self, k: _KeyTuple) -> Optional[_Entry]:
+		"""Return the session entry for k (loading it once), or None outside a session."""
+		sess = self._sessions.get(k)
+		if sess is None:
+			return None
+		if sess.entry is None:
+			async with sess.lock:
+				if sess.entry is None:
+					sess.entry = await self._load(k)
+		return sess.entry
+
+	async def _mutate(self, key: StorageKey, apply: Any) -> _Entry:
+		k = _key_tuple(key)
+		entry = await self._entry(k)
+		if entry is not None:
+			apply(entry)
+			return entry
+		# No open session: read-modify-write immediately
+		entry = await self._load(k)
+		apply(entry)
+		await self._flush(k, entry)
+		return entry
+
+	# ----- BaseStorage API -----
+	async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+		value = state.state if isinstance(state, State) else state
+
+		def apply(entry: _Entry) -> None:
+			entry.state = value
+			entry.dirty_state = True
+
+		await self._mutate(key, apply)
+
+	async def get_state(self, key: StorageKey) -> Optional[str]:
+		k = _key_tuple(key)
+		entry = await self._entry(k) or await self._load(k)
+		return entry.state
+
+	async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+		data = _jsonable(data)
+
+		def apply(entry: _Entry) -> None:
+			entry.data = dict(data)
+			entry.replace_data = True
+			entry.patch = {}
+
+		await self._mutate(key, apply)
+
+	async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+		k = _key_tuple(key)
+		entry = await self._entry(k) or await self._load(k)
+		return dict(entry.data)
+
+	async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+		data = _jsonable(data)
+
+		def apply(entry: _Entry) -> None:
+			entry.data.update(data)
+			if not entry.replace_data:
+				entry.patch.update(data)
+
+		entry = await self._mutate(key, apply)
+		return dict(entry.data)
+
+	# ----- TTL purge / lifecycle -----
+	async def purge_expired(self) -> int:
+		pool = await router.get_pool(self.pool_name)
+		async with pool.acquire() as conn:
+			res = await conn.execute("DELETE FROM fsm_storage WHERE expires_at IS NOT NULL AND expires_at < NOW()")
+		try:
+			return int(res.split()[-1])
+		except (ValueError, IndexError):
+			return 0
+
+	async def _purge_loop(self) -> None:
+		while True:
+			await asyncio.sleep(_PURGE_INTERVAL)
+			try:
+				removed = await self.purge_expired()
+				if removed:
+					logger.info(f"FSM storage purged {removed} expired states")
+			except Exception as e:
+				logger.warning(f"FSM storage purge failed: {e}")
+
+	def start(self) -> None:
+		if self.state_ttl and self._purge_task is None:
+			self._purge_task = asyncio.get_running_loop().create_task(self._purge_loop())
+
+	async def close(self) -> None:
+		if self._purge_task is not None:
+			self._purge_task.cancel()
+			self._purge_task = None
@@ -1,20 +1,31 @@
-from typing import Any, Dict, List, Optional
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from .db_router import DBRouter
+from .db_router import router
+from .keyset import build_page, decode_cursor, encode_cursor, keyset_order
+from .outbox_queries import enqueue_notification
 
-router = DBRouter()
+# NOTIFY channel for new inbox rows (listened to by utils.inbox_push)
+INBOX_CHANNEL = "alfaconnect_inbox"
 
 
 async def get_role_inbox(region_code: str, role: str, recipient_id: Optional[int] = None,
 		limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	"""OFFSET paging; prefer get_role_inbox_page for anything beyond the first page."""
+	async with router.acquire(region_code) as conn:
 		if recipient_id:
+			# The two branches are disjoint, so UNION ALL gives the same rows as the OR
 			rows = await conn.fetch(
 				"""
-				SELECT * FROM inbox_messages
-				WHERE assigned_role=$1 AND (recipient_id=$2 OR recipient_id IS NULL)
-				ORDER BY created_at DESC LIMIT $3 OFFSET $4
+				SELECT * FROM (
+					(SELECT * FROM inbox_messages WHERE assigned_role=$1 AND recipient_id=$2
+						ORDER BY created_at DESC, id DESC LIMIT $3 + $4)
+					UNION ALL
+					(SELECT * FROM inbox_messages WHERE assigned_role=$1 AND recipient_id IS NULL
+						ORDER BY created_at DESC, id DESC LIMIT $3 + $4)
+				) t
+				ORDER BY created_at DESC, id DESC LIMIT $3 OFFSET $4
 				""",
 				role, recipient_id, limit, offset,
 			)
@@ -26,30 +37,263 @@ async def get_role_inbox(region_code: str, role: str, recipient_id: Optional[int
 		return [dict(r) for r in rows]
 
 
+# ===== Keyset pagination =====
+def encode_inbox_cursor(created_at: datetime, inbox_id: int) -> str:
+	"""Opaque cursor for a (created_at, id) position; safe to keep in FSM data."""
+	return encode_cursor(created_at, inbox_id)
+
+
+def decode_inbox_cursor(cursor: str) -> Tuple[datetime, int]:
+	"""Inverse of encode_inbox_cursor; raises ValueError on a malformed cursor."""
+	return decode_cursor(cursor, int, "inbox")
+
+
+async def get_role_inbox_page(region_code: str, role: str, recipient_id: Optional[int] = None,
+		limit: int = 20, cursor: Optional[str] = None, direction: str = "next") -> Dict[str, Any]:
+	"""One page of the role inbox, newest first, keyed on (created_at, id).
+
+	Cursor contract and result shape: database.keyset.
+	"""
+	backward, cmp, order = keyset_order(direction, cursor)
+
+	args: List[Any] = [role, limit + 1]
+	keyset = ""
+	if cursor is not None:
+		created_at, inbox_id = decode_inbox_cursor(cursor)
+		args += [created_at, inbox_id]
+		keyset = f"AND (created_at, id) {cmp} ($3::timestamptz, $4::int)"
+
+	def branch(recipient_sql: str) -> str:
+		return (
+			f"SELECT * FROM inbox_messages WHERE assigned_role=$1 {recipient_sql} {keyset} "
+			f"ORDER BY created_at {order}, id {order} LIMIT $2"
+		)
+
+	if recipient_id:
+		args.append(recipient_id)
+		sql = (
+			f"SELECT * FROM (({branch(f'AND recipient_id=${len(args)}')}) "
+			f"UNION ALL ({branch('AND recipient_id IS NULL')})) t "
+			f"ORDER BY created_at {order}, id {order} LIMIT $2"
+		)
+	else:
+		sql = branch("")
+
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(sql, *args)
+
+	return await build_page(
+		rows, limit=limit, cursor=cursor, backward=backward,
+		cursor_of=lambda item: encode_inbox_cursor(item["created_at"], item["id"]),
+		first_page=lambda: get_role_inbox_page(region_code, role, recipient_id, limit),
+	)
+
+
+# ===== Counters (inbox_counters) =====
+async def _bump_counters(conn: Any, role: str, recipient_id: Optional[int],
+		unread: int = 0, uncompleted: int = 0) -> None:
+	await conn.execute(
+		"""
+		INSERT INTO inbox_counters(assigned_role, recipient_id, unread, uncompleted)
+		VALUES ($1, COALESCE($2::int, 0), GREATEST($3, 0), GREATEST($4, 0))
+		ON CONFLICT (assigned_role, recipient_id) DO UPDATE
+		SET unread = GREATEST(inbox_counters.unread + $3, 0),
+			uncompleted = GREATEST(inbox_counters.uncompleted + $4, 0),
+			updated_at = NOW()
+		""",
+		role, recipient_id, unread, uncompleted,
+	)
+
+
+def _counters_changed(region_code: str, role: str, recipient_id: Optional[int],
+		unread: int = 0, uncompleted: int = 0) -> None:
+	"""Apply a committed counter change to this process' cache."""
+	from utils.inbox_counters import inbox_counters
+	from .unit_of_work import after_commit
+	after_commit(lambda: inbox_counters.apply(region_code, str(role), recipient_id or 0, unread, uncompleted))
+
+
+async def _notify_new_item(conn: Any, region_code: str, role: str,
+		recipient_id: Optional[int], inbox_id: int) -> None:
+	"""NOTIFY listeners about a new inbox row (delivered when the transaction commits)."""
+	from .invalidation_bus import bus
+	payload = json.dumps({
+		"region": region_code,
+		"role": str(role),
+		"recipient_id": recipient_id,
+		"inbox_id": inbox_id,
+		"origin": bus.origin,
+	})
+	await conn.execute("SELECT pg_notify($1, $2)", INBOX_CHANNEL, payload)
+
+
+async def get_inbox_counters(region_code: str, role: str, telegram_id: int) -> Dict[str, Any]:
+	"""Counters of a user's inbox: their own items plus the role-wide ones (recipient_id 0).
+
+	{"recipient_id": users.id or None, "own": (unread, uncompleted), "shared": (unread, uncompleted)}
+	"""
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			"""
+			WITH u AS (SELECT id FROM users WHERE telegram_id=$2)
+			SELECT (SELECT id FROM u) AS user_id, c.recipient_id, c.unread, c.uncompleted
+			FROM (SELECT 0 AS recipient_id UNION ALL SELECT id FROM u) r
+			LEFT JOIN inbox_counters c ON c.assigned_role=$1 AND c.recipient_id=r.recipient_id
+			""",
+			role, telegram_id,
+		)
+	result: Dict[str, Any] = {"recipient_id": None, "own": (0, 0), "shared": (0, 0)}
+	for r in rows:
+		result["recipient_id"] = r["user_id"]
+		counts = (r["unread"] or 0, r["uncompleted"] or 0)
+		if r["recipient_id"] == 0:
+			result["shared"] = counts
+		elif r["recipient_id"] is not None:
+			result["own"] = counts
+	return result
+
+
 async def mark_read(region_code: str, inbox_id: int, recipient_id: Optional[int] = None) -> bool:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		if recipient_id:
-			res = await conn.execute(
-				"UPDATE inbox_messages SET is_read=true, inbox_viewed=true, seen_by_users = (seen_by_users || to_jsonb($2::int))::jsonb, updated_at=NOW() WHERE id=$1",
-				inbox_id, recipient_id,
-			)
-		else:
-			res = await conn.execute(
-				"UPDATE inbox_messages SET is_read=true, inbox_viewed=true, updated_at=NOW() WHERE id=$1",
-				inbox_id,
-			)
-		return res.upper().startswith("UPDATE")
+	"""Mark one message read; with `recipient_id` (users.id) also record a read receipt."""
+	receipt = (
+		", rcpt AS (INSERT INTO inbox_read_receipts(inbox_id, user_id) SELECT id, $2 FROM old ON CONFLICT DO NOTHING)"
+		if recipient_id else ""
+	)
+	args: List[Any] = [inbox_id, recipient_id] if recipient_id else [inbox_id]
+	async with router.acquire(region_code) as conn:
+		row = await conn.fetchrow(
+			f"""
+			WITH old AS (
+				SELECT id, is_read, assigned_role, recipient_id FROM inbox_messages WHERE id=$1 FOR UPDATE
+			), upd AS (
+				UPDATE inbox_messages i SET is_read=true, inbox_viewed=true, updated_at=NOW()
+				FROM old WHERE i.id = old.id
+				RETURNING old.is_read AS was_read, old.assigned_role, old.recipient_id
+			), cnt AS (
+				UPDATE inbox_counters c SET unread = GREATEST(c.unread - 1, 0), updated_at = NOW()
+				FROM upd
+				WHERE NOT upd.was_read AND c.assigned_role = upd.assigned_role
+					AND c.recipient_id = COALESCE(upd.recipient_id, 0)
+			){receipt}
+			SELECT was_read, assigned_role, recipient_id FROM upd
+			""",
+			*args,
+		)
+	if row and not row["was_read"]:
+		_counters_changed(region_code, row["assigned_role"], row["recipient_id"], unread=-1)
+	return row is not None
+
+
+async def mark_many_read(region_code: str, inbox_ids: List[int], user_id: Optional[int] = None) -> int:
+	"""Mark several messages read in one statement; return how many were unread.
+
+	With `user_id` (users.id) a read receipt is recorded for every message.
+	Rows are locked in id order so concurrent batches don't deadlock.
+	"""
+	if not inbox_ids:
+		return 0
+	receipt = (
+		", rcpt AS (INSERT INTO inbox_read_receipts(inbox_id, user_id) SELECT id, $2 FROM old ON CONFLICT DO NOTHING)"
+		if user_id else ""
+	)
+	args: List[Any] = [list(inbox_ids), user_id] if user_id else [list(inbox_ids)]
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			f"""
+			WITH old AS (
+				SELECT id, is_read, assigned_role, recipient_id FROM inbox_messages
+				WHERE id = ANY($1::int[]) ORDER BY id FOR UPDATE
+			), upd AS (
+				UPDATE inbox_messages i SET is_read=true, inbox_viewed=true, updated_at=NOW()
+				FROM old WHERE i.id = old.id AND NOT (i.is_read AND i.inbox_viewed)
+			), delta AS (
+				SELECT assigned_role, COALESCE(recipient_id, 0) AS recipient_id, COUNT(*) AS n
+				FROM old WHERE NOT is_read GROUP BY 1, 2
+			), cnt AS (
+				UPDATE inbox_counters c SET unread = GREATEST(c.unread - d.n, 0), updated_at = NOW()
+				FROM delta d
+				WHERE c.assigned_role = d.assigned_role AND c.recipient_id = d.recipient_id
+			){receipt}
+			SELECT assigned_role, recipient_id, n FROM delta
+			""",
+			*args,
+		)
+	for r in rows:
+		_counters_changed(region_code, r["assigned_role"], r["recipient_id"], unread=-int(r["n"]))
+	return sum(int(r["n"]) for r in rows)
+
+
+async def get_seen_by(region_code: str, inbox_id: int) -> List[Dict[str, Any]]:
+	"""Who has seen a message, in reading order."""
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			"""
+			SELECT r.user_id, u.telegram_id, u.full_name, u.role, r.seen_at
+			FROM inbox_read_receipts r
+			JOIN users u ON u.id = r.user_id
+			WHERE r.inbox_id = $1
+			ORDER BY r.seen_at
+			""",
+			inbox_id,
+		)
+		return [dict(r) for r in rows]
+
+
+async def get_seen_by_many(region_code: str, inbox_ids: List[int]) -> Dict[int, List[int]]:
+	"""inbox_id -> users.id list of readers, for a page of messages in one query."""
+	if not inbox_ids:
+		return {}
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			"""
+			SELECT inbox_id, array_agg(user_id ORDER BY seen_at) AS users
+			FROM inbox_read_receipts
+			WHERE inbox_id = ANY($1::int[])
+			GROUP BY inbox_id
+			""",
+			list(inbox_ids),
+		)
+	result: Dict[int, List[int]] = {i: [] for i in inbox_ids}
+	for r in rows:
+		result[r["inbox_id"]] = list(r["users"])
+	return result
+
+
+async def get_seen_ids(region_code: str, user_id: int, inbox_ids: List[int]) -> List[int]:
+	"""Which of `inbox_ids` the user (users.id) has already seen."""
+	if not inbox_ids:
+		return []
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			"SELECT inbox_id FROM inbox_read_receipts WHERE user_id=$1 AND inbox_id = ANY($2::int[])",
+			user_id, list(inbox_ids),
+		)
+		return [r["inbox_id"] for r in rows]
 
 
 async def mark_completed(region_code: str, inbox_id: int) -> bool:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		res = await conn.execute(
-			"UPDATE inbox_messages SET completed=true, updated_at=NOW() WHERE id=$1",
+	async with router.acquire(region_code) as conn:
+		row = await conn.fetchrow(
+			"""
+			WITH old AS (
+				SELECT id, completed, assigned_role, recipient_id FROM inbox_messages WHERE id=$1 FOR UPDATE
+			), upd AS (
+				UPDATE inbox_messages i SET completed=true, updated_at=NOW()
+				FROM old WHERE i.id = old.id
+				RETURNING old.completed AS was_completed, old.assigned_role, old.recipient_id
+			), cnt AS (
+				UPDATE inbox_counters c SET uncompleted = GREATEST(c.uncompleted - 1, 0), updated_at = NOW()
+				FROM upd
+				WHERE NOT upd.was_completed AND c.assigned_role = upd.assigned_role
+					AND c.recipient_id = COALESCE(upd.recipient_id, 0)
+			)
+			SELECT was_completed, assigned_role, recipient_id FROM upd
+			""",
 			inbox_id,
 		)
-		return res.upper().startswith("UPDATE")
+	if row and not row["was_completed"]:
+		_counters_changed(region_code, row["assigned_role"], row["recipient_id"], uncompleted=-1)
+	return row is not None
 
 
 async def create_on_assignment(
@@ -64,23 +308,52 @@ async def create_on_assignment(
 	application_type: str = "service_request",
 	message_type: str = "application",
 	metadata: Optional[Dict[str, Any]] = None,
+	notify_text: Optional[str] = None,
+	notify_chat_id: Optional[int] = None,
+	notify_parse_mode: Optional[str] = "HTML",
+	notify_reply_markup: Optional[Any] = None,
+	conn: Optional[Any] = None,
 ) -> int:
-	pool = await router.get_pool(region_code)
+	"""Create an inbox row; with `notify_text` also queue its Telegram notification.
+
+	The outbox row is written in the same transaction, so a notification exists
+	if and only if the inbox row does. Delivery is done by utils.outbox_dispatcher.
+	`reply_markup_data` is inbox metadata and is not sent; the notification's
+	keyboard is `notify_reply_markup` (an InlineKeyboardMarkup).
+	A NOTIFY on INBOX_CHANNEL lets utils.inbox_push refresh online recipients.
+	Pass `conn` to run inside the caller's transaction.
+	"""
 	reply_markup_data = reply_markup_data or {}
 	metadata = metadata or {}
-	async with pool.acquire() as conn:
-		row = await conn.fetchrow(
-			"""
-			INSERT INTO inbox_messages(
+	async with router.acquire(region_code, conn) as conn:
+		async with conn.transaction():
+			row = await conn.fetchrow(
+				"""
+				INSERT INTO inbox_messages(
+					application_id, application_type, assigned_role, message_type,
+					title, description, priority, is_read, recipient_id,
+					reply_markup_data, telegram_message_id, reply_button_clicked, inbox_viewed,
+					completed, seen_by_users, metadata
+				) VALUES (
+					$1,$2,$3,$4,$5,$6,$7,false,$8,$9,NULL,false,false,false,'[]'::jsonb,$10
+				) RETURNING id
+				""",
 				application_id, application_type, assigned_role, message_type,
-				title, description, priority, is_read, recipient_id,
-				reply_markup_data, telegram_message_id, reply_button_clicked, inbox_viewed,
-				completed, seen_by_users, metadata
-			) VALUES (
-				$1,$2,$3,$4,$5,$6,$7,false,$8,$9,NULL,false,false,false,'[]'::jsonb,$10
-			) RETURNING id
-			""",
-			application_id, application_type, assigned_role, message_type,
-			title, description, priority, recipient_id, reply_markup_data, metadata,
-		)
-		return int(row["id"]) if row else 0
\ No newline at end of file
+				title, description, priority, recipient_id, reply_markup_data, metadata,
+			)
+			inbox_id = int(row["id"]) if row else 0
+			if inbox_id and notify_text and (recipient_id or notify_chat_id):
+				await enqueue_notification(
+					conn, notify_text,
+					inbox_id=inbox_id,
+					recipient_id=recipient_id,
+					chat_id=notify_chat_id,
+					parse_mode=notify_parse_mode,
+					reply_markup=notify_reply_markup,
+				)
+			if inbox_id:
+				await _bump_counters(conn, assigned_role, recipient_id, unread=1, uncompleted=1)
+				await _notify_new_item(conn, region_code, assigned_role, recipient_id, inbox_id)
+	if inbox_id:
+		_counters_changed(region_code, assigned_role, recipient_id, unread=1, uncompleted=1)
+	return inbox_id
@@ -0,0 +1,202 @@
+"""Cross-process cache invalidation bus (Postgres LISTEN/NOTIFY).
+
+Write paths call `publish(kind, key, region=..., conn=...)`:
+- local subscribers run immediately (this process' caches are evicted)
+- a NOTIFY on channel `alfaconnect_invalidation` tells every other bot
+  process to evict the same key
+
+Each process keeps one dedicated LISTEN connection per configured database
+(see `db_router.get_configured_names`); notifications sent by the process
+itself are ignored because they were already applied locally.
+
+Event kinds:
+- role_changed      key = telegram_id
+- user_updated      key = telegram_id
+- material_changed  key = material id (published by warehouse_queries for
+  catalog caches; nothing caches material rows process-wide yet, the
+  per-update DataLoader needs no eviction)
+- settings_changed  key = None (other processes run utils.config_reload.reload_config)
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import asyncpg  # type: ignore
+
+from .db_router import router, get_configured_names, get_dsn
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "alfaconnect_invalidation"
+
+ROLE_CHANGED = "role_changed"
+USER_UPDATED = "user_updated"
+MATERIAL_CHANGED = "material_changed"
+SETTINGS_CHANGED = "settings_changed"
+
+EVENT_KINDS = (ROLE_CHANGED, USER_UPDATED, MATERIAL_CHANGED, SETTINGS_CHANGED)
+
+_RECONNECT_DELAY = 5.0
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+	kind: str
+	key: Optional[Union[int, str]] = None
+	region: Optional[str] = None
+	origin: Optional[str] = None
+
+	def to_payload(self) -> str:
+		return json.dumps({"kind": self.kind, "key": self.key, "region": self.region, "origin": self.origin})
+
+	@staticmethod
+	def from_payload(payload: str) -> "InvalidationEvent":
+		data = json.loads(payload)
+		return InvalidationEvent(
+			kind=data.get("kind"),
+			key=data.get("key"),
+			region=data.get("region"),
+			origin=data.get("origin"),
+		)
+
+
+Subscriber = Callable[[InvalidationEvent], Union[None, Awaitable[None]]]
+
+
+class InvalidationBus:
+	def __init__(self) -> None:
+		self.origin = uuid.uuid4().hex
+		self._subscribers: Dict[str, List[Subscriber]] = {}
+		self._connections: Dict[str, asyncpg.Connection] = {}
+		self._reconnect_tasks: Dict[str, asyncio.Task] = {}
+		self._running = False
+
+	def subscribe(self, kind: str, callback: Subscriber) -> None:
+		if kind not in EVENT_KINDS:
+			raise ValueError(f"Unknown invalidation event kind: {kind}")
+		self._subscribers.setdefault(kind, []).append(callback)
+
+	async def _dispatch(self, event: InvalidationEvent) -> None:
+		for callback in self._subscribers.get(event.kind, []):
+			try:
+				res = callback(event)
+				if asyncio.iscoroutine(res):
+					await res
+			except Exception as e:
+				logger.warning(f"Invalidation subscriber failed for {event.kind}: {e}")
+
+	async def publish(self, kind: str, key: Optional[Union[int, str]] = None, *,
+			region: Optional[str] = None, conn: Optional[asyncpg.Connection] = None) -> None:
+		"""Apply locally and broadcast to other processes.
+
+		Pass `conn` to send NOTIFY on the connection that did the write (inside a
+		transaction it is delivered on commit). Broadcast failures are logged,
+		never raised, so a write path is not failed by the bus.
+		"""
+		event = InvalidationEvent(kind=kind, key=key, region=region, origin=self.origin)
+		await self._dispatch(event)
+		try:
+			if conn is not None:
+				await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, event.to_payload())
+				return
+			names = get_configured_names()
+			name = region if region in names else (names[0] if names else None)
+			if name is None:
+				return
+			pool = await router.get_pool(name)
+			async with pool.acquire() as c:
+				await c.execute("SELECT pg_notify($1, $2)", CHANNEL, event.to_payload())
+		except Exception as e:
+			logger.warning(f"Invalidation broadcast failed for {kind}:{key}: {e}")
+
+	def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+		try:
+			event = InvalidationEvent.from_payload(payload)
+		except Exception:
+			logger.debug(f"Ignoring malformed invalidation payload: {payload!r}")
+			return
+		if event.origin == self.origin:
+			return
+		asyncio.get_running_loop().create_task(self._dispatch(event))
+
+	def _on_terminate(self, name: str) -> Callable[[Any], None]:
+		def _callback(connection: Any) -> None:
+			self._connections.pop(name, None)
+			if self._running and name not in self._reconnect_tasks:
+				self._reconnect_tasks[name] = asyncio.get_running_loop().create_task(self._reconnect(name))
+		return _callback
+
+	async def _listen(self, name: str) -> None:
+		conn = await asyncpg.connect(get_dsn(name))
+		await conn.add_listener(CHANNEL, self._on_notify)
+		conn.add_termination_listener(self._on_terminate(name))
+		self._connections[name] = conn
+		logger.info(f"Invalidation bus listening on {name}")
+
+	async def _reconnect(self, name: str) -> None:
+		try:
+			while self._running and name not in self._connections:
+				await asyncio.sleep(_RECONNECT_DELAY)
+				try:
+					await self._listen(name)
+				except Exception as e:
+					logger.warning(f"Invalidation bus reconnect to {name} failed: {e}")
+		finally:
+			self._reconnect_tasks.pop(name, None)
+
+	async def start(self, names: Optional[List[str]] = None) -> None:
+		if self._running:
+			return
+		self._running = True
+		names = names if names is not None else get_configured_names()
+		results = await asyncio.gather(*(self._listen(n) for n in names), return_exceptions=True)
+		for name, res in zip(names, results):
+			if isinstance(res, BaseException):
+				logger.warning(f"Invalidation bus listen on {name} failed: {res}")
+				self._reconnect_tasks[name] = asyncio.get_running_loop().create_task(self._reconnect(name))
+
+	async def stop(self) -> None:
+		self._running = False
+		for task in list(self._reconnect_tasks.values()):
+			task.cancel()
+		self._reconnect_tasks.clear()
+		for name, conn in list(self._connections.items()):
+			try:
+				await conn.remove_listener(CHANNEL, self._on_notify)
+				await conn.close()
+			except Exception:
+				pass
+		self._connections.clear()
+
+
+bus = InvalidationBus()
+
+
+def _install_builtin_subscribers() -> None:
+	from utils.role_cache import invalidate_role_cache
+
+	def _evict_role(event: InvalidationEvent) -> None:
+		invalidate_role_cache(int(event.key) if event.key is not None else None)
+
+	async def _reload_config(event: InvalidationEvent) -> None:
+		# The publishing process has already reloaded itself
+		if event.origin == bus.origin:
+			return
+		from utils.config_reload import reload_config
+		await reload_config(broadcast=False)
+
+	bus.subscribe(ROLE_CHANGED, _evict_role)
+	bus.subscribe(USER_UPDATED, _evict_role)
+	bus.subscribe(SETTINGS_CHANGED, _reload_config)
+
+
+_install_builtin_subscribers()
+
+
+async def publish(kind: str, key: Optional[Union[int, str]] = None, *,
+		region: Optional[str] = None, conn: Optional[asyncpg.Connection] = None) -> None:
+	await bus.publish(kind, key, region=region, conn=conn)
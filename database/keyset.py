@@ -0,0 +1,65 @@
+"""Keyset pagination shared by the *_page queries.
+
+All pages are newest first on (created_at, <id>) and return
+{"items": [...], "next_cursor": str|None, "prev_cursor": str|None}:
+`direction="next"` reads older rows after `cursor`, `"prev"` newer rows
+before it; without a cursor the newest page is returned. A cursor is None
+when there is nothing further in that direction.
+
+Callers fetch `limit + 1` rows (the extra one tells whether more exist)
+ordered by `keyset_order(...)` and hand them to `build_page`.
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, key: Any) -> str:
+	"""Opaque cursor for a (created_at, key) position; safe to keep in FSM data."""
+	raw = f"{created_at.isoformat()}|{key}".encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_type: Callable[[str], Any] = str, name: str = "page") -> Tuple[datetime, Any]:
+	"""Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+		created_at, key = raw.split("|", 1)
+		return datetime.fromisoformat(created_at), key_type(key)
+	except Exception as e:
+		raise ValueError(f"Invalid {name} cursor: {cursor!r}") from e
+
+
+def keyset_order(direction: str, cursor: Optional[str]) -> Tuple[bool, str, str]:
+	"""(backward, comparison, ORDER BY direction) for a page request."""
+	if direction not in ("next", "prev"):
+		raise ValueError("direction must be 'next' or 'prev'")
+	backward = direction == "prev" and cursor is not None
+	return (backward, ">", "ASC") if backward else (backward, "<", "DESC")
+
+
+async def build_page(
+	rows: List[Any],
+	*,
+	limit: int,
+	cursor: Optional[str],
+	backward: bool,
+	cursor_of: Callable[[Dict[str, Any]], str],
+	first_page: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+	"""Turn the fetched rows into a page; `first_page()` answers a "prev" past the newest row."""
+	if backward and not rows:
+		# Nothing newer than the cursor: the newest page is the answer
+		return await first_page()
+	items = [dict(r) for r in rows[:limit]]
+	has_more = len(rows) > limit
+	if backward:
+		items.reverse()
+	first = cursor_of(items[0]) if items else None
+	last = cursor_of(items[-1]) if items else None
+	if backward:
+		next_cursor, prev_cursor = last, (first if has_more else None)
+	else:
+		next_cursor, prev_cursor = (last if has_more else None), (first if cursor is not None else None)
+	return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
@@ -0,0 +1,26 @@
+BEGIN;
+
+-- ===== Notification outbox =====
+-- Written in the same transaction as inbox_messages (inbox_queries.create_on_assignment);
+-- delivered to Telegram by utils.outbox_dispatcher.OutboxDispatcher.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+  id                  BIGSERIAL PRIMARY KEY,
+  inbox_id            INT REFERENCES inbox_messages(id) ON DELETE CASCADE,
+  recipient_id        INT REFERENCES users(id),
+  chat_id             BIGINT,
+  text                TEXT NOT NULL,
+  parse_mode          VARCHAR(20),
+  reply_markup        JSONB,
+  status              VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','sent','failed')),
+  attempts            INT NOT NULL DEFAULT 0,
+  last_error          TEXT,
+  telegram_message_id INT,
+  next_attempt_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  sent_at             TIMESTAMPTZ,
+  CHECK (recipient_id IS NOT NULL OR chat_id IS NOT NULL)
+);
+CREATE INDEX IF NOT EXISTS idx_no_pending ON notification_outbox(next_attempt_at, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_no_inbox   ON notification_outbox(inbox_id);
+
+COMMIT;
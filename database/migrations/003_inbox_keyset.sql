@@ -0,0 +1,14 @@
+BEGIN;
+
+-- ===== Inbox keyset pagination =====
+-- Serves inbox_queries.get_role_inbox_page: each recipient branch
+-- (recipient_id = X / recipient_id IS NULL) is one index range, read in
+-- (created_at DESC, id DESC) order. id is DESC as well so the row
+-- comparison (created_at, id) < (...) can be used as an index condition.
+CREATE INDEX IF NOT EXISTS idx_im_role_recipient_created
+  ON inbox_messages(assigned_role, recipient_id, created_at DESC, id DESC);
+-- Role-wide inbox (no recipient filter)
+CREATE INDEX IF NOT EXISTS idx_im_role_created
+  ON inbox_messages(assigned_role, created_at DESC, id DESC);
+
+COMMIT;
@@ -0,0 +1,27 @@
+BEGIN;
+
+-- ===== Inbox counters =====
+-- Unread / uncompleted inbox items per (assigned_role, recipient_id), kept
+-- up to date by inbox_queries (create_on_assignment, mark_read,
+-- mark_completed) in the same transaction as the inbox change.
+-- recipient_id = 0 counts items addressed to the whole role (recipient_id IS NULL).
+CREATE TABLE IF NOT EXISTS inbox_counters (
+  assigned_role  user_role_enum NOT NULL,
+  recipient_id   INT NOT NULL DEFAULT 0,
+  unread         INT NOT NULL DEFAULT 0 CHECK (unread >= 0),
+  uncompleted    INT NOT NULL DEFAULT 0 CHECK (uncompleted >= 0),
+  updated_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (assigned_role, recipient_id)
+);
+
+-- Backfill from existing inbox rows
+INSERT INTO inbox_counters(assigned_role, recipient_id, unread, uncompleted)
+SELECT assigned_role, COALESCE(recipient_id, 0),
+       COUNT(*) FILTER (WHERE NOT is_read),
+       COUNT(*) FILTER (WHERE NOT completed)
+FROM inbox_messages
+GROUP BY assigned_role, COALESCE(recipient_id, 0)
+ON CONFLICT (assigned_role, recipient_id) DO UPDATE
+SET unread = EXCLUDED.unread, uncompleted = EXCLUDED.uncompleted, updated_at = NOW();
+
+COMMIT;
@@ -0,0 +1,31 @@
+BEGIN;
+
+-- ===== Inbox read receipts =====
+-- One narrow row per (message, reader) instead of appending to the
+-- inbox_messages.seen_by_users JSONB array (which is no longer written).
+CREATE TABLE IF NOT EXISTS inbox_read_receipts (
+  inbox_id  INT NOT NULL REFERENCES inbox_messages(id) ON DELETE CASCADE,
+  user_id   INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  seen_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (inbox_id, user_id)
+);
+-- "what has this user seen"
+CREATE INDEX IF NOT EXISTS idx_irr_user ON inbox_read_receipts(user_id, inbox_id);
+
+-- Backfill from the legacy JSONB array (duplicates and unknown users dropped)
+INSERT INTO inbox_read_receipts(inbox_id, user_id, seen_at)
+SELECT im.id, s.user_id, im.updated_at
+FROM inbox_messages im
+CROSS JOIN LATERAL (
+  SELECT DISTINCT (value)::int AS user_id
+  FROM jsonb_array_elements_text(im.seen_by_users)
+  WHERE value ~ '^[0-9]+$'
+) s
+JOIN users u ON u.id = s.user_id
+WHERE jsonb_typeof(im.seen_by_users) = 'array' AND jsonb_array_length(im.seen_by_users) > 0
+ON CONFLICT DO NOTHING;
+
+-- Free the space held by the old arrays
+UPDATE inbox_messages SET seen_by_users = '[]'::jsonb WHERE seen_by_users <> '[]'::jsonb;
+
+COMMIT;
@@ -0,0 +1,13 @@
+BEGIN;
+
+-- ===== Keyset pagination for search_service_requests =====
+-- ORDER BY created_at DESC, id DESC with a (created_at, id) row comparison;
+-- the role variant covers the manager list filtered by role_current.
+CREATE INDEX IF NOT EXISTS idx_sr_created_id
+  ON service_requests(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_sr_role_created_id
+  ON service_requests(role_current, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_sr_status_created_id
+  ON service_requests(current_status, created_at DESC, id DESC);
+
+COMMIT;
@@ -0,0 +1,68 @@
+BEGIN;
+
+-- ===== Request cards (read model) =====
+-- One narrow row per service request holding exactly what list / inbox
+-- views render (names, phone, latest transition), so a page is a single
+-- indexed scan instead of service_requests + 3x users + state_transitions.
+-- Maintained by database/request_cards_queries.refresh_request_card from the
+-- write paths (service_requests, state_transitions, application_transfers).
+CREATE TABLE IF NOT EXISTS request_cards (
+  request_id          VARCHAR(36) PRIMARY KEY REFERENCES service_requests(id) ON DELETE CASCADE,
+  workflow_type       VARCHAR(50) NOT NULL,
+  role_current        user_role_enum NOT NULL,
+  current_status      VARCHAR(50) NOT NULL,
+  priority            VARCHAR(20) NOT NULL,
+  description         TEXT,
+  location            TEXT,
+  client_id           INT,
+  client_name         TEXT,
+  client_phone        TEXT,
+  assignee_id         INT,
+  assignee_name       TEXT,
+  technician_id       INT,
+  technician_name     TEXT,
+  last_action         VARCHAR(100),
+  last_from_role      user_role_enum,
+  last_to_role        user_role_enum,
+  last_actor_name     TEXT,
+  last_transition_at  TIMESTAMPTZ,
+  transfer_count      INT NOT NULL DEFAULT 0,
+  created_at          TIMESTAMPTZ NOT NULL,
+  updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_rc_created       ON request_cards(created_at DESC, request_id DESC);
+CREATE INDEX IF NOT EXISTS idx_rc_role_created  ON request_cards(role_current, created_at DESC, request_id DESC);
+CREATE INDEX IF NOT EXISTS idx_rc_status_created ON request_cards(current_status, created_at DESC, request_id DESC);
+CREATE INDEX IF NOT EXISTS idx_rc_assignee      ON request_cards(assignee_id, created_at DESC) WHERE assignee_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_rc_technician    ON request_cards(technician_id, created_at DESC) WHERE technician_id IS NOT NULL;
+
+-- Backfill (same projection as request_cards_queries._REFRESH_CARD_SQL)
+INSERT INTO request_cards (
+  request_id, workflow_type, role_current, current_status, priority, description, location,
+  client_id, client_name, client_phone, assignee_id, assignee_name, technician_id, technician_name,
+  last_action, last_from_role, last_to_role, last_actor_name, last_transition_at,
+  transfer_count, created_at, updated_at
+)
+SELECT
+  sr.id, sr.workflow_type, sr.role_current, sr.current_status, sr.priority,
+  LEFT(sr.description, 200), sr.location,
+  sr.client_id, COALESCE(c.full_name, sr.contact_info->>'full_name'), COALESCE(c.phone, sr.contact_info->>'phone'),
+  sr.current_assignee_id, a.full_name, sr.assigned_technician_id, t.full_name,
+  st.action, st.from_role, st.to_role, st.actor_name, st.created_at,
+  (SELECT COUNT(*) FROM application_transfers tr WHERE tr.application_id = sr.id),
+  sr.created_at, sr.updated_at
+FROM service_requests sr
+LEFT JOIN users c ON c.id = sr.client_id
+LEFT JOIN users a ON a.id = sr.current_assignee_id
+LEFT JOIN users t ON t.id = sr.assigned_technician_id
+LEFT JOIN LATERAL (
+  SELECT s.action, s.from_role, s.to_role, s.created_at, u.full_name AS actor_name
+  FROM state_transitions s
+  LEFT JOIN users u ON u.id = s.actor_id
+  WHERE s.request_id = sr.id
+  ORDER BY s.created_at DESC, s.id DESC
+  LIMIT 1
+) st ON true
+ON CONFLICT (request_id) DO NOTHING;
+
+COMMIT;
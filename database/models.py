@@ -174,12 +174,19 @@ class InboxMessage:
 	reply_button_clicked: bool = False
 	inbox_viewed: bool = False
 	completed: bool = False
-	seen_by_users: List[int] = field(default_factory=list)
+	seen_by_users: List[int] = field(default_factory=list)  # legacy, see InboxReadReceipt
 	metadata: Dict[str, Any] = field(default_factory=dict)
 	created_at: Optional[datetime] = None
 	updated_at: Optional[datetime] = None
 
 
+@dataclass
+class InboxReadReceipt:
+	inbox_id: Optional[int] = None
+	user_id: Optional[int] = None
+	seen_at: Optional[datetime] = None
+
+
 @dataclass
 class ApplicationTransfer:
 	id: Optional[int] = None
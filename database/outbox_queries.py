@@ -0,0 +1,132 @@
+"""Notification outbox queries.
+
+- enqueue_notification (inside the caller's transaction)
+- claim_pending_notifications (lease-based, safe with several bot processes)
+- mark_notifications_sent / mark_notification_failed
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .db_router import router
+
+# A claimed row is invisible to other dispatchers for this long
+_CLAIM_LEASE_SECONDS = 60
+_RETRY_BACKOFF_SECONDS = 30
+
+
+def serialize_reply_markup(reply_markup: Any) -> Optional[str]:
+	"""JSON of an InlineKeyboardMarkup (or a dict in its shape); ValueError otherwise."""
+	from aiogram.types import InlineKeyboardMarkup
+
+	if reply_markup is None:
+		return None
+	try:
+		markup = InlineKeyboardMarkup.model_validate(reply_markup)
+	except Exception as e:
+		raise ValueError(f"reply_markup is not a valid InlineKeyboardMarkup: {e}") from e
+	return json.dumps(markup.model_dump(mode="json", exclude_none=True))
+
+
+async def enqueue_notification(conn: Any, text: str, *,
+		inbox_id: Optional[int] = None,
+		recipient_id: Optional[int] = None,
+		chat_id: Optional[int] = None,
+		parse_mode: Optional[str] = None,
+		reply_markup: Optional[Any] = None) -> int:
+	"""Insert an outbox row on `conn` (use the connection/transaction of the business write).
+
+	`recipient_id` is users.id (telegram id is resolved at send time);
+	`chat_id` is an explicit Telegram chat and takes precedence.
+	`reply_markup` must be an InlineKeyboardMarkup (validated here, so a bad
+	keyboard fails the write instead of every delivery attempt).
+	"""
+	markup_json = serialize_reply_markup(reply_markup)
+	row = await conn.fetchrow(
+		"""
+		INSERT INTO notification_outbox(inbox_id, recipient_id, chat_id, text, parse_mode, reply_markup)
+		VALUES ($1,$2,$3,$4,$5,$6::jsonb) RETURNING id
+		""",
+		inbox_id, recipient_id, chat_id, text, parse_mode,
+		markup_json,
+	)
+	return int(row["id"]) if row else 0
+
+
+async def claim_pending_notifications(region_code: str, limit: int = 50) -> List[Dict[str, Any]]:
+	"""Lease up to `limit` due notifications and return them with the target chat id."""
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(
+			f"""
+			UPDATE notification_outbox o
+			SET attempts = o.attempts + 1,
+				next_attempt_at = NOW() + make_interval(secs => {_CLAIM_LEASE_SECONDS})
+			FROM (
+				SELECT id FROM notification_outbox
+				WHERE status = 'pending' AND next_attempt_at <= NOW()
+				ORDER BY next_attempt_at, id
+				LIMIT $1
+				FOR UPDATE SKIP LOCKED
+			) due
+			WHERE o.id = due.id
+			RETURNING o.id, o.inbox_id, o.text, o.parse_mode, o.reply_markup, o.attempts,
+				COALESCE(o.chat_id, (SELECT u.telegram_id FROM users u WHERE u.id = o.recipient_id)) AS target_chat_id
+			""",
+			limit,
+		)
+		result = []
+		for r in rows:
+			item = dict(r)
+			if isinstance(item.get("reply_markup"), str):
+				item["reply_markup"] = json.loads(item["reply_markup"])
+			result.append(item)
+		return result
+
+
+async def mark_notifications_sent(region_code: str, sent: Sequence[Tuple[int, Optional[int], Optional[int]]]) -> None:
+	"""Record delivered notifications: (outbox_id, inbox_id, telegram_message_id) tuples.
+
+	The Telegram message id is written back to inbox_messages as well, in one transaction.
+	"""
+	if not sent:
+		return
+	ids = [s[0] for s in sent]
+	message_ids = [s[2] for s in sent]
+	inbox_pairs = [(s[1], s[2]) for s in sent if s[1] is not None and s[2] is not None]
+	async with router.acquire(region_code) as conn:
+		async with conn.transaction():
+			await conn.execute(
+				"""
+				UPDATE notification_outbox o
+				SET status = 'sent', telegram_message_id = r.message_id, sent_at = NOW(), last_error = NULL
+				FROM unnest($1::bigint[], $2::int[]) AS r(id, message_id)
+				WHERE o.id = r.id
+				""",
+				ids, message_ids,
+			)
+			if inbox_pairs:
+				await conn.execute(
+					"""
+					UPDATE inbox_messages i
+					SET telegram_message_id = r.message_id, updated_at = NOW()
+					FROM unnest($1::int[], $2::int[]) AS r(inbox_id, message_id)
+					WHERE i.id = r.inbox_id
+					""",
+					[p[0] for p in inbox_pairs], [p[1] for p in inbox_pairs],
+				)
+
+
+async def mark_notification_failed(region_code: str, outbox_id: int, error: str,
+		attempts: int, max_attempts: int = 5) -> None:
+	"""Schedule a retry with linear backoff, or give up after `max_attempts`."""
+	async with router.acquire(region_code) as conn:
+		await conn.execute(
+			"""
+			UPDATE notification_outbox
+			SET status = CASE WHEN $3 >= $4 THEN 'failed' ELSE 'pending' END,
+				last_error = $2,
+				next_attempt_at = NOW() + make_interval(secs => $3 * $5)
+			WHERE id = $1
+			""",
+			outbox_id, error[:1000], attempts, max_attempts, _RETRY_BACKOFF_SECONDS,
+		)
@@ -2,40 +2,27 @@
 
 Discovers region -> DSN mapping from environment variables.
 B-variant: use env vars with prefix DB_URL_ e.g. DB_URL_TOSHKENT, DB_URL_SAMARQAND, ...
+The environment is parsed once into `config`'s compiled snapshot (and again
+only on `config.reload_settings()`), not on every call.
 """
 
-import os
 from typing import Dict, List
-from dotenv import load_dotenv
 
-# Ensure .env is loaded so env-based discovery works when this module is imported
-load_dotenv()
+from config import get_snapshot
 
 
 def get_region_dsn_map() -> Dict[str, str]:
-	"""Return mapping of region_code (lowercase) -> DSN from environment.
+	"""Return mapping of region_code (lowercase) -> DSN.
 
-	Looks for all env keys that start with 'DB_URL_' or 'DATABASE_URL_'
-	and maps the suffix (lowercased) to its DSN value.
+	Built from env keys that start with 'DB_URL_' or 'DATABASE_URL_'
+	(the suffix, lowercased, is the region code).
 	"""
-	dsns: Dict[str, str] = {}
-	for key, value in os.environ.items():
-		if not value:
-			continue
-		if key.startswith("DB_URL_"):
-			region_code = key[len("DB_URL_"):].lower()
-			if region_code:
-				dsns[region_code] = value
-		elif key.startswith("DATABASE_URL_"):
-			region_code = key[len("DATABASE_URL_"):].lower()
-			if region_code:
-				dsns[region_code] = value
-	return dsns
+	return {code: region.dsn for code, region in get_snapshot().regions.items()}
 
 
 def get_region_codes() -> List[str]:
 	"""Return available region codes discovered from environment."""
-	return sorted(get_region_dsn_map().keys())
+	return list(get_snapshot().region_codes)
 
 
 def get_dsn_for_region(region_code: str) -> str:
@@ -43,8 +30,8 @@ def get_dsn_for_region(region_code: str) -> str:
 
 	Raises KeyError if not found.
 	"""
-	m = get_region_dsn_map()
 	code = (region_code or "").lower()
-	if code not in m:
-		raise KeyError(f"No DSN configured for region '{region_code}' (env DB_URL_{region_code.upper()})")
-	return m[code]
\ No newline at end of file
+	region = get_snapshot().regions.get(code)
+	if region is None:
+		raise KeyError(f"No DSN configured for region '{region_code}' (env DB_URL_{(region_code or '').upper()})")
+	return region.dsn
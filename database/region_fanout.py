@@ -0,0 +1,104 @@
+"""Region fan-out - one query against every regional database at once.
+
+- fan_out(fn, regions, timeout): run `fn(region)` for all regions concurrently
+- fetch_all(sql, *args): the same SQL on every region, rows tagged with 'region'
+
+Each region gets the same deadline (REGION_FANOUT_TIMEOUT seconds from config, pool
+acquire included), so the total latency is the slowest region capped by the
+timeout instead of the sum. Regions that time out or fail are reported on
+the result rather than silently dropped; the rest is returned (`partial`).
+Connections come from the pools (`router.acquire` in a spawned task never
+uses the update's unit of work).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .db_router import router
+from .region_config import get_region_codes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+	results: Dict[str, Any] = field(default_factory=dict)
+	timed_out: List[str] = field(default_factory=list)
+	failed: Dict[str, str] = field(default_factory=dict)
+
+	@property
+	def partial(self) -> bool:
+		return bool(self.timed_out or self.failed)
+
+	@property
+	def missing(self) -> List[str]:
+		"""Regions without a result (timed out or failed), sorted."""
+		return sorted(set(self.timed_out) | set(self.failed))
+
+	def merged(self, key: Optional[Callable[[Any], Any]] = None, reverse: bool = False,
+			limit: Optional[int] = None) -> List[Any]:
+		"""Concatenate list results of all regions (region order), optionally sorted and cut."""
+		rows: List[Any] = []
+		for region in sorted(self.results):
+			rows.extend(self.results[region] or [])
+		if key is not None:
+			rows.sort(key=key, reverse=reverse)
+		return rows[:limit] if limit is not None else rows
+
+
+async def fan_out(
+	fn: Callable[[str], Awaitable[Any]],
+	regions: Optional[List[str]] = None,
+	timeout: Optional[float] = None,
+) -> FanOutResult:
+	"""Run `fn(region)` for every region concurrently with a per-region deadline."""
+	regions = list(regions) if regions is not None else get_region_codes()
+	if timeout is None:
+		from config import get_settings
+		timeout = get_settings().region_fanout_timeout
+	result = FanOutResult()
+	if not regions:
+		return result
+
+	tasks = {asyncio.ensure_future(fn(region)): region for region in regions}
+	try:
+		done, pending = await asyncio.wait(tasks, timeout=timeout)
+	except BaseException:
+		# The caller was cancelled: don't leave the region queries running
+		for task in tasks:
+			task.cancel()
+		raise
+	for task in pending:
+		task.cancel()
+	if pending:
+		await asyncio.gather(*pending, return_exceptions=True)
+
+	for task, region in tasks.items():
+		if task in pending or task.cancelled():
+			result.timed_out.append(region)
+		elif task.exception() is not None:
+			result.failed[region] = str(task.exception()) or type(task.exception()).__name__
+		else:
+			result.results[region] = task.result()
+	result.timed_out.sort()
+	if result.partial:
+		logger.warning(f"Region fan-out partial: timed out {result.timed_out}, failed {sorted(result.failed)}")
+	return result
+
+
+async def fetch_all(
+	sql: str,
+	*args: Any,
+	regions: Optional[List[str]] = None,
+	timeout: Optional[float] = None,
+) -> FanOutResult:
+	"""`conn.fetch(sql, *args)` on every region; results are lists of dicts with a 'region' key."""
+
+	async def run(region: str) -> List[Dict[str, Any]]:
+		async with router.acquire(region) as conn:
+			rows = await conn.fetch(sql, *args)
+		return [{**dict(r), "region": region} for r in rows]
+
+	return await fan_out(run, regions, timeout)
@@ -0,0 +1,156 @@
+"""Request cards queries (read model for list / inbox views).
+
+- refresh_request_card (inside the caller's transaction)
+- get_request_card / get_request_cards
+- get_request_cards_page (keyset, same cursor contract as search_service_requests_page)
+
+request_cards is rebuilt per request from service_requests, users,
+state_transitions and application_transfers by the write paths in
+service_requests_queries, state_transitions_queries and transfers_queries;
+names and phones copied from users are picked up on the request's next write.
+Schema: database/migrations/007_request_cards.sql
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db_router import router
+from .keyset import build_page, keyset_order
+from .service_requests_queries import decode_request_cursor, encode_request_cursor
+
+_REFRESH_CARD_SQL = """
+INSERT INTO request_cards (
+	request_id, workflow_type, role_current, current_status, priority, description, location,
+	client_id, client_name, client_phone, assignee_id, assignee_name, technician_id, technician_name,
+	last_action, last_from_role, last_to_role, last_actor_name, last_transition_at,
+	transfer_count, created_at, updated_at
+)
+SELECT
+	sr.id, sr.workflow_type, sr.role_current, sr.current_status, sr.priority,
+	LEFT(sr.description, 200), sr.location,
+	sr.client_id, COALESCE(c.full_name, sr.contact_info->>'full_name'), COALESCE(c.phone, sr.contact_info->>'phone'),
+	sr.current_assignee_id, a.full_name, sr.assigned_technician_id, t.full_name,
+	st.action, st.from_role, st.to_role, st.actor_name, st.created_at,
+	(SELECT COUNT(*) FROM application_transfers tr WHERE tr.application_id = sr.id),
+	sr.created_at, NOW()
+FROM service_requests sr
+LEFT JOIN users c ON c.id = sr.client_id
+LEFT JOIN users a ON a.id = sr.current_assignee_id
+LEFT JOIN users t ON t.id = sr.assigned_technician_id
+LEFT JOIN LATERAL (
+	SELECT s.action, s.from_role, s.to_role, s.created_at, u.full_name AS actor_name
+	FROM state_transitions s
+	LEFT JOIN users u ON u.id = s.actor_id
+	WHERE s.request_id = sr.id
+	ORDER BY s.created_at DESC, s.id DESC
+	LIMIT 1
+) st ON true
+WHERE sr.id = $1
+ON CONFLICT (request_id) DO UPDATE SET
+	workflow_type = EXCLUDED.workflow_type,
+	role_current = EXCLUDED.role_current,
+	current_status = EXCLUDED.current_status,
+	priority = EXCLUDED.priority,
+	description = EXCLUDED.description,
+	location = EXCLUDED.location,
+	client_id = EXCLUDED.client_id,
+	client_name = EXCLUDED.client_name,
+	client_phone = EXCLUDED.client_phone,
+	assignee_id = EXCLUDED.assignee_id,
+	assignee_name = EXCLUDED.assignee_name,
+	technician_id = EXCLUDED.technician_id,
+	technician_name = EXCLUDED.technician_name,
+	last_action = EXCLUDED.last_action,
+	last_from_role = EXCLUDED.last_from_role,
+	last_to_role = EXCLUDED.last_to_role,
+	last_actor_name = EXCLUDED.last_actor_name,
+	last_transition_at = EXCLUDED.last_transition_at,
+	transfer_count = EXCLUDED.transfer_count,
+	updated_at = EXCLUDED.updated_at
+RETURNING *
+"""
+
+# (argument name, column) of the optional equality filters, in SQL order
+_CARD_FILTERS: Tuple[Tuple[str, str], ...] = (
+	("role_current", "role_current"),
+	("status", "current_status"),
+	("assignee_id", "assignee_id"),
+	("technician_id", "technician_id"),
+	("client_id", "client_id"),
+)
+
+
+async def refresh_request_card(conn: Any, request_id: str) -> Optional[Dict[str, Any]]:
+	"""Rebuild one card on `conn` (use the connection/transaction of the business write).
+
+	Returns the card; None (a no-op) when the request does not exist, e.g. a
+	transfer of another application type.
+	"""
+	# Wait for concurrent writers of this request first: the upsert's SELECT
+	# then runs on a snapshot taken after their commit (READ COMMITTED), so a
+	# card is never rebuilt from a stale service_requests row. NO KEY UPDATE is
+	# the lock update_service_request already holds and doesn't conflict with
+	# the KEY SHARE taken by the FK checks of transition / transfer inserts
+	await conn.execute("SELECT 1 FROM service_requests WHERE id=$1 FOR NO KEY UPDATE", request_id)
+	row = await conn.fetchrow(_REFRESH_CARD_SQL, request_id)
+	return dict(row) if row else None
+
+
+async def get_request_card(region_code: str, request_id: str) -> Optional[Dict[str, Any]]:
+	async with router.acquire(region_code) as conn:
+		row = await conn.fetchrow("SELECT * FROM request_cards WHERE request_id=$1", request_id)
+		return dict(row) if row else None
+
+
+async def get_request_cards(region_code: str, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+	"""request_id -> card for a batch of ids (missing ids are left out)."""
+	if not request_ids:
+		return {}
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch("SELECT * FROM request_cards WHERE request_id = ANY($1::varchar[])", list(request_ids))
+		return {r["request_id"]: dict(r) for r in rows}
+
+
+async def get_request_cards_page(
+	region_code: str,
+	role_current: Optional[str] = None,
+	status: Optional[str] = None,
+	assignee_id: Optional[int] = None,
+	technician_id: Optional[int] = None,
+	client_id: Optional[int] = None,
+	limit: int = 20,
+	cursor: Optional[str] = None,
+	direction: str = "next",
+) -> Dict[str, Any]:
+	"""One page of cards, newest first on (created_at, request_id).
+
+	Cursor contract and result shape: database.keyset.
+	"""
+	backward, cmp, order = keyset_order(direction, cursor)
+
+	values = {
+		"role_current": role_current, "status": status, "assignee_id": assignee_id,
+		"technician_id": technician_id, "client_id": client_id,
+	}
+	conditions: List[str] = []
+	args: List[Any] = []
+	for name, column in _CARD_FILTERS:
+		if values.get(name):
+			args.append(values[name])
+			conditions.append(f"{column} = ${len(args)}")
+	if cursor is not None:
+		args.extend(decode_request_cursor(cursor))
+		conditions.append(f"(created_at, request_id) {cmp} (${len(args) - 1}::timestamptz, ${len(args)}::varchar)")
+	args.append(limit + 1)
+	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+	sql = f"SELECT * FROM request_cards {where} ORDER BY created_at {order}, request_id {order} LIMIT ${len(args)}"
+
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(sql, *args)
+
+	return await build_page(
+		rows, limit=limit, cursor=cursor, backward=backward,
+		cursor_of=lambda item: encode_request_cursor(item["created_at"], item["request_id"]),
+		first_page=lambda: get_request_cards_page(
+			region_code, role_current, status, assignee_id, technician_id, client_id, limit=limit,
+		),
+	)
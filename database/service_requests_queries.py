@@ -1,14 +1,14 @@
 """Service Requests queries - placeholder.
 
-- create/update/get service_requests
-- search/filter by role/status/priority
+- create/update/get service_requests (request_cards refreshed in the same transaction)
+- search/filter by role/status/priority (offset or keyset pages, list projection)
 """
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 import uuid
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
+from .keyset import build_page, decode_cursor, encode_cursor, keyset_order
 
 
 _ALLOWED_UPDATE_FIELDS = {
@@ -23,8 +23,8 @@ _ALLOWED_UPDATE_FIELDS = {
 }
 
 
-async def create_service_request(region_code: str, data: Dict[str, Any]) -> str:
-	"""Create a service_request; returns request id."""
+async def create_service_request(region_code: str, data: Dict[str, Any], conn: Optional[Any] = None) -> str:
+	"""Create a service_request; returns request id. Pass `conn` to join the caller's transaction."""
 	req_id = data.get("id") or str(uuid.uuid4())
 	fields = [
 		"id","workflow_type","client_id","role_current","current_status","priority",
@@ -73,13 +73,16 @@ async def create_service_request(region_code: str, data: Dict[str, Any]) -> str:
 	placeholders = ",".join(f"${i}" for i in range(1, len(values)+1))
 	columns = ",".join(fields)
 	sql = f"INSERT INTO service_requests ({columns}) VALUES ({placeholders}) RETURNING id"
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		row = await conn.fetchrow(sql, *values)
+	from .request_cards_queries import refresh_request_card
+	async with router.acquire(region_code, conn) as conn:
+		async with conn.transaction():
+			row = await conn.fetchrow(sql, *values)
+			await refresh_request_card(conn, row["id"])
 		return row["id"]
 
 
-async def update_service_request(region_code: str, request_id: str, updates: Dict[str, Any]) -> bool:
+async def update_service_request(region_code: str, request_id: str, updates: Dict[str, Any],
+		conn: Optional[Any] = None) -> bool:
 	"""Partial update. Only allows whitelisted fields."""
 	allowed = {k: v for k, v in updates.items() if k in _ALLOWED_UPDATE_FIELDS}
 	if not allowed:
@@ -94,19 +97,81 @@ async def update_service_request(region_code: str, request_id: str, updates: Dic
 	set_parts.append(f"updated_at = NOW()")
 	args.append(request_id)
 	sql = f"UPDATE service_requests SET {', '.join(set_parts)} WHERE id = ${idx}"
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		res = await conn.execute(sql, *args)
+	from .request_cards_queries import refresh_request_card
+	async with router.acquire(region_code, conn) as conn:
+		async with conn.transaction():
+			res = await conn.execute(sql, *args)
+			await refresh_request_card(conn, request_id)
 		return res.upper().startswith("UPDATE")
 
 
 async def get_service_request(region_code: str, request_id: str) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT * FROM service_requests WHERE id=$1", request_id)
 		return dict(row) if row else None
 
 
+# ===== Search =====
+# (argument name, column) of the optional equality filters, in SQL order
+_SEARCH_FILTERS: Tuple[Tuple[str, str], ...] = (
+	("role_current", "role_current"),
+	("status", "current_status"),
+	("priority", "priority"),
+	("assignee_id", "current_assignee_id"),
+	("client_id", "client_id"),
+)
+
+# Columns needed to render a list row; "full" keeps SELECT * (JSONB included)
+LIST_COLUMNS = (
+	"id, workflow_type, client_id, role_current, current_status, priority, "
+	"LEFT(description, 200) AS description, location, current_assignee_id, "
+	"assigned_technician_id, created_at, updated_at"
+)
+_PROJECTIONS = {"full": "*", "list": LIST_COLUMNS}
+
+# (filters, projection, mode) -> SQL text. The text is identical for every
+# call with the same filter combination, so asyncpg's per-connection
+# prepared-statement cache is hit instead of re-planning.
+_SEARCH_SQL_CACHE: Dict[Tuple[Tuple[str, ...], str, str], str] = {}
+
+
+def _search_filters(values: Dict[str, Any]) -> Tuple[Tuple[str, ...], List[Any]]:
+	"""Columns of the filters that are set, and their values in the same order."""
+	columns: List[str] = []
+	args: List[Any] = []
+	for name, column in _SEARCH_FILTERS:
+		if values.get(name):
+			columns.append(column)
+			args.append(values[name])
+	return tuple(columns), args
+
+
+def _search_sql(columns: Tuple[str, ...], projection: str, mode: str) -> str:
+	"""SQL for one filter combination.
+
+	mode: "offset" (LIMIT/OFFSET), "first" (newest page), "next" / "prev"
+	(keyset before / after a (created_at, id) cursor).
+	"""
+	key = (columns, projection, mode)
+	sql = _SEARCH_SQL_CACHE.get(key)
+	if sql is not None:
+		return sql
+	if projection not in _PROJECTIONS:
+		raise ValueError(f"Unknown projection: {projection!r}")
+	conditions = [f"{column} = ${i}" for i, column in enumerate(columns, 1)]
+	idx = len(columns) + 1
+	order = "ASC" if mode == "prev" else "DESC"
+	if mode in ("next", "prev"):
+		conditions.append(f"(created_at, id) {'>' if mode == 'prev' else '<'} (${idx}::timestamptz, ${idx + 1}::varchar)")
+		idx += 2
+	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+	sql = f"SELECT {_PROJECTIONS[projection]} FROM service_requests {where} ORDER BY created_at {order}, id {order} LIMIT ${idx}"
+	if mode == "offset":
+		sql += f" OFFSET ${idx + 1}"
+	_SEARCH_SQL_CACHE[key] = sql
+	return sql
+
+
 async def search_service_requests(
 	region_code: str,
 	role_current: Optional[str] = None,
@@ -116,34 +181,71 @@ async def search_service_requests(
 	client_id: Optional[int] = None,
 	limit: int = 50,
 	offset: int = 0,
+	projection: str = "full",
 ) -> List[Dict[str, Any]]:
-	conditions: List[str] = []
-	args: List[Any] = []
-	idx = 1
-	if role_current:
-		conditions.append(f"role_current = ${idx}")
-		args.append(role_current)
-		idx += 1
-	if status:
-		conditions.append(f"current_status = ${idx}")
-		args.append(status)
-		idx += 1
-	if priority:
-		conditions.append(f"priority = ${idx}")
-		args.append(priority)
-		idx += 1
-	if assignee_id:
-		conditions.append(f"current_assignee_id = ${idx}")
-		args.append(assignee_id)
-		idx += 1
-	if client_id:
-		conditions.append(f"client_id = ${idx}")
-		args.append(client_id)
-		idx += 1
-	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-	sql = f"SELECT * FROM service_requests {where} ORDER BY created_at DESC LIMIT ${idx} OFFSET ${idx+1}"
+	"""Filtered requests, newest first. `projection="list"` skips the JSONB columns.
+
+	Deep pages should use search_service_requests_page instead of `offset`.
+	"""
+	columns, args = _search_filters({
+		"role_current": role_current, "status": status, "priority": priority,
+		"assignee_id": assignee_id, "client_id": client_id,
+	})
+	sql = _search_sql(columns, projection, "offset")
 	args.extend([limit, offset])
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch(sql, *args)
+		return [dict(r) for r in rows]
+
+
+def encode_request_cursor(created_at: datetime, request_id: str) -> str:
+	"""Opaque cursor for a (created_at, id) position in a request search."""
+	return encode_cursor(created_at, request_id)
+
+
+def decode_request_cursor(cursor: str) -> Tuple[datetime, str]:
+	"""Inverse of encode_request_cursor; raises ValueError on a malformed cursor."""
+	return decode_cursor(cursor, str, "request")
+
+
+async def search_service_requests_page(
+	region_code: str,
+	role_current: Optional[str] = None,
+	status: Optional[str] = None,
+	priority: Optional[str] = None,
+	assignee_id: Optional[int] = None,
+	client_id: Optional[int] = None,
+	limit: int = 20,
+	cursor: Optional[str] = None,
+	direction: str = "next",
+	projection: str = "list",
+) -> Dict[str, Any]:
+	"""Keyset variant of search_service_requests, newest first on (created_at, id).
+
+	Same cursor contract as inbox_queries.get_role_inbox_page (database.keyset),
+	so the result plugs into utils.inbox_window. Every page costs the same no
+	matter how deep it is.
+	"""
+	backward, _, _ = keyset_order(direction, cursor)
+	columns, args = _search_filters({
+		"role_current": role_current, "status": status, "priority": priority,
+		"assignee_id": assignee_id, "client_id": client_id,
+	})
+	if cursor is not None:
+		args.extend(decode_request_cursor(cursor))
+		mode = direction
+	else:
+		mode = "first"
+	sql = _search_sql(columns, projection, mode)
+	args.append(limit + 1)
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(sql, *args)
-		return [dict(r) for r in rows]
\ No newline at end of file
+
+	return await build_page(
+		rows, limit=limit, cursor=cursor, backward=backward,
+		cursor_of=lambda item: encode_request_cursor(item["created_at"], item["id"]),
+		first_page=lambda: search_service_requests_page(
+			region_code, role_current, status, priority, assignee_id, client_id,
+			limit=limit, projection=projection,
+		),
+	)
@@ -2,18 +2,17 @@
 
 - generate_daily_statistics
 - get_employee_performance
+- get_regions_overview (all regions at once, database.region_fanout)
 """
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import date
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
+from .region_fanout import fetch_all
 
 
 async def get_daily_statistics(region_code: str, on_date: date) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT * FROM daily_statistics WHERE date=$1", on_date)
 		return dict(row) if row else None
 
@@ -44,15 +43,13 @@ async def upsert_daily_statistics(region_code: str, on_date: date, stats: Dict[s
 		INSERT INTO daily_statistics({','.join(fields)}) VALUES({placeholders})
 		ON CONFLICT (date) DO UPDATE SET {assignments}, updated_at = NOW()
 	"""
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(sql, *values)
 		return res.upper().startswith("INSERT") or res.upper().startswith("UPDATE")
 
 
 async def get_employee_performance(region_code: str, user_id: int, on_date: date) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT * FROM employee_performance WHERE user_id=$1 AND date=$2", user_id, on_date)
 		return dict(row) if row else None
 
@@ -87,7 +84,32 @@ async def upsert_employee_performance(region_code: str, user_id: int, on_date: d
 			notes = COALESCE(EXCLUDED.notes, employee_performance.notes),
 			updated_at = NOW()
 	"""
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(sql, *values)
-		return res.upper().startswith("INSERT") or res.upper().startswith("UPDATE")
\ No newline at end of file
+		return res.upper().startswith("INSERT") or res.upper().startswith("UPDATE")
+
+
+_OVERVIEW_SQL = """
+SELECT
+	(SELECT COUNT(*) FROM users) AS total_users,
+	(SELECT COUNT(*) FROM users WHERE is_active) AS active_users,
+	(SELECT COUNT(*) FROM users WHERE role = 'technician') AS technicians,
+	(SELECT COUNT(*) FROM service_requests) AS total_requests,
+	(SELECT COUNT(*) FROM service_requests WHERE current_status = 'completed') AS completed_requests,
+	(SELECT COUNT(*) FROM service_requests WHERE current_status NOT IN ('completed', 'cancelled')) AS open_requests
+"""
+
+_OVERVIEW_FIELDS = ("total_users", "active_users", "technicians", "total_requests", "completed_requests", "open_requests")
+
+
+async def get_regions_overview(regions: Optional[List[str]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+	"""Admin-wide counters, every region queried concurrently.
+
+	Returns {"regions": [per-region row with 'region'], "totals": {...},
+	"missing": [regions that timed out or failed], "partial": bool}; totals
+	only cover the regions that answered.
+	"""
+	res = await fetch_all(_OVERVIEW_SQL, regions=regions, timeout=timeout)
+	rows = res.merged(key=lambda r: r["region"])
+	totals = {f: sum(int(r[f] or 0) for r in rows) for f in _OVERVIEW_FIELDS}
+	return {"regions": rows, "totals": totals, "missing": res.missing, "partial": res.partial}
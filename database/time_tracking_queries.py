@@ -5,16 +5,13 @@
 """
 from typing import Any, Dict, List, Optional
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
 
 
 async def start_tracking(region_code: str, request_id: str, user_id: int, role: str,
 		action_type: str = "started", workflow_stage: Optional[str] = None,
 		notes: Optional[str] = None) -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO time_tracking(request_id, user_id, role, action_type, workflow_stage, notes)
@@ -33,8 +30,7 @@ async def start_tracking(region_code: str, request_id: str, user_id: int, role:
 
 async def end_tracking(region_code: str, request_id: str, user_id: int, action_type: str = "started",
 		efficiency_score: Optional[float] = None, quality_rating: Optional[float] = None) -> bool:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(
 			"""
 			UPDATE time_tracking
@@ -51,8 +47,7 @@ async def end_tracking(region_code: str, request_id: str, user_id: int, action_t
 
 
 async def list_tracking_by_request(region_code: str, request_id: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(
 			"SELECT * FROM time_tracking WHERE request_id=$1 ORDER BY started_at ASC LIMIT $2 OFFSET $3",
 			request_id, limit, offset,
@@ -61,8 +56,7 @@ async def list_tracking_by_request(region_code: str, request_id: str, limit: int
 
 
 async def list_tracking_by_user(region_code: str, user_id: int, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(
 			"SELECT * FROM time_tracking WHERE user_id=$1 ORDER BY started_at DESC LIMIT $2 OFFSET $3",
 			user_id, limit, offset,
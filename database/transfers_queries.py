@@ -5,23 +5,24 @@
 """
 from typing import Any, Dict, List, Optional
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
+from .request_cards_queries import refresh_request_card
 
 
 async def create_transfer(region_code: str, application_id: str, from_role: Optional[str], to_role: str,
 		transferred_by: int, transfer_reason: Optional[str] = None, transfer_notes: Optional[str] = None,
-		application_type: str = "service_request") -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
-		row = await conn.fetchrow(
-			"""
-			INSERT INTO application_transfers(application_id, application_type, from_role, to_role, transferred_by, transfer_reason, transfer_notes)
-			VALUES ($1,$2,$3,$4,$5,$6,$7) RETURNING id
-			""",
-			application_id, application_type, from_role, to_role, transferred_by, transfer_reason, transfer_notes,
-		)
+		application_type: str = "service_request", conn: Optional[Any] = None) -> int:
+	async with router.acquire(region_code, conn) as conn:
+		async with conn.transaction():
+			row = await conn.fetchrow(
+				"""
+				INSERT INTO application_transfers(application_id, application_type, from_role, to_role, transferred_by, transfer_reason, transfer_notes)
+				VALUES ($1,$2,$3,$4,$5,$6,$7) RETURNING id
+				""",
+				application_id, application_type, from_role, to_role, transferred_by, transfer_reason, transfer_notes,
+			)
+			if application_type == "service_request":
+				await refresh_request_card(conn, application_id)
 		return int(row["id"]) if row else 0
 
 
@@ -50,7 +51,6 @@ async def list_transfers(region_code: str, application_id: Optional[str] = None,
 	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 	sql = f"SELECT * FROM application_transfers {where} ORDER BY created_at DESC LIMIT ${idx} OFFSET ${idx+1}"
 	args.extend([limit, offset])
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(sql, *args)
 		return [dict(r) for r in rows]
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Unit of work: one transaction per update, on demand.
+
+`middlewares.unit_of_work_middleware` opens a UnitOfWork for the update's
+active region and binds it to the running context:
+
+- outside a transaction nothing is held: `router.acquire(region)` takes a
+  pool connection per query, so an update waiting on Telegram sends or on
+  tasks it spawned (data loaders, prefetch, fan-out) pins no connection
+- `async with uow.transaction():` acquires one connection (at most
+  DB_ACQUIRE_TIMEOUT seconds) and releases it at commit / rollback; inside,
+  `router.acquire(region)` in the update's own task hands out that
+  connection, and the query helpers' own `conn.transaction()` blocks become
+  savepoints. Tasks spawned from the handler still use the pool (one
+  asyncpg connection can't run two queries at once), so every open
+  transaction needs one more free connection for them: keep
+  DB_POOL_MAX_SIZE above the number of transactions expected at once
+- `after_commit(callback)` defers in-process side effects (cache deltas)
+  until the surrounding transaction commits; outside one it runs at once
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from .db_router import router, current_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+	def __init__(self, region_code: str) -> None:
+		self.region_code = (region_code or "").lower()
+		self._conn: Optional[Any] = None
+		self._pool: Optional[Any] = None
+		self._owner: Optional[asyncio.Task] = None
+		self._tx: Optional[Any] = None
+		self._tx_depth = 0
+		self._after_commit: List[Callable[[], Any]] = []
+		self._closed = False
+
+	def bind(self) -> Any:
+		"""Bind to the current context/task; returns the token for `unbind`."""
+		self._owner = asyncio.current_task()
+		return current_unit_of_work.set(self)
+
+	def unbind(self, token: Any) -> None:
+		current_unit_of_work.reset(token)
+
+	@property
+	def acquired(self) -> bool:
+		return self._conn is not None
+
+	@property
+	def in_transaction(self) -> bool:
+		return self._tx is not None
+
+	def owns(self, region_code: str) -> bool:
+		"""True if `router.acquire(region_code)` in this task should use this unit of work."""
+		return (
+			not self._closed
+			and (region_code or "").lower() == self.region_code
+			and asyncio.current_task() is self._owner
+		)
+
+	async def connection(self) -> Any:
+		"""Connection of the open transaction."""
+		if self._closed:
+			raise RuntimeError("Unit of work is closed")
+		if self._conn is None:
+			raise RuntimeError("No transaction in progress")
+		return self._conn
+
+	async def _acquire(self) -> Any:
+		self._pool = await router.get_pool(self.region_code)
+		self._conn = await self._pool.acquire(timeout=router.acquire_timeout())
+		return self._conn
+
+	async def _release(self) -> None:
+		conn, self._conn = self._conn, None
+		if conn is not None:
+			try:
+				await self._pool.release(conn)
+			except Exception as e:
+				logger.warning(f"Unit of work release failed: {e}")
+
+	@asynccontextmanager
+	async def transaction(self) -> AsyncIterator[Any]:
+		"""Run the block in the update's transaction (nested blocks join it)."""
+		if self._closed:
+			raise RuntimeError("Unit of work is closed")
+		if self._tx is not None:
+			self._tx_depth += 1
+			try:
+				yield self._conn
+			finally:
+				self._tx_depth -= 1
+			return
+		conn = await self._acquire()
+		committed = False
+		try:
+			self._tx = conn.transaction()
+			await self._tx.start()
+			try:
+				yield conn
+			except BaseException:
+				await self._tx.rollback()
+				raise
+			await self._tx.commit()
+			committed = True
+		finally:
+			self._tx = None
+			if not committed:
+				self._after_commit.clear()
+			await self._release()
+		await self._run_after_commit()
+
+	def after_commit(self, callback: Callable[[], Any]) -> None:
+		if self._tx is None:
+			raise RuntimeError("No transaction in progress")
+		self._after_commit.append(callback)
+
+	async def _run_after_commit(self) -> None:
+		callbacks, self._after_commit = self._after_commit, []
+		for callback in callbacks:
+			try:
+				res = callback()
+				if asyncio.iscoroutine(res):
+					await res
+			except Exception as e:
+				logger.warning(f"after_commit callback failed: {e}")
+
+	async def close(self) -> None:
+		"""Roll back an unfinished transaction and release the connection."""
+		self._closed = True
+		if self._tx is not None:
+			try:
+				await self._tx.rollback()
+			except Exception as e:
+				logger.warning(f"Unit of work rollback failed: {e}")
+			self._tx = None
+			self._after_commit.clear()
+		await self._release()
+
+
+def get_unit_of_work() -> Optional[UnitOfWork]:
+	return current_unit_of_work.get()
+
+
+def after_commit(callback: Callable[[], Any]) -> None:
+	"""Run `callback` once the current unit-of-work transaction commits (now if there is none).
+
+	Callbacks must be sync here (cache updates); they are dropped on rollback.
+	"""
+	uow = current_unit_of_work.get()
+	if uow is not None and uow.in_transaction and asyncio.current_task() is uow._owner:
+		uow.after_commit(callback)
+		return
+	callback()
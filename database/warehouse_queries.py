@@ -1,16 +1,14 @@
 from typing import Any, Dict, List, Optional
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
+from .invalidation_bus import publish, MATERIAL_CHANGED
 
 
 # ===== Materials =====
 async def create_material(region_code: str, name: str, category: str = "general",
 		quantity: int = 0, unit: str = "pcs", min_quantity: int = 5,
 		price: float = 0.0, description: Optional[str] = None, supplier: Optional[str] = None) -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO materials(name, category, quantity, unit, min_quantity, price, description, supplier)
@@ -18,7 +16,9 @@ async def create_material(region_code: str, name: str, category: str = "general"
 			""",
 			name, category, quantity, unit, min_quantity, price, description, supplier,
 		)
-		return int(row["id"]) if row else 0
+		material_id = int(row["id"]) if row else 0
+		await publish(MATERIAL_CHANGED, material_id, region=region_code, conn=conn)
+		return material_id
 
 
 async def update_material(region_code: str, material_id: int, updates: Dict[str, Any]) -> bool:
@@ -36,19 +36,27 @@ async def update_material(region_code: str, material_id: int, updates: Dict[str,
 		return False
 	args.append(material_id)
 	sql = f"UPDATE materials SET {', '.join(set_parts)}, updated_at=NOW() WHERE id = ${idx}"
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		res = await conn.execute(sql, *args)
+		await publish(MATERIAL_CHANGED, material_id, region=region_code, conn=conn)
 		return res.upper().startswith("UPDATE")
 
 
 async def get_material(region_code: str, material_id: int) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow("SELECT * FROM materials WHERE id=$1", material_id)
 		return dict(row) if row else None
 
 
+async def get_materials_by_ids(region_code: str, material_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+	"""materials.id -> material row for a batch of ids in one query."""
+	if not material_ids:
+		return {}
+	async with router.acquire(region_code) as conn:
+		rows = await conn.fetch("SELECT * FROM materials WHERE id = ANY($1::int[])", list(material_ids))
+		return {r["id"]: dict(r) for r in rows}
+
+
 async def list_materials(region_code: str, category: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
 	conditions: List[str] = []
 	args: List[Any] = []
@@ -60,16 +68,14 @@ async def list_materials(region_code: str, category: Optional[str] = None, limit
 	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 	sql = f"SELECT * FROM materials {where} ORDER BY name ASC LIMIT ${idx} OFFSET ${idx+1}"
 	args.extend([limit, offset])
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(sql, *args)
 		return [dict(r) for r in rows]
 
 
 # ===== Request Materials =====
 async def add_request_material(region_code: str, request_id: str, material_id: int, quantity: int, unit: str = "pcs") -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"INSERT INTO request_materials(request_id, material_id, quantity, unit) VALUES ($1,$2,$3,$4) RETURNING id",
 			request_id, material_id, quantity, unit,
@@ -78,8 +84,7 @@ async def add_request_material(region_code: str, request_id: str, material_id: i
 
 
 async def list_request_materials(region_code: str, request_id: str) -> List[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch("SELECT * FROM request_materials WHERE request_id=$1", request_id)
 		return [dict(r) for r in rows]
 
@@ -88,8 +93,7 @@ async def list_request_materials(region_code: str, request_id: str) -> List[Dict
 async def add_inventory_transaction(region_code: str, request_id: Optional[str], material_id: Optional[int],
 		change_type: str, quantity: int, unit_price: Optional[float], total_price: Optional[float],
 		performed_by: Optional[int], performed_role: Optional[str]) -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO inventory_transactions(request_id, material_id, change_type, quantity, unit_price, total_price, performed_by, performed_role)
@@ -102,8 +106,7 @@ async def add_inventory_transaction(region_code: str, request_id: Optional[str],
 
 async def issue_item(region_code: str, request_id: Optional[str], material_id: int, quantity: int,
 		issued_by: int, issued_to: Optional[int]) -> int:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"INSERT INTO issued_items(request_id, material_id, quantity, issued_by, issued_to) VALUES ($1,$2,$3,$4,$5) RETURNING id",
 			request_id, material_id, quantity, issued_by, issued_to,
@@ -4,16 +4,13 @@
 """
 from typing import Any, Dict, List, Optional
 
-from .db_router import DBRouter
-
-router = DBRouter()
+from .db_router import router
 
 
 async def upsert_word_document(region_code: str, request_id: str, document_type: str,
 		payload: Dict[str, Any]) -> int:
 	"""Upsert by (request_id, document_type). Returns id."""
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"""
 			INSERT INTO word_documents(
@@ -90,8 +87,7 @@ async def upsert_word_document(region_code: str, request_id: str, document_type:
 
 
 async def get_word_document(region_code: str, request_id: str, document_type: str) -> Optional[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		row = await conn.fetchrow(
 			"SELECT * FROM word_documents WHERE request_id=$1 AND document_type=$2",
 			request_id, document_type,
@@ -100,8 +96,7 @@ async def get_word_document(region_code: str, request_id: str, document_type: st
 
 
 async def list_word_documents(region_code: str, request_id: str) -> List[Dict[str, Any]]:
-	pool = await router.get_pool(region_code)
-	async with pool.acquire() as conn:
+	async with router.acquire(region_code) as conn:
 		rows = await conn.fetch(
 			"SELECT * FROM word_documents WHERE request_id=$1 ORDER BY generated_at DESC",
 			request_id,
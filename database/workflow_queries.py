@@ -0,0 +1,273 @@
+"""Workflow queries - composite steps in one transaction.
+
+- transfer_to_role (request -> role, transition, transfer, inbox, audit)
+- assign_technician (same, with assigned_technician_id)
+- complete_request (status, transition, close inbox rows, audit)
+
+Each step is one data-modifying CTE (service_requests update, transition,
+transfer, inbox row + counters, completion of the previous inbox rows, audit)
+followed in the same transaction by the request card refresh and the
+outbox / NOTIFY side effects. One acquire and three round trips instead of
+update_service_request + insert_transition + create_transfer +
+create_on_assignment + log_action. The result has everything a handler
+needs to render: the updated request, the refreshed card and the ids.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from .db_router import router
+from .inbox_queries import _counters_changed, _notify_new_item
+from .outbox_queries import enqueue_notification
+from .request_cards_queries import refresh_request_card
+
+
+class _Args:
+	"""Positional parameter list for hand-built SQL."""
+
+	def __init__(self) -> None:
+		self.values: List[Any] = []
+
+	def __call__(self, value: Any, cast: str = "") -> str:
+		self.values.append(value)
+		return f"${len(self.values)}{cast}"
+
+
+async def _run_step(
+	region_code: str,
+	request_id: str,
+	*,
+	set_fields: Dict[str, Any],
+	action: str,
+	actor_id: int,
+	actor_role: str,
+	to_role: Optional[str] = None,
+	comments: Optional[str] = None,
+	transfer: bool = False,
+	transfer_reason: Optional[str] = None,
+	inbox: Optional[Dict[str, Any]] = None,
+	close_inbox: bool = True,
+	notify_text: Optional[str] = None,
+	conn: Optional[Any] = None,
+) -> Optional[Dict[str, Any]]:
+	a = _Args()
+	rid = a(request_id)
+	sets = ", ".join(f"{column} = {a(value)}" for column, value in set_fields.items())
+	actor = a(actor_id, "::int")
+	ctes = [
+		f"old AS (SELECT id, role_current, current_status, current_assignee_id FROM service_requests WHERE id = {rid} FOR UPDATE)",
+		f"sr AS (UPDATE service_requests s SET {sets}, updated_at = NOW() FROM old WHERE s.id = old.id "
+		f"RETURNING s.*, old.role_current AS from_role, old.current_status AS from_status)",
+	]
+	to = a(to_role, "::user_role_enum") if to_role else "sr.role_current"
+	ctes.append(
+		f"st AS (INSERT INTO state_transitions(request_id, from_role, to_role, action, actor_id, comments) "
+		f"SELECT id, from_role, {to}, {a(action)}, {actor}, {a(comments)} FROM sr RETURNING id)"
+	)
+	if transfer:
+		ctes.append(
+			f"tr AS (INSERT INTO application_transfers(application_id, application_type, from_role, to_role, "
+			f"transferred_by, transfer_reason, transfer_notes) "
+			f"SELECT id, 'service_request', from_role, {to}, {actor}, {a(transfer_reason)}, {a(comments)} FROM sr RETURNING id)"
+		)
+	if close_inbox:
+		# Open inbox rows of the previous holder are done (the new row below is
+		# not visible to this UPDATE: all CTEs share one snapshot)
+		ctes.append(
+			"done AS (UPDATE inbox_messages i SET completed = true, updated_at = NOW() FROM sr "
+			"WHERE i.application_id = sr.id AND i.application_type = 'service_request' AND NOT i.completed "
+			"RETURNING i.assigned_role, COALESCE(i.recipient_id, 0) AS recipient_id)"
+		)
+		ctes.append(
+			"done_cnt AS (SELECT assigned_role, recipient_id, COUNT(*) AS n FROM done GROUP BY 1, 2)"
+		)
+	if inbox is not None:
+		recipient = a(inbox.get("recipient_id"), "::int")
+		ctes.append(
+			f"im AS (INSERT INTO inbox_messages(application_id, application_type, assigned_role, message_type, "
+			f"title, description, priority, recipient_id, reply_markup_data, metadata) "
+			f"SELECT id, 'service_request', {to}, {a(inbox.get('message_type', 'transfer'))}, "
+			f"{a(inbox.get('title'))}, COALESCE({a(inbox.get('description'))}, LEFT(description, 500)), priority, {recipient}, "
+			f"{a(json.dumps(inbox.get('reply_markup_data') or {}), '::jsonb')}, "
+			f"{a(json.dumps(inbox.get('metadata') or {}), '::jsonb')} FROM sr "
+			f"RETURNING id, assigned_role, recipient_id)"
+		)
+	deltas = []
+	if close_inbox:
+		deltas.append("SELECT assigned_role, recipient_id, 0 AS du, -n AS dc FROM done_cnt")
+	if inbox is not None:
+		deltas.append("SELECT assigned_role, COALESCE(recipient_id, 0), 1, 1 FROM im")
+	if deltas:
+		# One counter change per (role, recipient): a row must not be modified
+		# by two CTEs of the same statement
+		ctes.append(
+			f"delta AS (SELECT assigned_role, recipient_id, SUM(du) AS du, SUM(dc) AS dc "
+			f"FROM ({' UNION ALL '.join(deltas)}) x GROUP BY 1, 2)"
+		)
+		ctes.append(
+			"cnt_upd AS (UPDATE inbox_counters c SET unread = GREATEST(c.unread + d.du, 0), "
+			"uncompleted = GREATEST(c.uncompleted + d.dc, 0), updated_at = NOW() FROM delta d "
+			"WHERE c.assigned_role = d.assigned_role AND c.recipient_id = d.recipient_id "
+			"RETURNING c.assigned_role, c.recipient_id)"
+		)
+		ctes.append(
+			"cnt_ins AS (INSERT INTO inbox_counters(assigned_role, recipient_id, unread, uncompleted) "
+			"SELECT d.assigned_role, d.recipient_id, GREATEST(d.du, 0), GREATEST(d.dc, 0) FROM delta d "
+			"WHERE NOT EXISTS (SELECT 1 FROM cnt_upd u WHERE u.assigned_role = d.assigned_role "
+			"AND u.recipient_id = d.recipient_id) ON CONFLICT (assigned_role, recipient_id) DO NOTHING)"
+		)
+	ctes.append(
+		f"au AS (INSERT INTO audit_log(actor_user_id, actor_role, action, entity_type, entity_id, request_id, "
+		f"target_user_id, before_data, after_data) "
+		f"SELECT {actor}, {a(actor_role, '::user_role_enum')}, {a(action)}, 'service_request', id, id, current_assignee_id, "
+		f"jsonb_build_object('role_current', from_role, 'current_status', from_status), "
+		f"jsonb_build_object('role_current', role_current, 'current_status', current_status, "
+		f"'current_assignee_id', current_assignee_id) FROM sr RETURNING id)"
+	)
+	select = [
+		"(SELECT row_to_json(sr)::jsonb FROM sr) AS request",
+		"(SELECT id FROM st) AS transition_id",
+		"(SELECT id FROM au) AS audit_id",
+		f"{'(SELECT id FROM tr)' if transfer else 'NULL::int'} AS transfer_id",
+		f"{'(SELECT id FROM im)' if inbox is not None else 'NULL::int'} AS inbox_id",
+		f"{'(SELECT jsonb_agg(to_jsonb(done_cnt)) FROM done_cnt)' if close_inbox else 'NULL::jsonb'} AS closed",
+	]
+	sql = f"WITH {', '.join(ctes)} SELECT {', '.join(select)}"
+
+	async with router.acquire(region_code, conn) as conn:
+		async with conn.transaction():
+			row = await conn.fetchrow(sql, *a.values)
+			if row is None or row["request"] is None:
+				return None
+			request = row["request"]
+			if isinstance(request, str):
+				request = json.loads(request)
+			card = await refresh_request_card(conn, request_id)
+			inbox_id = row["inbox_id"]
+			if inbox_id:
+				recipient_id = inbox.get("recipient_id")
+				if notify_text and recipient_id:
+					await enqueue_notification(
+						conn, notify_text, inbox_id=inbox_id, recipient_id=recipient_id, parse_mode="HTML",
+						reply_markup=inbox.get("notify_reply_markup"),
+					)
+				await _notify_new_item(conn, region_code, request["role_current"], recipient_id, inbox_id)
+
+	closed = row["closed"]
+	if isinstance(closed, str):
+		closed = json.loads(closed)
+	for group in closed or []:
+		_counters_changed(region_code, group["assigned_role"], group["recipient_id"], uncompleted=-int(group["n"]))
+	if inbox_id:
+		_counters_changed(region_code, request["role_current"], inbox.get("recipient_id"), unread=1, uncompleted=1)
+	return {
+		"request": request,
+		"card": card,
+		"transition_id": row["transition_id"],
+		"transfer_id": row["transfer_id"],
+		"inbox_id": inbox_id,
+		"audit_id": row["audit_id"],
+		"closed_inbox": sum(int(g["n"]) for g in closed or []),
+	}
+
+
+async def transfer_to_role(
+	region_code: str,
+	request_id: str,
+	to_role: str,
+	actor_id: int,
+	actor_role: str,
+	*,
+	recipient_id: Optional[int] = None,
+	status: Optional[str] = None,
+	reason: Optional[str] = None,
+	comments: Optional[str] = None,
+	inbox_title: Optional[str] = None,
+	notify_text: Optional[str] = None,
+	conn: Optional[Any] = None,
+) -> Optional[Dict[str, Any]]:
+	"""Hand a request to another role (optionally one user, users.id `recipient_id`).
+
+	Returns {"request", "card", "transition_id", "transfer_id", "inbox_id",
+	"audit_id", "closed_inbox"}, or None if the request does not exist.
+	"""
+	fields: Dict[str, Any] = {
+		"role_current": to_role,
+		"current_assignee_id": recipient_id,
+		"current_assignee_role": to_role if recipient_id else None,
+	}
+	if status:
+		fields["current_status"] = status
+	return await _run_step(
+		region_code, request_id,
+		set_fields=fields,
+		action="transfer",
+		actor_id=actor_id,
+		actor_role=actor_role,
+		to_role=to_role,
+		comments=comments,
+		transfer=True,
+		transfer_reason=reason,
+		inbox={"recipient_id": recipient_id, "title": inbox_title or f"Ariza #{request_id}", "message_type": "transfer"},
+		notify_text=notify_text,
+		conn=conn,
+	)
+
+
+async def assign_technician(
+	region_code: str,
+	request_id: str,
+	technician_id: int,
+	actor_id: int,
+	actor_role: str,
+	*,
+	comments: Optional[str] = None,
+	inbox_title: Optional[str] = None,
+	notify_text: Optional[str] = None,
+	conn: Optional[Any] = None,
+) -> Optional[Dict[str, Any]]:
+	"""Assign a technician (users.id): role, assignee and status change in one step."""
+	return await _run_step(
+		region_code, request_id,
+		set_fields={
+			"role_current": "technician",
+			"current_assignee_id": technician_id,
+			"current_assignee_role": "technician",
+			"assigned_technician_id": technician_id,
+			"current_status": "assigned_to_technician",
+		},
+		action="assign_technician",
+		actor_id=actor_id,
+		actor_role=actor_role,
+		to_role="technician",
+		comments=comments,
+		transfer=True,
+		inbox={"recipient_id": technician_id, "title": inbox_title or f"Ariza #{request_id}", "message_type": "application"},
+		notify_text=notify_text,
+		conn=conn,
+	)
+
+
+async def complete_request(
+	region_code: str,
+	request_id: str,
+	actor_id: int,
+	actor_role: str,
+	*,
+	comments: Optional[str] = None,
+	diagnosis: Optional[str] = None,
+	conn: Optional[Any] = None,
+) -> Optional[Dict[str, Any]]:
+	"""Mark a request completed and close all its open inbox rows."""
+	fields: Dict[str, Any] = {"current_status": "completed"}
+	if diagnosis is not None:
+		fields["diagnosis"] = diagnosis
+	return await _run_step(
+		region_code, request_id,
+		set_fields=fields,
+		action="complete",
+		actor_id=actor_id,
+		actor_role=actor_role,
+		comments=comments,
+		conn=conn,
+	)
@@ -26,36 +26,21 @@ def setup_handlers(dp: Dispatcher):
         from handlers.call_center_supervisor import get_call_center_supervisor_router
         from handlers.warehouse import get_warehouse_router
         
-        # Include role-based routers in order of usage frequency
-        # Client router should be included early since it's the most common
-        client_router = get_client_router()
-        dp.include_router(client_router)
-        
-        # Include manager router early to ensure it gets priority for inbox handlers
-        manager_router = get_manager_router()
-        dp.include_router(manager_router)
-        
-        # Include other role routers
-        call_center_router = get_call_center_router()
-        dp.include_router(call_center_router)
-        
-        call_center_supervisor_router = get_call_center_supervisor_router()
-        dp.include_router(call_center_supervisor_router)
-        
-        technician_router = get_technician_router()
-        dp.include_router(technician_router)
-        
-        junior_manager_router = get_junior_manager_router()
-        dp.include_router(junior_manager_router)
-        
-        controller_router = get_controller_router()
-        dp.include_router(controller_router)
-        
-        warehouse_router = get_warehouse_router()
-        dp.include_router(warehouse_router)
-        
-        admin_router = get_admin_router()
-        dp.include_router(admin_router)
+        # Role routers sit behind one dispatch router: the user's role is
+        # resolved once per update (RoleMiddleware) and only the matching
+        # role router is tried.
+        from utils.role_system import RoleDispatchRouter
+        role_dispatch_router = RoleDispatchRouter()
+        role_dispatch_router.include_role_router("client", get_client_router())
+        role_dispatch_router.include_role_router("manager", get_manager_router())
+        role_dispatch_router.include_role_router("call_center", get_call_center_router())
+        role_dispatch_router.include_role_router("call_center_supervisor", get_call_center_supervisor_router())
+        role_dispatch_router.include_role_router("technician", get_technician_router())
+        role_dispatch_router.include_role_router("junior_manager", get_junior_manager_router())
+        role_dispatch_router.include_role_router("controller", get_controller_router())
+        role_dispatch_router.include_role_router("warehouse", get_warehouse_router())
+        role_dispatch_router.include_role_router("admin", get_admin_router())
+        dp.include_router(role_dispatch_router)
 
         
         print("✅ All handlers setup completed successfully")
@@ -3,9 +3,10 @@ from aiogram.types import Message
 from aiogram.filters import Command
 import asyncio
 
-from config import settings, get_admin_regions
+from config import get_admin_regions, is_global_admin
 from utils.db import get_pool, get_clients_pool
 from database.region_config import get_region_codes
+from database.region_fanout import fan_out
 
 
 async def _check_pool(name: str) -> str:
@@ -37,12 +38,17 @@ def get_admin_status_router() -> Router:
 
     @router.message(Command("status"))
     async def status(message: Message):
-        if message.from_user.id not in settings.admin_ids:
+        if not is_global_admin(message.from_user.id):
             return
         regions = get_region_codes()
-        checks = [_check_pool(region) for region in regions]
-        checks.append(_check_clients())
-        results = await asyncio.gather(*checks, return_exceptions=False)
+        # Every region has its own deadline; a hanging one is reported, not waited for
+        region_checks, clients = await asyncio.gather(fan_out(_check_pool, regions), _check_clients())
+        results = [
+            region_checks.results.get(region)
+            or (f"{region}: ERROR ({region_checks.failed[region]})" if region in region_checks.failed else f"{region}: TIMEOUT")
+            for region in regions
+        ]
+        results.append(clients)
         assigned_regions = get_admin_regions(message.from_user.id)
         text = "\n".join([
             "🔎 DB status:",
@@ -52,4 +58,25 @@ def get_admin_status_router() -> Router:
         ])
         await message.answer(text)
 
+    @router.message(Command("reload_config"))
+    async def reload_config_command(message: Message):
+        """Re-read .env (admins, region DSNs, pool sizes) without a restart"""
+        if not is_global_admin(message.from_user.id):
+            return
+        from utils.config_reload import reload_config
+        try:
+            summary = await reload_config()
+        except Exception as e:
+            await message.answer(f"❌ Konfiguratsiyani qayta yuklab bo'lmadi: {e}")
+            return
+        admins_changed = "ha" if summary['admins_changed'] else "yo'q"
+        text = "\n".join([
+            "🔄 Konfiguratsiya qayta yuklandi",
+            f"➕ Yangi regionlar: {', '.join(summary['regions_added']) or '—'}",
+            f"➖ O'chirilgan regionlar: {', '.join(summary['regions_removed']) or '—'}",
+            f"♻️ O'zgargan regionlar: {', '.join(summary['regions_changed']) or '—'}",
+            f"👮‍♂️ Adminlar o'zgardi: {admins_changed}",
+        ])
+        await message.answer(text)
+
     return router
\ No newline at end of file
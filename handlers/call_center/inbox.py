@@ -14,6 +14,7 @@ from datetime import datetime
 from states.call_center import CallCenterInboxStates
 from filters.role_filter import RoleFilter
 from aiogram.filters import StateFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
 from keyboards.call_center_buttons import (
     get_operator_resolve_keyboard,
     get_operator_cancel_keyboard,
@@ -142,7 +143,7 @@ def get_call_center_inbox_router():
         # Show regular inbox
         await call_center_inbox(message, state)
 
-    @router.message(F.text.in_(['📥 Inbox', '📥 Входящие']))
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def call_center_inbox(message: Message, state: FSMContext):
         """Handle operator inbox"""
         try:
@@ -13,6 +13,7 @@ from datetime import datetime
 # States imports
 from states.call_center_supervisor_states import CallCenterSupervisorMainMenuStates
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
 from aiogram.filters import StateFilter
 from keyboards.call_center_supervisor_buttons import (
     get_supervisor_back_to_inbox_keyboard,
@@ -180,7 +181,7 @@ def get_supervisor_inbox_router():
     router.message.filter(role_filter)
     router.callback_query.filter(role_filter)
 
-    @router.message(F.text.in_(["📥 Inbox", "📥 Входящие"]))
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def view_inbox(message: Message, state: FSMContext):
         """Supervisor view inbox handler"""
         try:
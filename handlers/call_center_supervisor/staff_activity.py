@@ -1,9 +1,14 @@
+import html
+
 from aiogram import F, Router
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from filters.role_filter import RoleFilter
 from typing import List, Dict
+from datetime import datetime
 from keyboards.call_center_supervisor_buttons import get_call_center_supervisor_main_menu
+from utils.activity_tracker import activity_tracker
+from utils.data_loader import current_loaders
 
 
 def get_call_center_supervisor_staff_activity_router():
@@ -29,6 +34,11 @@ def get_call_center_supervisor_staff_activity_router():
         await callback.answer()
         await _show_staff_workload(callback)
 
+    @router.callback_query(F.data == "ccs_staff_online")
+    async def cb_staff_online(callback: CallbackQuery, state: FSMContext):
+        await callback.answer()
+        await _show_staff_online(callback, state)
+
     @router.callback_query(F.data == "ccs_staff_list")
     async def cb_staff_list(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
@@ -105,7 +115,10 @@ def _get_staff_activity_menu_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
             InlineKeyboardButton(text=("📊 Samaradorlik" if lang == 'uz' else "📊 Эффективность"), callback_data="ccs_staff_perf"),
             InlineKeyboardButton(text=("📋 Ish yuki" if lang == 'uz' else "📋 Нагрузка"), callback_data="ccs_staff_load"),
         ],
-        [InlineKeyboardButton(text=("👤 Operatorlar kesimi" if lang == 'uz' else "👤 По операторам"), callback_data="ccs_staff_list")],
+        [
+            InlineKeyboardButton(text=("👤 Operatorlar kesimi" if lang == 'uz' else "👤 По операторам"), callback_data="ccs_staff_list"),
+            InlineKeyboardButton(text=("🟢 Onlayn" if lang == 'uz' else "🟢 В сети"), callback_data="ccs_staff_online"),
+        ],
         [InlineKeyboardButton(text=("🔙 Orqaga" if lang == 'uz' else "🔙 Назад"), callback_data="ccs_staff_back")],
     ]
     return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -133,6 +146,22 @@ async def _show_staff_workload(callback: CallbackQuery):
     await _edit_or_answer(callback, "\n".join(text_lines))
 
 
+async def _show_staff_online(callback: CallbackQuery, state: FSMContext):
+    region = (await state.get_data()).get('active_region')
+    online = activity_tracker.online(region, roles=('call_center',)) if region else []
+    if not online:
+        await _edit_or_answer(callback, "🟢 Hozir onlayn operatorlar yo'q")
+        return
+    users = await current_loaders().users_by_telegram(region).load_many([o[1] for o in online])
+    now = datetime.now(online[0][3].tzinfo)
+    text_lines = [f"🟢 <b>Onlayn operatorlar ({len(online)}):</b>", ""]
+    for (_, telegram_id, _, seen_at), user in zip(online, users):
+        name = html.escape((user or {}).get('full_name') or str(telegram_id))
+        minutes = int((now - seen_at).total_seconds() // 60)
+        text_lines.append(f"📞 {name} — {minutes} daqiqa oldin")
+    await _edit_or_answer(callback, "\n".join(text_lines))
+
+
 async def _show_staff_detail(callback: CallbackQuery, state: FSMContext):
     staff = _get_mock_call_center_staff()
     data = await state.get_data()
@@ -13,6 +13,8 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.filters import StateFilter
 from states.controller_states import ControllerRequestStates
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
+from utils.inbox_window import InboxWindow, ListSource
 
 # Mock functions to replace utils and database imports
 async def get_user_by_telegram_id(telegram_id: int):
@@ -207,6 +209,10 @@ async def assign_to_call_center_supervisor(application_id: str):
     print(f"Mock: Assigning application {application_id} to call center supervisor")
     return True
 
+def get_controller_inbox_window(state: FSMContext) -> InboxWindow:
+    """Windowed controller inbox (only a few pages are kept in FSM data)"""
+    return InboxWindow(state, 'ctrl_inbox', ListSource(get_controller_applications))
+
 def get_controller_inbox_router():
     """Get controller inbox router"""
     router = Router()
@@ -246,33 +252,24 @@ def get_controller_inbox_router():
             
             lang = user.get('language', 'uz')
             
-            # Get applications
-            applications = await get_controller_applications()
+            # Open the inbox window focused on the target request
+            window = get_controller_inbox_window(state)
+            if target_request_id:
+                app = await window.open(focus=lambda a: a['id'].startswith(target_request_id))
+            else:
+                app = await window.open()
             
-            if not applications:
+            if not app:
                 text = "📭 Inbox bo'sh"
                 await message.answer(text)
                 return
             
-            # Find target request index if specified
-            target_index = 0
-            if target_request_id:
-                for i, app in enumerate(applications):
-                    if app['id'].startswith(target_request_id):
-                        target_index = i
-                        break
-            
-            await state.update_data(
-                applications=applications,
-                current_index=target_index
-            )
-            
-            await display_controller_request(message, state, applications, target_index, lang, user)
+            await display_controller_request(message, window, app, lang, user)
             
         except Exception as e:
             print(f"Error in show_controller_inbox_from_notification: {e}")
 
-    @router.message(F.text == "📥 Inbox")
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def show_controller_inbox(message: Message, state: FSMContext):
         """Controller inbox handler"""
         try:
@@ -282,30 +279,26 @@ def get_controller_inbox_router():
             
             lang = user.get('language', 'uz')
             
-            # Get applications
-            applications = await get_controller_applications()
+            window = get_controller_inbox_window(state)
+            app = await window.open()
             
-            if not applications:
+            if not app:
                 text = "📭 Inbox bo'sh"
                 await message.answer(text)
                 return
             
-            await state.update_data(
-                applications=applications,
-                current_index=0
-            )
-            
-            await display_controller_request(message, state, applications, 0, lang, user)
+            await display_controller_request(message, window, app, lang, user)
             
         except Exception as e:
             print(f"Error in show_controller_inbox: {str(e)}")
             error_text = "Xatolik yuz berdi"
             await message.answer(error_text)
 
-    async def display_controller_request(event, state: FSMContext, applications, index, lang, user):
+    async def display_controller_request(event, window: InboxWindow, app, lang, user):
         """Display a single request with assignment options"""
         try:
-            app = applications[index]
+            position = await window.position()
+            index = position['index']
             full_id = app['id']
             short_id = full_id[:8]
             
@@ -340,7 +333,10 @@ def get_controller_inbox_router():
             }.get(app['priority'], 'Oddiy')
             
             # Format date
-            created_date = app['created_at'].strftime('%d.%m.%Y %H:%M')
+            created_at = app['created_at']
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            created_date = created_at.strftime('%d.%m.%Y %H:%M')
             
             # Get additional details
             tariff_info = app.get('tariff', '')
@@ -382,7 +378,7 @@ def get_controller_inbox_router():
             if additional_info:
                 text += f"\n📋 <b>Qo'shimcha ma'lumot:</b>\n{additional_info}\n"
             
-            text += f"\n📊 <b>Ariza {index + 1}/{len(applications)}</b>"
+            text += f"\n📊 <b>Ariza {index + 1}/{position['total'] or '?'}</b>"
             
             # Create action buttons
             buttons = []
@@ -408,7 +404,7 @@ def get_controller_inbox_router():
             nav_buttons = []
             
             # Previous button
-            if index > 0:
+            if position['has_prev']:
                 nav_buttons.append(
                     InlineKeyboardButton(
                         text="⬅️ Oldingi",
@@ -417,7 +413,7 @@ def get_controller_inbox_router():
                 )
             
             # Next button
-            if index < len(applications) - 1:
+            if position['has_next']:
                 nav_buttons.append(
                     InlineKeyboardButton(
                         text="Keyingi ➡️",
@@ -483,24 +479,21 @@ def get_controller_inbox_router():
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
             
-            # Get application data
-            data = await state.get_data()
-            applications = data.get('applications', [])
-            current_index = data.get('current_index', 0)
+            # Get current application from the inbox window
+            window = get_controller_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Mock assignment
             success = await assign_to_call_center_supervisor(full_id)
             
             if success:
                 # Update application status
-                applications[current_index]['assigned_to'] = 'call_center_supervisor'
-                await state.update_data(applications=applications)
+                application['assigned_to'] = 'call_center_supervisor'
+                await window.replace_current(application)
                 
                 text = (
                     f"✅ <b>Tayinlash muvaffaqiyatli!</b>\n\n"
@@ -513,24 +506,17 @@ def get_controller_inbox_router():
                 await callback.message.edit_text(text, parse_mode='HTML')
                 
                 # Remove the request from current session
-                updated_applications = [a for a in applications if a['id'] != full_id]
-                new_index = current_index
+                next_app = application
+                if application['id'] == full_id:
+                    next_app = await window.remove_current()
                 
-                if updated_applications:
-                    # Adjust index if needed
-                    if new_index >= len(updated_applications):
-                        new_index = len(updated_applications) - 1
-                    
-                    await state.update_data(
-                        applications=updated_applications,
-                        current_index=new_index
-                    )
-                    
+                if next_app:
                     # Show next request after 2 seconds
                     import asyncio
                     await asyncio.sleep(2)
-                    await display_controller_request(callback, state, updated_applications, new_index, lang, user)
+                    await display_controller_request(callback, window, next_app, lang, user)
                 else:
+                    await window.close()
                     await state.clear()
                     
                 await callback.answer()
@@ -552,17 +538,14 @@ def get_controller_inbox_router():
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
             
-            # Get application data from state
-            data = await state.get_data()
-            applications = data.get('applications', [])
-            current_index = data.get('current_index', 0)
+            # Get current application from the inbox window
+            window = get_controller_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Get available technicians
             technicians = await get_users_by_role('technician')
             
@@ -607,17 +590,14 @@ def get_controller_inbox_router():
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
             
-            # Get application data
-            data = await state.get_data()
-            applications = data.get('applications', [])
-            current_index = data.get('current_index', 0)
+            # Get current application from the inbox window
+            window = get_controller_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Get technician info
             technicians = await get_users_by_role('technician')
             technician = next((t for t in technicians if t['id'] == technician_id), None)
@@ -631,8 +611,8 @@ def get_controller_inbox_router():
             
             if success:
                 # Update application status
-                applications[current_index]['assigned_to'] = f"technician_{technician_id}"
-                await state.update_data(applications=applications)
+                application['assigned_to'] = f"technician_{technician_id}"
+                await window.replace_current(application)
                 
                 text = (
                     f"✅ <b>Tayinlash muvaffaqiyatli!</b>\n\n"
@@ -646,24 +626,17 @@ def get_controller_inbox_router():
                 await callback.message.edit_text(text, parse_mode='HTML')
                 
                 # Remove the request from current session
-                updated_applications = [a for a in applications if a['id'] != full_id]
-                new_index = current_index
+                next_app = application
+                if application['id'] == full_id:
+                    next_app = await window.remove_current()
                 
-                if updated_applications:
-                    # Adjust index if needed
-                    if new_index >= len(updated_applications):
-                        new_index = len(updated_applications) - 1
-                    
-                    await state.update_data(
-                        applications=updated_applications,
-                        current_index=new_index
-                    )
-                    
+                if next_app:
                     # Show next request after 2 seconds
                     import asyncio
                     await asyncio.sleep(2)
-                    await display_controller_request(callback, state, updated_applications, new_index, lang, user)
+                    await display_controller_request(callback, window, next_app, lang, user)
                 else:
+                    await window.close()
                     await state.clear()
                     
                 await callback.answer()
@@ -680,29 +653,22 @@ def get_controller_inbox_router():
         try:
             await callback.answer()
             
-            # Extract index from callback data
-            current_index = int(callback.data.replace("ctrl_prev_", ""))
-            new_index = current_index - 1
-            
-            if new_index < 0:
-                await callback.answer("Birinchi ariza", show_alert=True)
-                return
-            
-            # Get user and data
+            # Get user and window
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
-            data = await state.get_data()
-            applications = data.get('applications', [])
+            window = get_controller_inbox_window(state)
             
-            if not applications or new_index >= len(applications):
+            if not await window.current():
                 await callback.answer("Ariza topilmadi", show_alert=True)
                 return
             
-            # Update current index
-            await state.update_data(current_index=new_index)
+            app = await window.prev()
+            if not app:
+                await callback.answer("Birinchi ariza", show_alert=True)
+                return
             
             # Display the previous request
-            await display_controller_request(callback, state, applications, new_index, lang, user)
+            await display_controller_request(callback, window, app, lang, user)
             
         except Exception as e:
             print(f"Error in navigate_previous: {str(e)}")
@@ -714,25 +680,22 @@ def get_controller_inbox_router():
         try:
             await callback.answer()
             
-            # Extract index from callback data
-            current_index = int(callback.data.replace("ctrl_next_", ""))
-            new_index = current_index + 1
-            
-            # Get user and data
+            # Get user and window
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
-            data = await state.get_data()
-            applications = data.get('applications', [])
+            window = get_controller_inbox_window(state)
             
-            if not applications or new_index >= len(applications):
-                await callback.answer("Oxirgi ariza", show_alert=True)
+            if not await window.current():
+                await callback.answer("Ariza topilmadi", show_alert=True)
                 return
             
-            # Update current index
-            await state.update_data(current_index=new_index)
+            app = await window.next()
+            if not app:
+                await callback.answer("Oxirgi ariza", show_alert=True)
+                return
             
             # Display the next request
-            await display_controller_request(callback, state, applications, new_index, lang, user)
+            await display_controller_request(callback, window, app, lang, user)
             
         except Exception as e:
             print(f"Error in navigate_next: {str(e)}")
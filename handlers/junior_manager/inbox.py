@@ -18,6 +18,7 @@ from keyboards.junior_manager_buttons import (
 )
 from datetime import datetime, timedelta
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
 from states.junior_manager_states import JuniorManagerStates
 
 # Mock functions to replace utils and database imports
@@ -193,7 +194,7 @@ def get_junior_manager_inbox_router():
     router.message.filter(role_filter)
     router.callback_query.filter(role_filter)
 
-    @router.message(F.text.in_(["📥 Inbox", "📥 Входящие"]))
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def view_inbox(message: Message, state: FSMContext):
         """Junior manager view inbox handler"""
         try:
@@ -10,6 +10,8 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKe
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
+from utils.inbox_window import InboxWindow, ListSource
 from keyboards.manager_buttons import (
     get_inbox_navigation_keyboard,
     get_junior_assignment_keyboard,
@@ -425,6 +427,58 @@ class MockWordDocumentQueries:
         """Mock update manager data"""
         print(f"Mock: Updating manager data for request {request_id}")
 
+async def load_manager_requests(user: dict):
+    """Manager inbox requests, with the matching inbox message attached"""
+    access_control = MockWorkflowAccessControl()
+    requests = await access_control.get_filtered_requests_for_role(
+        user_id=user['id'],
+        user_role='manager',
+        status_filter='created'
+    )
+    # Filter by role_current as well (defensive)
+    requests = [r for r in requests if r.get('role_current') == 'manager']
+
+    inbox_manager = MockInboxManager()
+    inbox_messages = await inbox_manager.get_role_inbox('manager', limit=50)
+    by_application = {msg['application_id']: msg for msg in inbox_messages}
+    for req in requests:
+        if req['id'] in by_application:
+            req['inbox_message'] = by_application[req['id']]
+    return requests
+
+async def load_manager_notification_requests(user: dict):
+    """Requests behind the manager's inbox messages, in inbox order (notification view)"""
+    inbox_manager = MockInboxManager()
+    inbox_messages = await inbox_manager.get_role_inbox('manager', limit=50)
+    access_control = MockWorkflowAccessControl()
+    requests = []
+    for msg in inbox_messages:
+        request_details = await access_control.get_filtered_requests_for_role(
+            user_id=user['id'],
+            user_role='manager',
+            request_ids=[msg['application_id']]
+        )
+        if request_details:
+            req = request_details[0]
+            req['inbox_message'] = msg
+            requests.append(req)
+    return requests
+
+def get_manager_inbox_window(state: FSMContext, user: dict) -> InboxWindow:
+    """Windowed manager inbox (only a few pages are kept in FSM data).
+
+    The view that opened the window (``mgr_inbox_view`` in FSM data) picks
+    the list: the inbox button shows the new requests, a notification shows
+    the inbox messages.
+    """
+    async def load():
+        data = await state.get_data()
+        if data.get('mgr_inbox_view') == 'notification':
+            return await load_manager_notification_requests(user)
+        return await load_manager_requests(user)
+
+    return InboxWindow(state, 'mgr_inbox', ListSource(load))
+
 def get_manager_inbox_router():
     """Get manager inbox router"""
     router = Router()
@@ -464,55 +518,30 @@ def get_manager_inbox_router():
             
             lang = user.get('language', 'uz')
             
-            # Get inbox messages from inbox manager
-            inbox_manager = MockInboxManager()
-            inbox_messages = await inbox_manager.get_role_inbox('manager', limit=50)
-            
-            if not inbox_messages:
-                text = "📭 Inbox bo'sh"
-                await message.answer(text)
-                return
-            
-            # Find target request index if specified
-            target_index = 0
+            # Open the inbox window focused on the target request
+            await state.update_data(mgr_inbox_view='notification')
+            window = get_manager_inbox_window(state, user)
             if target_request_id:
-                for i, msg in enumerate(inbox_messages):
-                    if msg['application_id'].startswith(target_request_id):
-                        target_index = i
-                        # Mark as read
-                        await inbox_manager.mark_as_read(msg['id'])
-                        break
-            
-            # Get full request details
-            requests = []
-            for msg in inbox_messages:
-                access_control = MockWorkflowAccessControl()
-                request_details = await access_control.get_filtered_requests_for_role(
-                    user_id=user['id'],
-                    user_role='manager',
-                    request_ids=[msg['application_id']]
-                )
-                if request_details:
-                    req = request_details[0]
-                    req['inbox_message'] = msg
-                    requests.append(req)
+                req = await window.open(focus=lambda r: r['id'].startswith(target_request_id))
+            else:
+                req = await window.open()
             
-            if not requests:
+            if not req:
                 text = "📭 Inbox bo'sh"
                 await message.answer(text)
                 return
             
-            await state.update_data(
-                inbox_requests=requests,
-                current_index=target_index
-            )
+            # Mark as read
+            inbox_msg = req.get('inbox_message')
+            if target_request_id and inbox_msg and req['id'].startswith(target_request_id):
+                await MockInboxManager().mark_as_read(inbox_msg['id'])
             
-            await display_manager_request(message, state, requests, target_index, lang, user)
+            await display_manager_request(message, window, req, lang, user)
             
         except Exception as e:
             print(f"Error in show_manager_inbox_from_notification: {e}")
 
-    @router.message(F.text.in_(["📥 Inbox"]))
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def show_manager_inbox(message: Message, state: FSMContext):
         """Manager inbox handler"""
         try:
@@ -528,28 +557,18 @@ def get_manager_inbox_router():
             
             lang = user.get('language', 'uz')
             
-            access_control = MockWorkflowAccessControl()
-            requests = await access_control.get_filtered_requests_for_role(
-                user_id=user['id'],
-                user_role='manager',
-                status_filter='created'
-            )
-            # Filter by role_current as well (defensive)
-            requests = [r for r in requests if r.get('role_current') == 'manager']
-            
-            print(f"Manager {user['id']} got {len(requests)} requests")
+            await state.update_data(mgr_inbox_view='inbox')
+            window = get_manager_inbox_window(state, user)
+            req = await window.open()
             
-            if not requests:
+            if not req:
                 text = "📭 Inbox bo'sh"
                 await message.answer(text)
                 return
             
-            await state.update_data(
-                inbox_requests=requests,
-                current_index=0
-            )
+            print(f"Manager {user['id']} inbox: {(await window.position())['total']} requests")
             
-            await display_manager_request(message, state, requests, 0, lang, user)
+            await display_manager_request(message, window, req, lang, user)
             
         except Exception as e:
             print(f"Error in show_manager_inbox: {str(e)}")
@@ -557,10 +576,11 @@ def get_manager_inbox_router():
             error_text = "Xatolik yuz berdi"
             await message.answer(error_text)
 
-    async def display_manager_request(event, state: FSMContext, requests, index, lang, user):
+    async def display_manager_request(event, window: InboxWindow, req, lang, user):
         """Display a single request with complete details and manager action buttons"""
         try:
-            req = requests[index]
+            position = await window.position()
+            index = position['index']
             full_id = req['id']
             short_id = full_id[:8]
             
@@ -635,7 +655,10 @@ def get_manager_inbox_router():
             }.get(request['workflow_type'], request['workflow_type'])
             
             # Format date
-            created_date = request['created_at'].strftime('%d.%m.%Y %H:%M') if hasattr(request['created_at'], 'strftime') else str(request['created_at'])
+            created_at = request['created_at']
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            created_date = created_at.strftime('%d.%m.%Y %H:%M')
             
             # Get additional details
             tariff_info = request.get('tariff', 'N/A')
@@ -702,7 +725,7 @@ def get_manager_inbox_router():
             if company_name:
                 text += f"🏢 <b>Kompaniya:</b> {company_name}\n"
             
-            text += f"\n<i>📊 Ariza {index + 1}/{len(requests)}</i>"
+            text += f"\n<i>📊 Ariza {index + 1}/{position['total'] or '?'}</i>"
             
             print(f"Generated text for request {short_id}: {text[:100]}...")
             print(f"Full text length: {len(text)}")
@@ -729,7 +752,7 @@ def get_manager_inbox_router():
             nav_buttons = []
             
             # Previous button
-            if index > 0:
+            if position['has_prev']:
                 nav_buttons.append(
                     InlineKeyboardButton(
                         text="⬅️ Oldingi",
@@ -738,7 +761,7 @@ def get_manager_inbox_router():
                 )
             
             # Next button
-            if index < len(requests) - 1:
+            if position['has_next']:
                 nav_buttons.append(
                     InlineKeyboardButton(
                         text="Keyingi ➡️",
@@ -848,7 +871,6 @@ def get_manager_inbox_router():
             # Always use full_id from callback data as current_request_id
             current_request_id = full_id
             
-            data = await state.get_data()
             
             if not current_request_id:
                 await callback.answer("Ariza topilmadi", show_alert=True)
@@ -896,25 +918,19 @@ def get_manager_inbox_router():
                 await callback.message.edit_text(text, parse_mode='HTML')
                 
                 # Remove the request from current session
-                requests = data.get('inbox_requests', [])
-                updated_requests = [r for r in requests if r['id'] != current_request_id]
-                current_index = data.get('current_index', 0)
+                window = get_manager_inbox_window(state, user)
+                current = await window.current()
+                next_req = current
+                if current and current['id'] == current_request_id:
+                    next_req = await window.remove_current()
                 
-                if updated_requests:
-                    # Adjust index if needed
-                    if current_index >= len(updated_requests):
-                        current_index = len(updated_requests) - 1
-                    
-                    await state.update_data(
-                        inbox_requests=updated_requests,
-                        current_index=current_index
-                    )
-                    
+                if next_req:
                     # Show next request after 2 seconds
                     import asyncio
                     await asyncio.sleep(2)
-                    await display_manager_request(callback, state, updated_requests, current_index, lang, user)
+                    await display_manager_request(callback, window, next_req, lang, user)
                 else:
+                    await window.close()
                     await state.clear()
                     
                 await callback.answer()
@@ -931,29 +947,22 @@ def get_manager_inbox_router():
         try:
             await callback.answer()
             
-            # Extract index from callback data
-            current_index = int(callback.data.replace("mgr_prev_", ""))
-            new_index = current_index - 1
-            
-            if new_index < 0:
-                await callback.answer("Birinchi ariza", show_alert=True)
-                return
-            
-            # Get user and data
+            # Get user and window
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
-            data = await state.get_data()
-            requests = data.get('inbox_requests', [])
+            window = get_manager_inbox_window(state, user)
             
-            if not requests or new_index >= len(requests):
+            if not await window.current():
                 await callback.answer("Ariza topilmadi", show_alert=True)
                 return
             
-            # Update current index
-            await state.update_data(current_index=new_index)
+            req = await window.prev()
+            if not req:
+                await callback.answer("Birinchi ariza", show_alert=True)
+                return
             
             # Display the previous request
-            await display_manager_request(callback, state, requests, new_index, lang, user)
+            await display_manager_request(callback, window, req, lang, user)
             
         except Exception as e:
             print(f"Error in navigate_previous: {str(e)}")
@@ -965,25 +974,22 @@ def get_manager_inbox_router():
         try:
             await callback.answer()
             
-            # Extract index from callback data
-            current_index = int(callback.data.replace("mgr_next_", ""))
-            new_index = current_index + 1
-            
-            # Get user and data
+            # Get user and window
             user = await get_user_by_telegram_id(callback.from_user.id)
             lang = user.get('language', 'uz')
-            data = await state.get_data()
-            requests = data.get('inbox_requests', [])
+            window = get_manager_inbox_window(state, user)
             
-            if not requests or new_index >= len(requests):
-                await callback.answer("Oxirgi ariza", show_alert=True)
+            if not await window.current():
+                await callback.answer("Ariza topilmadi", show_alert=True)
                 return
             
-            # Update current index
-            await state.update_data(current_index=new_index)
+            req = await window.next()
+            if not req:
+                await callback.answer("Oxirgi ariza", show_alert=True)
+                return
             
             # Display the next request
-            await display_manager_request(callback, state, requests, new_index, lang, user)
+            await display_manager_request(callback, window, req, lang, user)
             
         except Exception as e:
             print(f"Error in navigate_next: {str(e)}")
@@ -5,11 +5,15 @@ This module provides complete staff activity monitoring functionality for Manage
 allowing managers to view online staff, performance, workload, attendance, and junior manager work.
 """
 
+import html
+
 from aiogram import F, Router
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, date, timedelta
 from filters.role_filter import RoleFilter
+from utils.activity_tracker import activity_tracker
+from utils.data_loader import current_loaders
 
 def get_manager_staff_activity_router():
     """Get router for manager staff activity handlers"""
@@ -36,6 +40,11 @@ def get_manager_staff_activity_router():
         await callback.answer()
         await show_staff_performance(callback.message)
 
+    @router.callback_query(F.data == "staff_online")
+    async def cb_staff_online(callback: CallbackQuery, state: FSMContext):
+        await callback.answer()
+        await show_staff_online(callback.message, state)
+
     @router.callback_query(F.data == "staff_workload")
     async def cb_staff_workload(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
@@ -87,6 +96,26 @@ def get_manager_staff_activity_router():
         except Exception:
             await message.answer("Xatolik yuz berdi")
 
+    async def show_staff_online(message, state: FSMContext):
+        """Staff active in the manager's region right now (from memory, no users scan)"""
+        try:
+            region = (await state.get_data()).get('active_region')
+            online = [o for o in activity_tracker.online(region) if o[2] and o[2] != 'client']
+            if not region or not online:
+                await message.answer("🟢 Hozir onlayn xodimlar yo'q")
+                return
+            users = await current_loaders().users_by_telegram(region).load_many([o[1] for o in online])
+            role_map = {'technician': '👨‍🔧', 'junior_manager': '👨‍💼', 'manager': '👨‍💼', 'controller': '🎛', 'warehouse': '📦', 'call_center': '📞', 'call_center_supervisor': '📞', 'admin': '🛡'}
+            now = datetime.now(online[0][3].tzinfo)
+            text = f"🟢 <b>Onlayn xodimlar ({len(online)}):</b>\n\n"
+            for (_, telegram_id, role, seen_at), user in zip(online, users):
+                name = html.escape((user or {}).get('full_name') or str(telegram_id))
+                minutes = int((now - seen_at).total_seconds() // 60)
+                text += f"{role_map.get(role, '👤')} {name} — {minutes} daqiqa oldin\n"
+            await message.answer(text, parse_mode='HTML')
+        except Exception:
+            await message.answer("Xatolik yuz berdi")
+
     async def show_staff_workload(message):
         """Show staff workload statistics"""
         try:
@@ -189,6 +218,7 @@ def _create_staff_activity_keyboard():
         ],
         [
             InlineKeyboardButton(text="👤 Xodimlar kesimi", callback_data="staff_user_detail"),
+            InlineKeyboardButton(text="🟢 Onlayn", callback_data="staff_online"),
         ],
         [
             InlineKeyboardButton(text="🔙 Orqaga", callback_data="staff_back")
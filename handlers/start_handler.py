@@ -9,11 +9,12 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from loader import get_user_role
-from database.clients.queries import ensure_global_user, get_by_telegram_id
+from utils.activity_tracker import activity_tracker
 from utils.role_system import show_role_menu
-from utils.region_context import detect_user_regions
+from utils.onboarding import STAFF_ROLES, onboard
+from utils.inbox_counters import load_inbox_badge
 from states.admin_states import AdminRegionStates
-from typing import List
+from typing import List, Optional
 
 
 def _build_region_keyboard(regions: List[str]) -> InlineKeyboardMarkup:
@@ -22,46 +23,35 @@ def _build_region_keyboard(regions: List[str]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+def _mark_online(region: Optional[str], role: str, telegram_id: int) -> None:
+    """Online in the region just chosen (ActivityMiddleware saw the old one); drives utils.inbox_push"""
+    activity_tracker.touch(region, telegram_id, role)
+
+
 def get_start_router():
     """Get start router with all handlers"""
     router = Router()
     
     @router.message(F.text == "/start")
-    async def start_command(message: Message, state: FSMContext):
+    async def start_command(message: Message, state: FSMContext, user_role: Optional[str] = None):
         """Handle /start command"""
         try:
-            user_role = await get_user_role(message.from_user.id)
-
-            # Persist user to clients DB on first start (alfaconnect_clients)
-            from_user = message.from_user
-            full_name = " ".join(filter(None, [from_user.first_name, from_user.last_name])) or (from_user.first_name or from_user.username or "")
-            try:
-                existing = await get_by_telegram_id(from_user.id)
-            except Exception:
-                existing = None
-            is_created = existing is None
-            try:
-                await ensure_global_user(
-                    telegram_id=from_user.id,
-                    full_name=full_name,
-                    username=from_user.username,
-                    phone=None,
-                    language=(from_user.language_code or "uz"),
-                    address=None,
-                    abonent_id=None,
-                )
-            except Exception:
-                pass
+            # Clients DB upsert, role and assigned regions in one concurrent fan-out
+            onboarding = await onboard(message.from_user, user_role)
+            user_role = onboarding.role
+            is_created = onboarding.created
             
             # Clear any existing state
             await state.clear()
 
-            # Region context selection: detect assigned regions for this user+role
-            if user_role in {"admin", "manager", "technician", "controller", "warehouse", "call_center", "call_center_supervisor", "junior_manager"}:
-                assigned = await detect_user_regions(message.from_user.id, user_role)
+            # Region context selection: regions assigned for this user+role
+            active_region = None
+            if user_role in STAFF_ROLES:
+                assigned = onboarding.regions
                 if assigned:
                     if len(assigned) == 1:
-                        await state.update_data(active_region=assigned[0])
+                        active_region = assigned[0]
+                        await state.update_data(active_region=active_region)
                     else:
                         await state.set_state(AdminRegionStates.choosing_region)
                         await message.answer(
@@ -88,14 +78,16 @@ def get_start_router():
                 keyboard = get_main_menu_keyboard('uz')
                 await message.answer("Quyidagi menyudan kerakli bo'limni tanlang.", reply_markup=keyboard)
             else:
-                await show_role_menu(message, user_role)
+                inbox_count = await load_inbox_badge(active_region, user_role, message.from_user.id)
+                await show_role_menu(message, user_role, inbox_count)
+                _mark_online(active_region, user_role, message.from_user.id)
             
         except Exception as e:
             #await message.answer("❌ Xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
             pass
     
     @router.callback_query(F.data.startswith("choose_region:"))
-    async def choose_region_callback(callback: CallbackQuery, state: FSMContext):
+    async def choose_region_callback(callback: CallbackQuery, state: FSMContext, user_role: Optional[str] = None):
         try:
             _, region = callback.data.split(":", 1)
             await state.update_data(active_region=region)
@@ -103,18 +95,20 @@ def get_start_router():
             await callback.answer()
             await callback.message.edit_text(f"Region tanlandi: {region.title()}")
             # After selecting region, open role-specific menu
-            role = await get_user_role(callback.from_user.id)
-            await show_role_menu(callback.message, role)
+            role = user_role or await get_user_role(callback.from_user.id)
+            inbox_count = await load_inbox_badge(region, role, callback.from_user.id)
+            await show_role_menu(callback.message, role, inbox_count)
+            _mark_online(region, role, callback.from_user.id)
         except Exception:
             await callback.answer("Xatolik", show_alert=True)
     
     @router.callback_query(F.data == "back_to_main_menu")
-    async def back_to_main_menu_handler(callback: CallbackQuery, state: FSMContext):
+    async def back_to_main_menu_handler(callback: CallbackQuery, state: FSMContext, user_role: Optional[str] = None):
         """Handle back to main menu button"""
         try:
             await callback.answer()
             
-            user_role = await get_user_role(callback.from_user.id)
+            user_role = user_role or await get_user_role(callback.from_user.id)
             
             # Clear any existing state
             await state.clear()
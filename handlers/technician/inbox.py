@@ -24,6 +24,8 @@ from keyboards.technician_buttons import (
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
+from utils.inbox_window import InboxWindow, ListSource
 from states.technician_states import TechnicianStates
 
 # Mock functions to replace utils and database imports
@@ -222,6 +224,10 @@ async def complete_work(request_id: str, work_notes: str, warehouse_used: bool =
     print(f"Mock: Completing work for request {request_id} with notes: {work_notes}")
     return True
 
+def get_technician_inbox_window(state: FSMContext) -> InboxWindow:
+    """Windowed technician inbox (only a few pages are kept in FSM data)"""
+    return InboxWindow(state, 'tech_inbox', ListSource(lambda: get_technician_applications(state.key.user_id)))
+
 def get_technician_inbox_router():
     """Router for technician inbox functionality"""
     router = Router()
@@ -231,7 +237,7 @@ def get_technician_inbox_router():
     router.message.filter(role_filter)
     router.callback_query.filter(role_filter)
 
-    @router.message(F.text.in_(["📥 Inbox", "📥 Входящие"]))
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def view_inbox(message: Message, state: FSMContext):
         """Technician view inbox handler"""
         try:
@@ -247,10 +253,11 @@ def get_technician_inbox_router():
             
             lang = user.get('language', 'uz')
             
-            # Get technician applications
-            applications = await get_technician_applications(message.from_user.id)
+            # Open technician applications window
+            window = get_technician_inbox_window(state)
+            application = await window.open()
             
-            if not applications:
+            if not application:
                 no_applications_text = (
                     "📭 Hozircha sizga biriktirilgan arizalar yo'q."
                     if lang == 'uz' else
@@ -263,22 +270,20 @@ def get_technician_inbox_router():
                 )
                 return
             
-            # Store applications in state
-            await state.update_data(
-                applications=applications,
-                current_app_index=0,
-                lang=lang
-            )
+            await state.update_data(lang=lang)
             
             # Show first application
-            await show_application_details(message, applications[0], applications, 0)
+            await show_application_details(message, window, application)
             
         except Exception as e:
             print(f"Error in view_inbox: {e}")
 
-    async def show_application_details(message_or_callback, application, applications, index):
+    async def show_application_details(message_or_callback, window: InboxWindow, application):
         """Show application details with technician actions"""
         try:
+            position = await window.position()
+            index = position['index']
+            total = position['total'] if position['total'] is not None else index + 1 + int(position['has_next'])
             # Format workflow type
             workflow_type_emoji = {
                 'connection_request': '🔌',
@@ -308,7 +313,10 @@ def get_technician_inbox_router():
             }.get(application.get('priority', 'normal'), 'Oddiy')
             
             # Format date
-            created_date = application['created_at'].strftime('%d.%m.%Y %H:%M')
+            created_at = application['created_at']
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            created_date = created_at.strftime('%d.%m.%Y %H:%M')
             
             # Get additional details
             tariff_info = application.get('tariff', '')
@@ -364,10 +372,10 @@ def get_technician_inbox_router():
             if work_notes:
                 text += f"📝 <b>Ish izohi:</b> {work_notes}\n"
             
-            text += f"\n📊 <b>Ariza #{index + 1} / {len(applications)}</b>"
+            text += f"\n📊 <b>Ariza #{index + 1} / {total}</b>"
             
             # Create action keyboard based on work status
-            keyboard = get_technician_action_keyboard(application, index, len(applications))
+            keyboard = get_technician_action_keyboard(application, index, total)
             
             if isinstance(message_or_callback, Message):
                 await message_or_callback.answer(text, reply_markup=keyboard, parse_mode='HTML')
@@ -383,19 +391,16 @@ def get_technician_inbox_router():
         try:
             await callback.answer()
             
-            # Get current index from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            # Move the inbox window
+            window = get_technician_inbox_window(state)
             
-            if not applications:
+            if not await window.current():
                 await callback.answer("Arizalar topilmadi")
                 return
             
-            if current_index > 0:
-                new_index = current_index - 1
-                await state.update_data(current_app_index=new_index)
-                await show_application_details(callback, applications[new_index], applications, new_index)
+            application = await window.prev()
+            if application:
+                await show_application_details(callback, window, application)
             else:
                 await callback.answer("Bu birinchi ariza")
                 
@@ -408,19 +413,16 @@ def get_technician_inbox_router():
         try:
             await callback.answer()
             
-            # Get current index from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            # Move the inbox window
+            window = get_technician_inbox_window(state)
             
-            if not applications:
+            if not await window.current():
                 await callback.answer("Arizalar topilmadi")
                 return
             
-            if current_index < len(applications) - 1:
-                new_index = current_index + 1
-                await state.update_data(current_app_index=new_index)
-                await show_application_details(callback, applications[new_index], applications, new_index)
+            application = await window.next()
+            if application:
+                await show_application_details(callback, window, application)
             else:
                 await callback.answer("Bu oxirgi ariza")
                 
@@ -434,21 +436,18 @@ def get_technician_inbox_router():
             await callback.answer()
             
             # Get current application
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             # Retrieve user language (default to 'uz' if not found)
             lang = await get_user_lang(callback.from_user.id)
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Update work status
-            applications[current_index]['work_started'] = True
-            await state.update_data(applications=applications)
+            application['work_started'] = True
+            await window.replace_current(application)
             
             # Show confirmation
             confirmation_text = (
@@ -480,18 +479,15 @@ def get_technician_inbox_router():
             await callback.answer()
             
             # Get current application
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             # Retrieve user language
             lang = await get_user_lang(callback.from_user.id)
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Store application info in state
             await state.update_data(
                 current_application_id=application['id'],
@@ -542,21 +538,16 @@ def get_technician_inbox_router():
                 return
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await message.answer("❌ Ariza ma'lumotlari topilmadi. Iltimos, qaytadan urinib ko'ring.")
                 return
             
-            application = applications[current_index]
-            
             # Update application diagnostic result
-            
-            if applications and current_index < len(applications):
-                applications[current_index]['diagnostic_result'] = diagnostic_text
-                await state.update_data(applications=applications)
+            application['diagnostic_result'] = diagnostic_text
+            await window.replace_current(application)
             
             # Show warehouse question
             warehouse_text = (
@@ -591,16 +582,13 @@ def get_technician_inbox_router():
             await callback.answer()
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Store application info in state
             await state.update_data(
                 current_application_id=application['id'],
@@ -660,16 +648,13 @@ def get_technician_inbox_router():
             item_id = int(callback.data.replace("tech_select_item_", ""))
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Get warehouse items
             warehouse_items = await get_warehouse_items()
             selected_item = next((item for item in warehouse_items if item['id'] == item_id), None)
@@ -729,27 +714,21 @@ def get_technician_inbox_router():
             
             # Get current application from state
             data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             selected_item = data.get('selected_warehouse_item')
             
-            if not applications or current_index >= len(applications) or not selected_item:
+            if not application or not selected_item:
                 await message.answer("❌ Ariza ma'lumotlari topilmadi. Iltimos, qaytadan urinib ko'ring.")
                 return
             
-            application = applications[current_index]
-            
             # Create warehouse item text
             warehouse_item_text = f"{selected_item['name']} - {quantity_text}"
             
             # Update application warehouse info
-            applications = data.get('applications', [])
-            current_index = data.get('current_app_index', 0)
-            
-            if applications and current_index < len(applications):
-                applications[current_index]['warehouse_needed'] = True
-                applications[current_index]['warehouse_item'] = warehouse_item_text
-                await state.update_data(applications=applications)
+            application['warehouse_needed'] = True
+            application['warehouse_item'] = warehouse_item_text
+            await window.replace_current(application)
             
             # Show confirmation
             confirmation_text = (
@@ -796,16 +775,13 @@ def get_technician_inbox_router():
             lang = await get_user_lang(callback.from_user.id)
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Show custom input prompt
             input_text = (
                 f"📦 <b>Boshqa mahsulot kiritish</b>\n\n"
@@ -848,22 +824,17 @@ def get_technician_inbox_router():
                 return
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await message.answer("❌ Ariza ma'lumotlari topilmadi. Iltimos, qaytadan urinib ko'ring.")
                 return
             
-            application = applications[current_index]
-            
             # Update application warehouse info
-            
-            if applications and current_index < len(applications):
-                applications[current_index]['warehouse_needed'] = True
-                applications[current_index]['warehouse_item'] = warehouse_item_text
-                await state.update_data(applications=applications)
+            application['warehouse_needed'] = True
+            application['warehouse_item'] = warehouse_item_text
+            await window.replace_current(application)
             
             # Show confirmation
             confirmation_text = (
@@ -909,16 +880,13 @@ def get_technician_inbox_router():
             lang = await get_user_lang(callback.from_user.id)
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             text = (
                 f"✅ <b>Ombor bilan ishlash bekor qilindi</b>\n\n"
                 f"🆔 <b>Ariza ID:</b> {application['id']}\n"
@@ -947,16 +915,13 @@ def get_technician_inbox_router():
             lang = await get_user_lang(callback.from_user.id)
             
             # Get current application
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
-            application = applications[current_index]
-            
             # Store application info in state
             await state.update_data(
                 current_application_id=application['id'],
@@ -1005,26 +970,21 @@ def get_technician_inbox_router():
                 return
             
             # Get current application from state
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await message.answer("❌ Ariza ma'lumotlari topilmadi. Iltimos, qaytadan urinib ko'ring.")
                 return
             
-            application = applications[current_index]
-            
             # Update application work notes
-            
-            if applications and current_index < len(applications):
-                applications[current_index]['work_notes'] = work_notes_text
-                applications[current_index]['work_completed'] = True
-                await state.update_data(applications=applications)
+            application['work_notes'] = work_notes_text
+            application['work_completed'] = True
+            await window.replace_current(application)
             
             # Mock complete work
-            warehouse_used = applications[current_index].get('warehouse_needed', False) if applications else False
-            warehouse_item = applications[current_index].get('warehouse_item', '') if applications else ''
+            warehouse_used = application.get('warehouse_needed', False)
+            warehouse_item = application.get('warehouse_item', '')
             success = await complete_work(application['id'], work_notes_text, warehouse_used)
             
             if success:
@@ -1059,19 +1019,8 @@ def get_technician_inbox_router():
                 )
                 
                 # Remove the request from current session
-                updated_applications = [a for a in applications if a['id'] != application['id']]
-                new_index = current_index
-                
-                if updated_applications:
-                    # Adjust index if needed
-                    if new_index >= len(updated_applications):
-                        new_index = len(updated_applications) - 1
-                    
-                    await state.update_data(
-                        applications=updated_applications,
-                        current_app_index=new_index
-                    )
-                else:
+                if not await window.remove_current():
+                    await window.close()
                     await state.clear()
             else:
                 await message.answer("❌ Ishni yakunlashda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
@@ -1090,16 +1039,15 @@ def get_technician_inbox_router():
             await callback.answer()
             
             # Get current application
-            data = await state.get_data()
-            current_index = data.get('current_app_index', 0)
-            applications = data.get('applications', [])
+            window = get_technician_inbox_window(state)
+            application = await window.current()
             
-            if not applications or current_index >= len(applications):
+            if not application:
                 await callback.answer("Ariza topilmadi")
                 return
             
             # Show application details again
-            await show_application_details(callback, applications[current_index], applications, current_index)
+            await show_application_details(callback, window, application)
             
         except Exception as e:
             print(f"Error in back_to_application_handler: {e}")
@@ -10,6 +10,7 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKe
 
 from states.warehouse_states import WarehouseWorkflowStates
 from filters.role_filter import RoleFilter
+from utils.inbox_counters import INBOX_BUTTON_RE
 from keyboards.warehouse_buttons import (
     get_warehouse_inbox_navigation_keyboard,
     get_warehouse_request_actions_keyboard,
@@ -136,7 +137,7 @@ def get_warehouse_inbox_router():
         except Exception as e:
             await message.answer("Xatolik yuz berdi")
 
-    @router.message(F.text == "📥 Inbox")
+    @router.message(F.text.regexp(INBOX_BUTTON_RE))
     async def show_warehouse_inbox(message: Message, state: FSMContext):
         """Show warehouse inbox with technician requests"""
         try:
@@ -1,13 +1,15 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 
+from utils.inbox_counters import inbox_button_text
+
 # ========= MAIN MENUS =========
 
-def get_call_center_main_keyboard(lang: str = 'uz') -> ReplyKeyboardMarkup:
+def get_call_center_main_keyboard(lang: str = 'uz', inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Call Center main reply keyboard with WebApp chat button (UZ/RU)."""
     if lang == 'ru':
         webapp_text = "💬 Онлайн Чат Web App"
         keyboard = [
-            [KeyboardButton(text="📥 Входящие"), KeyboardButton(text="📝 Заказы")],
+            [KeyboardButton(text=inbox_button_text("📥 Входящие", inbox_count)), KeyboardButton(text="📝 Заказы")],
             [KeyboardButton(text="🔍 Поиск клиента")],
             [KeyboardButton(text="🔌 Создать заявку на подключение"), KeyboardButton(text="🔧 Создать техническую заявку")],
             [KeyboardButton(text="📊 Статистика"), KeyboardButton(text="🌐 Изменить язык")],
@@ -16,7 +18,7 @@ def get_call_center_main_keyboard(lang: str = 'uz') -> ReplyKeyboardMarkup:
     else:
         webapp_text = "💬 Onlayn Chat Web App"
         keyboard = [
-            [KeyboardButton(text="📥 Inbox"), KeyboardButton(text="📋 Buyurtmalar")],
+            [KeyboardButton(text=inbox_button_text("📥 Inbox", inbox_count)), KeyboardButton(text="📋 Buyurtmalar")],
             [KeyboardButton(text="🔍 Mijoz qidirish")],
             [KeyboardButton(text="🔌 Ulanish arizasi yaratish"), KeyboardButton(text="🔧 Texnik xizmat yaratish")],
             [KeyboardButton(text="📊 Statistikalar"), KeyboardButton(text="🌐 Tilni o'zgartirish")],
@@ -25,9 +27,9 @@ def get_call_center_main_keyboard(lang: str = 'uz') -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
-def call_center_main_menu_reply(lang: str = 'uz') -> ReplyKeyboardMarkup:
+def call_center_main_menu_reply(lang: str = 'uz', inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Alias used by some handlers."""
-    return get_call_center_main_keyboard(lang)
+    return get_call_center_main_keyboard(lang, inbox_count)
 
 
 # ========= LANGUAGE =========
@@ -1,12 +1,14 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.inbox_counters import inbox_button_text
+
 
 # ========= MAIN REPLY MENU =========
-def get_call_center_supervisor_main_menu(lang: str = 'uz') -> ReplyKeyboardMarkup:
+def get_call_center_supervisor_main_menu(lang: str = 'uz', inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Main reply keyboard for Call Center Supervisor (UZ/RU)."""
     if lang == 'ru':
         keyboard = [
-            [KeyboardButton(text="📥 Входящие"), KeyboardButton(text="📝 Заказы")],
+            [KeyboardButton(text=inbox_button_text("📥 Входящие", inbox_count)), KeyboardButton(text="📝 Заказы")],
             [KeyboardButton(text="👥 Управление сотрудниками")],
             [KeyboardButton(text="🔌 Создать заявку на подключение"), KeyboardButton(text="🔧 Создать техническую заявку")],
             [KeyboardButton(text="📊 Статистика"), KeyboardButton(text="📤 Экспорт")],
@@ -14,7 +16,7 @@ def get_call_center_supervisor_main_menu(lang: str = 'uz') -> ReplyKeyboardMarku
         ]
     else:
         keyboard = [
-            [KeyboardButton(text="📥 Inbox"), KeyboardButton(text="📝 Buyurtmalar")],
+            [KeyboardButton(text=inbox_button_text("📥 Inbox", inbox_count)), KeyboardButton(text="📝 Buyurtmalar")],
             [KeyboardButton(text="👥 Xodimlar boshqaruvi")],
             [KeyboardButton(text="🔌 Ulanish arizasi yaratish"), KeyboardButton(text="🔧 Texnik xizmat yaratish")],
             [KeyboardButton(text="📊 Statistikalar"), KeyboardButton(text="📤 Export")],
@@ -1,11 +1,13 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from typing import List, Dict, Any
 
+from utils.inbox_counters import inbox_button_text
 
-def controllers_main_menu(lang='uz'):
+
+def controllers_main_menu(lang='uz', inbox_count: int = 0):
     if lang == 'uz':
         keyboard = [
-            [KeyboardButton(text="📥 Inbox"), KeyboardButton(text="📋 Arizalarni ko'rish")],
+            [KeyboardButton(text=inbox_button_text("📥 Inbox", inbox_count)), KeyboardButton(text="📋 Arizalarni ko'rish")],
             [KeyboardButton(text="🔌 Ulanish arizasi yaratish"), KeyboardButton(text="🔧 Texnik xizmat yaratish")],
             [KeyboardButton(text="🕐 Real vaqtda kuzatish"), KeyboardButton(text="📊 Monitoring")],
             [KeyboardButton(text="👥 Xodimlar faoliyati"), KeyboardButton(text="📤 Export")],
@@ -13,7 +15,7 @@ def controllers_main_menu(lang='uz'):
         ]
     else:
         keyboard = [
-            [KeyboardButton(text="📥 Входящие"), KeyboardButton(text="📋 Просмотр заявок")],
+            [KeyboardButton(text=inbox_button_text("📥 Входящие", inbox_count)), KeyboardButton(text="📋 Просмотр заявок")],
             [KeyboardButton(text="🔌 Создать заявку на подключение"), KeyboardButton(text="🔧 Создать техническую заявку")],
             [KeyboardButton(text="🕐 Мониторинг в реальном времени"), KeyboardButton(text="📊 Мониторинг")],
             [KeyboardButton(text="👥 Активность сотрудников"), KeyboardButton(text="📤 Экспорт")],
@@ -6,11 +6,13 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 
+from utils.inbox_counters import inbox_button_text
+
 
 # Main menu keyboards
-def get_junior_manager_main_menu(lang: str = "uz") -> ReplyKeyboardMarkup:
+def get_junior_manager_main_menu(lang: str = "uz", inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Junior manager main menu (reply keyboard)."""
-    inbox_text = "📥 Inbox"
+    inbox_text = inbox_button_text("📥 Inbox", inbox_count)
     view_apps_text = "📋 Arizalarni ko'rish" if lang == "uz" else "📋 Просмотр заявок"
     create_connection_text = (
         "🔌 Ulanish arizasi yaratish" if lang == "uz" else "🔌 Создать заявку на подключение"
@@ -27,9 +29,9 @@ def get_junior_manager_main_menu(lang: str = "uz") -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
-def get_junior_manager_main_keyboard(lang: str = "uz") -> ReplyKeyboardMarkup:
+def get_junior_manager_main_keyboard(lang: str = "uz", inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Alias used by role system to get main menu keyboard."""
-    return get_junior_manager_main_menu(lang)
+    return get_junior_manager_main_menu(lang, inbox_count)
 
 
 # Language selection
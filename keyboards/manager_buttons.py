@@ -1,13 +1,16 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.inbox_counters import inbox_button_text
 
-def get_manager_main_keyboard(lang: str = "uz") -> ReplyKeyboardMarkup:
+
+def get_manager_main_keyboard(lang: str = "uz", inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """
     Manager uchun asosiy reply menyu (O'zbek va Rus tillarida).
+    inbox_count - Inbox tugmasidagi o'qilmaganlar soni (utils.inbox_counters).
     """
     if lang == "uz":
         keyboard = [
-            [KeyboardButton(text="📥 Inbox"), KeyboardButton(text="📋 Arizalarni ko'rish")],
+            [KeyboardButton(text=inbox_button_text("📥 Inbox", inbox_count)), KeyboardButton(text="📋 Arizalarni ko'rish")],
             [KeyboardButton(text="🔌 Ulanish arizasi yaratish"), KeyboardButton(text="🔧 Texnik xizmat yaratish")],
             [KeyboardButton(text="🕐 Real vaqtda kuzatish"), KeyboardButton(text="📊 Monitoring")],
             [KeyboardButton(text="👥 Xodimlar faoliyati"), KeyboardButton(text="🔄 Status o'zgartirish")],
@@ -15,7 +18,7 @@ def get_manager_main_keyboard(lang: str = "uz") -> ReplyKeyboardMarkup:
         ]
     else:  # ruscha
         keyboard = [
-            [KeyboardButton(text="📥 Входящие"), KeyboardButton(text="📋 Все заявки")],
+            [KeyboardButton(text=inbox_button_text("📥 Входящие", inbox_count)), KeyboardButton(text="📋 Все заявки")],
             [KeyboardButton(text="🔌 Создать заявку на подключение"), KeyboardButton(text="🔧 Создать заявку на тех. обслуживание")],
             [KeyboardButton(text="🕐 Мониторинг в реальном времени"), KeyboardButton(text="📊 Мониторинг")],
             [KeyboardButton(text="👥 Активность сотрудников"), KeyboardButton(text="🔄 Изменить статус")],
@@ -1,10 +1,12 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 
+from utils.inbox_counters import inbox_button_text
 
-def get_technician_main_menu_keyboard(lang: str = "uz") -> ReplyKeyboardMarkup:
+
+def get_technician_main_menu_keyboard(lang: str = "uz", inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Technician main menu with 4 reply buttons: Language, Inbox, Tasks, Reports"""
     change_language_text = "🌐 Tilni o'zgartirish" if lang == "uz" else "🌐 Изменить язык"
-    inbox_text = "📥 Inbox"
+    inbox_text = inbox_button_text("📥 Inbox", inbox_count)
     tasks_text = "📋 Vazifalarim" if lang == "uz" else "📋 Мои задачи"
     reports_text = "📊 Hisobotlarim" if lang == "uz" else "📊 Мои отчеты"
 
@@ -7,14 +7,16 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 
+from utils.inbox_counters import inbox_button_text
+
 
 # =========================
 # Main menu and language
 # =========================
 
-def get_warehouse_main_keyboard(lang: str = "uz") -> ReplyKeyboardMarkup:
+def get_warehouse_main_keyboard(lang: str = "uz", inbox_count: int = 0) -> ReplyKeyboardMarkup:
     """Warehouse main reply keyboard (localized)."""
-    inbox = "📥 Inbox"
+    inbox = inbox_button_text("📥 Inbox", inbox_count)
     inventory = "📦 Inventarizatsiya" if lang == "uz" else "📦 Инвентаризация"
     orders = "📋 Buyurtmalar" if lang == "uz" else "📋 Заказы"
     statistics = "📊 Statistikalar" if lang == "uz" else "📊 Статистика"
@@ -10,15 +10,17 @@ import asyncio
 import traceback
 import sys
 import logging
+from typing import Optional
 from dotenv import load_dotenv
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from config import settings
-from config import get_admin_regions
+from config import get_admin_regions, is_global_admin
 from database.core_queries import get_user_role as get_role_in_region
+from utils.role_cache import role_cache
 
 # Logger sozlash - batafsil
 logging.basicConfig(
@@ -59,54 +61,115 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 DB_NAME = os.getenv('DB_NAME', 'alfaconnect_db')
 
+def _create_storage():
+    """FSM storage: MemoryStorage (default) or shared Postgres (FSM_STORAGE=postgres)"""
+    if settings.fsm_storage == 'postgres':
+        from database.fsm_storage import PostgresStorage
+        return PostgresStorage(
+            pool_name=settings.fsm_storage_db,
+            state_ttl=settings.fsm_state_ttl or None,
+        )
+    return MemoryStorage()
+
 # Initialize bot and dispatcher
 bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage)
+# Barcha chiquvchi so'rovlar uchun umumiy rate-limit va ustuvorlik navbati
+from utils.send_scheduler import SendScheduler
+send_scheduler = SendScheduler(
+    global_rate=settings.send_global_per_second,
+    chat_rate=settings.send_chat_per_second,
+    group_rate=settings.send_group_per_minute / 60,
+    notification_chat_ids=[ZAYAVKA_GROUP_ID] if ZAYAVKA_GROUP_ID else [],
+)
+bot.session.middleware(send_scheduler)
+
+# Inbox notification'larini (notification_outbox) yuboruvchi fon vazifa
+from utils.outbox_dispatcher import OutboxDispatcher
+outbox_dispatcher = OutboxDispatcher(bot)
+# Audit yozuvlarini partiyalab (COPY) yozuvchi fon vazifa
+from utils.audit_writer import audit_writer
+# last_activity yozuvlarini jamlab yozuvchi va onlayn xodimlarni xotirada saqlovchi fon vazifa
+from utils.activity_tracker import activity_tracker
+# Yangi inbox elementlarini onlayn xodimlarga yetkazish (LISTEN/NOTIFY)
+from utils.inbox_push import InboxPush
+inbox_push = InboxPush(bot)
+
+storage = _create_storage()
+# Bir foydalanuvchi update'lari ketma-ket, turli foydalanuvchilar parallel
+from utils.update_executor import SerialDispatcher, UpdateExecutor
+dp = SerialDispatcher(
+    storage=storage,
+    executor=UpdateExecutor(max_concurrency=settings.max_concurrent_updates),
+)
 
 # Middleware'larni qo'shish
 from middlewares.logger_middleware import LoggerMiddleware
 from middlewares.error_middleware import ErrorMiddleware
+from middlewares.role_middleware import RoleMiddleware
+from middlewares.fsm_session_middleware import FSMSessionMiddleware
+from middlewares.data_loader_middleware import DataLoaderMiddleware
+from middlewares.unit_of_work_middleware import UnitOfWorkMiddleware
+from middlewares.activity_middleware import ActivityMiddleware
+
+# Rolni har bir update uchun bir marta aniqlash (data['user_role'])
+dp.update.outer_middleware(RoleMiddleware())
+# FSM o'qish/yozishlarini update bo'yicha bitta so'rovga jamlash
+dp.update.outer_middleware(FSMSessionMiddleware())
+# Update davomida active_region uchun bitta DB ulanishi (data['uow'])
+dp.update.outer_middleware(UnitOfWorkMiddleware())
+# Foydalanuvchi faolligini xotirada qayd etish (last_activity har necha soniyada partiyalab yoziladi)
+dp.update.outer_middleware(ActivityMiddleware())
+# Foydalanuvchi/material so'rovlarini update ichida bitta ANY($1) so'roviga jamlash
+dp.update.outer_middleware(DataLoaderMiddleware())
 
 dp.message.middleware(LoggerMiddleware())
 dp.callback_query.middleware(LoggerMiddleware())
 dp.message.middleware(ErrorMiddleware())
 dp.callback_query.middleware(ErrorMiddleware())
 
-async def get_user_role(user_id: int) -> str:
-    """Get user role based on database records and admin list.
+async def _resolve_user_role(user_id: int) -> Optional[str]:
+    """Resolve user role from database records and admin list (uncached).
 
     Admin aniqlash shartlari (birortasi to'g'ri bo'lsa admin):
     - Toshkent DB'da `role='admin'`
     - `.env` dagi `ADMIN_IDS_TOSHKENT` yoki boshqa `ADMIN_IDS_<REGION>` ichida bo'lsa
     - `.env` dagi global `ADMIN_IDS` ichida bo'lsa
-    Aks holda: DB orqali rol topilsa o'sha, bo'lmasa `client`.
+    Aks holda: DB orqali rol topilsa o'sha, bo'lmasa None.
     """
+    # Toshkent DB bo'yicha admin
     try:
-        # Toshkent DB bo'yicha admin
-        try:
-            r = await get_role_in_region('toshkent', user_id)
-            if r and str(r).lower() == 'admin':
-                return 'admin'
-        except Exception as db_err:
-            logger.debug(f"Toshkent DB admin check failed for {user_id}: {db_err}")
-
-        # .env fallback: region/admin ro'yxatlar
-        if user_id in ADMIN_IDS:
-            return 'admin'
-        if get_admin_regions(user_id):  # ADMIN_IDS_<REGION> lar ichida bor-yo'qligi
+        r = await get_role_in_region('toshkent', user_id)
+        if r and str(r).lower() == 'admin':
             return 'admin'
+    except Exception as db_err:
+        logger.debug(f"Toshkent DB admin check failed for {user_id}: {db_err}")
 
-        # Default DB lookup (default/clients)
-        try:
-            from utils.user_repository import get_user_role as repo_get_user_role
-            role = await repo_get_user_role(user_id)
-            if role:
-                return role
-        except Exception as db_err:
-            logger.debug(f"DB role lookup failed for {user_id}: {db_err}")
+    # .env fallback: region/admin ro'yxatlar
+    if is_global_admin(user_id):
+        return 'admin'
+    if get_admin_regions(user_id):  # ADMIN_IDS_<REGION> lar ichida bor-yo'qligi
+        return 'admin'
 
-        return 'client'
+    # Default DB lookup (default/clients)
+    try:
+        from utils.user_repository import get_user_role as repo_get_user_role
+        role = await repo_get_user_role(user_id)
+        if role:
+            return role
+    except Exception as db_err:
+        logger.debug(f"DB role lookup failed for {user_id}: {db_err}")
+
+    return None
+
+async def get_user_role(user_id: int) -> str:
+    """Get user role, served from the shared role cache.
+
+    Concurrent calls for the same user share one lookup; users without a
+    role are negatively cached and reported as `client`.
+    """
+    try:
+        role = await role_cache.get_or_load(user_id, _resolve_user_role)
+        return role or 'client'
     except Exception:
         return 'client'
 
@@ -117,15 +180,59 @@ def get_bot():
 def get_dp():
     return dp
 
+async def on_shutdown():
+    """Single close path for shared resources (FSM storage, outbox, inbox push, audit buffer, activity tracker, invalidation bus, DB pools)"""
+    if hasattr(storage, 'start'):
+        await storage.close()
+    await outbox_dispatcher.stop()
+    await inbox_push.stop()
+    # Queued audit rows and pending last_activity must reach the DB before the pools close
+    await audit_writer.stop()
+    await activity_tracker.stop()
+    try:
+        from database.invalidation_bus import bus
+        await bus.stop()
+    except Exception as e:
+        logger.warning(f"Invalidation bus stop failed: {e}")
+    try:
+        from utils.db import close_all_pools
+        await close_all_pools()
+    except Exception as e:
+        logger.warning(f"DB pools close failed: {e}")
+
 async def setup_bot():
     """Setup bot with all handlers"""
     try:
-        # Initialize DB pools (default, clients, regions)
+        # Warm up the shared DB pool registry (default, clients, regions)
         try:
             from utils.db import init_db_pools
             await init_db_pools()
         except Exception as e:
             logger.warning(f"DB pools init skipped/failed: {e}")
+        # Cross-process cache invalidation (LISTEN/NOTIFY)
+        try:
+            from database.invalidation_bus import bus
+            await bus.start()
+        except Exception as e:
+            logger.warning(f"Invalidation bus start skipped/failed: {e}")
+        # Expired FSM states purge (persistent storage only)
+        if hasattr(storage, 'start'):
+            storage.start()
+        # Notification outbox delivery
+        outbox_dispatcher.start()
+        # Write-behind audit log
+        audit_writer.start()
+        # Coalesced last_activity / online presence
+        activity_tracker.start()
+        # Live inbox updates for online staff
+        try:
+            await inbox_push.start()
+        except Exception as e:
+            logger.warning(f"Inbox push start skipped/failed: {e}")
+        dp.shutdown.register(on_shutdown)
+        # SIGHUP: .env (adminlar, region DSN'lari, pool o'lchamlari) qayta yuklanadi
+        from utils.config_reload import install_sighup_handler
+        install_sighup_handler()
 
         # Import and setup handlers
         from handlers import setup_handlers
@@ -159,12 +266,65 @@ async def setup_bot():
         traceback.print_exc()
         raise
 
+async def run_polling():
+    """Long polling (default mode)"""
+    # Webhook o'rnatilgan bo'lsa getUpdates ishlamaydi
+    await bot.delete_webhook(drop_pending_updates=False)
+    await dp.start_polling(bot)
+
+async def run_webhook():
+    """Serve updates over an aiohttp webhook.
+
+    Telegram gets 200 right away; the update itself is processed in a
+    background task (handle_in_background), so slow handlers don't hold the
+    request. Requests without the configured secret token are rejected.
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    if not settings.webhook_url:
+        raise RuntimeError("RUN_MODE=webhook requires WEBHOOK_URL")
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret or None,
+        handle_in_background=True,
+    ).register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        url=f"{settings.webhook_url}{settings.webhook_path}",
+        secret_token=settings.webhook_secret or None,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port)
+    await site.start()
+    print(f"🌐 Webhook listening on {settings.webhook_host}:{settings.webhook_port}{settings.webhook_path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
 async def start_bot():
     """Start the bot"""
     try:
+        if settings.workers > 1:
+            # Front process: receive updates and shard them to worker processes
+            from utils.supervisor import run_supervisor
+            print(f"🚀 Starting supervisor ({settings.run_mode}, {settings.workers} workers)...")
+            await run_supervisor(settings.workers)
+            return
         await setup_bot()
-        print("🚀 Starting bot...")
-        await dp.start_polling(bot)
+        print(f"🚀 Starting bot ({settings.run_mode})...")
+        if settings.run_mode == 'webhook':
+            await run_webhook()
+        else:
+            await run_polling()
     except ImportError as e:
         logger.error(f"Import Error in start_bot: {e}", exc_info=True)
         print(f"❌ Import Error in start_bot: {e}")
@@ -6,5 +6,10 @@ Bu modul testbot uchun middleware'larni o'z ichiga oladi.
 
 from .logger_middleware import LoggerMiddleware
 from .error_middleware import ErrorMiddleware
+from .role_middleware import RoleMiddleware
+from .fsm_session_middleware import FSMSessionMiddleware
+from .data_loader_middleware import DataLoaderMiddleware
+from .unit_of_work_middleware import UnitOfWorkMiddleware
+from .activity_middleware import ActivityMiddleware
 
-__all__ = ['LoggerMiddleware', 'ErrorMiddleware'] 
\ No newline at end of file
+__all__ = ['LoggerMiddleware', 'ErrorMiddleware', 'RoleMiddleware', 'FSMSessionMiddleware', 'DataLoaderMiddleware', 'UnitOfWorkMiddleware', 'ActivityMiddleware'] 
\ No newline at end of file
@@ -0,0 +1,33 @@
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject, User
+from typing import Callable, Dict, Any, Awaitable, Optional
+import logging
+
+from utils.activity_tracker import activity_tracker
+
+logger = logging.getLogger(__name__)
+
+class ActivityMiddleware(BaseMiddleware):
+    """Record the sender's activity in utils.activity_tracker (no DB write per update).
+
+    Keyed by FSM data['active_region'] and the telegram id, with data['user_role']
+    so staff views can list who is online. Must run after RoleMiddleware and
+    FSMSessionMiddleware so neither value costs an extra query.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        state: Optional[FSMContext] = data.get("state")
+        if user is not None and state is not None and activity_tracker.running:
+            try:
+                region = (await state.get_data()).get("active_region")
+                activity_tracker.touch(region, user.id, data.get("user_role"))
+            except Exception as e:
+                logger.debug(f"[{user.id}] Activity touch failed: {e}")
+        return await handler(event, data)
@@ -0,0 +1,26 @@
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from typing import Callable, Dict, Any, Awaitable
+
+from utils.data_loader import UpdateLoaders, bind_loaders, reset_loaders
+
+class DataLoaderMiddleware(BaseMiddleware):
+    """Give each update its own batching entity loaders as data['loaders'].
+
+    Lookups made while handling the update (users, materials) are batched per
+    event-loop tick and memoized until the update finishes; see utils.data_loader.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        loaders = UpdateLoaders()
+        data["loaders"] = loaders
+        token = bind_loaders(loaders)
+        try:
+            return await handler(event, data)
+        finally:
+            reset_loaders(token)
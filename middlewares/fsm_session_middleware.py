@@ -0,0 +1,26 @@
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+class FSMSessionMiddleware(BaseMiddleware):
+    """Open a storage session around each update.
+
+    With a storage that supports sessions (database.fsm_storage.PostgresStorage)
+    the FSM row is read once per update and all state/data changes made by the
+    handler are written back in one statement when the update finishes.
+    Storages without ``session`` (MemoryStorage) are passed through untouched.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        state: Optional[FSMContext] = data.get("state")
+        session = getattr(state.storage, "session", None) if state is not None else None
+        if session is None:
+            return await handler(event, data)
+        async with session(state.key):
+            return await handler(event, data)
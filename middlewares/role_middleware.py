@@ -0,0 +1,31 @@
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+from typing import Callable, Dict, Any, Awaitable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RoleMiddleware(BaseMiddleware):
+    """Resolve the sender's role once per update and expose it as data['user_role'].
+
+    Registered as an outer middleware on ``dp.update`` so it runs after aiogram's
+    UserContextMiddleware (which provides ``event_from_user``) and before any
+    router is tried. RoleFilter and RoleDispatchRouter read the resolved value
+    instead of querying the database again.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is not None and "user_role" not in data:
+            from loader import get_user_role
+            try:
+                data["user_role"] = await get_user_role(user.id)
+            except Exception as e:
+                logger.error(f"[{user.id}] Role resolution failed: {e}")
+                data["user_role"] = "client"
+        return await handler(event, data)
@@ -0,0 +1,46 @@
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+from typing import Callable, Dict, Any, Awaitable, Optional
+import logging
+
+from database.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """Expose the update's unit of work (database.unit_of_work) as data['uow'].
+
+    The region comes from FSM data['active_region'] (set by /start or the
+    region picker); updates without one get data['uow'] = None. No
+    connection is held for the update: queries use the pool one at a time
+    and `uow.transaction()` holds one only while the transaction is open
+    (an unfinished one is rolled back when the update finishes). Must run
+    after FSMSessionMiddleware so reading the region costs no extra query.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        state: Optional[FSMContext] = data.get("state")
+        region = None
+        if state is not None:
+            try:
+                region = (await state.get_data()).get("active_region")
+            except Exception as e:
+                logger.debug(f"active_region lookup failed: {e}")
+        if not region:
+            data["uow"] = None
+            return await handler(event, data)
+
+        uow = UnitOfWork(region)
+        data["uow"] = uow
+        token = uow.bind()
+        try:
+            return await handler(event, data)
+        finally:
+            uow.unbind(token)
+            await uow.close()
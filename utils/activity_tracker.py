@@ -0,0 +1,183 @@
+"""
+Activity Tracker - coalesced users.last_activity writes and "who is online"
+
+Every update used to cost an ``UPDATE users SET last_activity=NOW()`` (via
+``core_queries.set_last_activity`` / ``ensure_user_in_region``). Now
+``touch(region, telegram_id, role)`` only records the time in memory, keyed
+by (region, telegram_id):
+- every ``ACTIVITY_FLUSH_INTERVAL`` seconds the changed entries are written
+  with one ``UPDATE ... FROM unnest(...)`` per region
+  (``core_queries.set_last_activity_many``); a failed region is retried on
+  the next flush
+- ``online(region, roles)`` answers "who is online now" (seen within
+  ``ACTIVITY_ONLINE_WINDOW`` seconds) from memory, without a users scan
+- ``stop()`` writes what is still pending (called from loader.on_shutdown
+  before the DB pools are closed)
+
+Presence is per process: with several bot processes each one only knows the
+users whose updates it handled.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Seen:
+    __slots__ = ("role", "at")
+
+    def __init__(self, role: Optional[str], at: datetime):
+        self.role = role
+        self.at = at
+
+
+class ActivityTracker:
+    # None follows config (ACTIVITY_FLUSH_INTERVAL, ACTIVITY_ONLINE_WINDOW), reloads included
+    def __init__(self, flush_interval: Optional[float] = None, online_window: Optional[float] = None):
+        self._flush_interval = flush_interval
+        self._online_window = online_window
+        # (region, telegram_id) -> last seen
+        self._seen: Dict[Tuple[str, int], _Seen] = {}
+        self._dirty: Set[Tuple[str, int]] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.touches = 0
+        self.written = 0
+        self.flushes = 0
+
+    @property
+    def flush_interval(self) -> float:
+        return max(0.1, self._flush_interval if self._flush_interval is not None
+                   else get_settings().activity_flush_interval)
+
+    @property
+    def online_window(self) -> float:
+        return self._online_window if self._online_window is not None else get_settings().activity_online_window
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def touch(self, region: Optional[str], telegram_id: Optional[int], role: Optional[str] = None) -> bool:
+        """Record activity now; False when not running (the caller writes directly)"""
+        if not self.running or not region or not telegram_id:
+            return False
+        key = ((region or "").lower(), int(telegram_id))
+        seen = self._seen.get(key)
+        now = datetime.now(timezone.utc)
+        if seen is None:
+            self._seen[key] = _Seen(role, now)
+        else:
+            seen.at = now
+            if role:
+                seen.role = role
+        self._dirty.add(key)
+        self.touches += 1
+        return True
+
+    def last_seen(self, region: str, telegram_id: int) -> Optional[datetime]:
+        seen = self._seen.get(((region or "").lower(), int(telegram_id)))
+        return seen.at if seen else None
+
+    def online(self, region: Optional[str] = None, roles: Optional[Iterable[str]] = None,
+               within: Optional[float] = None) -> List[Tuple[str, int, Optional[str], datetime]]:
+        """(region, telegram_id, role, seen_at) of users active within `within`
+        seconds (default ``ACTIVITY_ONLINE_WINDOW``), most recent first"""
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.online_window if within is None else within)
+        region = (region or "").lower() or None
+        wanted = set(roles) if roles is not None else None
+        result = [
+            (r, telegram_id, seen.role, seen.at)
+            for (r, telegram_id), seen in self._seen.items()
+            if seen.at >= since
+            and (region is None or r == region)
+            and (wanted is None or seen.role in wanted)
+        ]
+        result.sort(key=lambda item: item[3], reverse=True)
+        return result
+
+    def _prune(self) -> None:
+        """Drop entries that are written and no longer online (bounded memory)"""
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.online_window)
+        stale = [key for key, seen in self._seen.items() if seen.at < since and key not in self._dirty]
+        for key in stale:
+            del self._seen[key]
+
+    async def flush(self) -> int:
+        """Write every pending last_activity; returns the number of users written"""
+        from database.core_queries import set_last_activity_many
+
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        by_region: Dict[str, Tuple[List[int], List[datetime]]] = {}
+        for region, telegram_id in dirty:
+            seen = self._seen.get((region, telegram_id))
+            if seen is None:
+                continue
+            ids, times = by_region.setdefault(region, ([], []))
+            ids.append(telegram_id)
+            times.append(seen.at)
+        try:
+            results = await asyncio.gather(
+                *(set_last_activity_many(region, ids, times) for region, (ids, times) in by_region.items()),
+                return_exceptions=True,
+            )
+        except BaseException:
+            # Cancelled mid-flush (stop): keep everything for the final flush
+            self._dirty.update(dirty)
+            raise
+        written = 0
+        for (region, (ids, _)), result in zip(by_region.items(), results):
+            if isinstance(result, BaseException):
+                # Newer touches may have re-added some keys meanwhile; the set keeps one
+                self._dirty.update((region, telegram_id) for telegram_id in ids)
+                logger.warning(f"last_activity flush to {region} failed ({len(ids)} users), retrying later: {result}")
+            else:
+                written += len(ids)
+        self.written += written
+        self.flushes += 1
+        self._prune()
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Activity flush failed: {e}")
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop and write what is still pending"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Final activity flush failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tracked': len(self._seen),
+            'pending': len(self._dirty),
+            'online': len(self.online()),
+            'touches': self.touches,
+            'written': self.written,
+            'flushes': self.flushes,
+        }
+
+
+# Process-wide tracker (started by loader.setup_bot)
+activity_tracker = ActivityTracker()
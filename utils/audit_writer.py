@@ -0,0 +1,168 @@
+"""
+Audit Writer - write-behind buffer for audit_log
+
+``database.audit_logger.log_action`` (without ``conn`` and outside a
+unit-of-work transaction) only puts the row on a bounded in-memory queue;
+this background task writes it:
+- flushes every ``AUDIT_FLUSH_INTERVAL_MS`` or as soon as ``AUDIT_BATCH_SIZE``
+  rows are waiting, one ``copy_records_to_table`` per region
+- backpressure: when ``AUDIT_QUEUE_SIZE`` rows are queued, ``log_action``
+  waits for room instead of growing memory without bound
+- ``stop()`` drains the queue and flushes it (called from loader.on_shutdown
+  before the DB pools are closed)
+
+Rows are lost only if the process dies without a shutdown, or a region's
+database stays unreachable; both are logged.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    # Values left as None follow config (AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_MS,
+    # AUDIT_QUEUE_SIZE); the queue size is fixed when the writer starts
+    def __init__(self, batch_size: Optional[int] = None, flush_interval_ms: Optional[int] = None,
+                 queue_size: Optional[int] = None):
+        self._batch_size = batch_size
+        self._flush_interval_ms = flush_interval_ms
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.waited = 0
+
+    @property
+    def batch_size(self) -> int:
+        return max(1, self._batch_size if self._batch_size is not None else get_settings().audit_batch_size)
+
+    @property
+    def flush_interval(self) -> float:
+        ms = self._flush_interval_ms if self._flush_interval_ms is not None else get_settings().audit_flush_interval_ms
+        return max(1, ms) / 1000
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size if self._queue_size is not None else get_settings().audit_queue_size
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def enqueue(self, region_code: str, record: Sequence[Any]) -> None:
+        """Queue one audit row; waits while the queue is full (backpressure)"""
+        item = (region_code, record)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.waited += 1
+            await self._queue.put(item)
+
+    async def _collect(self) -> Tuple[List[Tuple[str, Sequence[Any]]], bool]:
+        """Wait for the first row, then take more until the batch is full or the
+        interval ends; the flag is True when the stop sentinel was reached"""
+        batch: List[Tuple[str, Sequence[Any]]] = []
+        item = await self._queue.get()
+        if item is None:
+            return batch, True
+        batch.append(item)
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _write(self, batch: List[Tuple[str, Sequence[Any]]]) -> None:
+        from database.audit_logger import write_audit_records
+
+        by_region: Dict[str, List[Sequence[Any]]] = {}
+        for region_code, record in batch:
+            by_region.setdefault(region_code, []).append(record)
+        results = await asyncio.gather(
+            *(write_audit_records(region, records) for region, records in by_region.items()),
+            return_exceptions=True,
+        )
+        for (region, records), result in zip(by_region.items(), results):
+            if isinstance(result, BaseException):
+                self.dropped += len(records)
+                logger.error(f"Audit flush to {region} failed, {len(records)} rows lost: {result}")
+            else:
+                self.written += result
+                self.dropped += len(records) - result
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"Audit flush failed, {len(batch)} rows lost: {e}")
+
+    def _drain(self) -> List[Tuple[str, Sequence[Any]]]:
+        items = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                items.append(item)
+        return items
+
+    async def flush(self) -> None:
+        """Write everything queued right now"""
+        items = self._drain()
+        for start in range(0, len(items), self.batch_size):
+            await self._write(items[start:start + self.batch_size])
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let the loop write everything queued, then stop (log_action writes
+        directly afterwards). Rows still queued after ``timeout`` are flushed here."""
+        task = self._task
+        if task is None:
+            return
+        if not task.done():
+            # The sentinel goes behind the queued rows, so they are written first
+            await self._queue.put(None)
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Audit writer did not drain in time; flushing the rest directly")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'written': self.written,
+            'dropped': self.dropped,
+            'backpressure_waits': self.waited,
+        }
+
+
+# Process-wide writer (started by loader.setup_bot)
+audit_writer = AuditWriter()
@@ -0,0 +1,95 @@
+"""
+Config Reload - hot reload of the compiled config snapshot
+
+``config.reload_settings()`` re-reads .env / the environment and swaps the
+compiled snapshot (admins by telegram id, region DSNs and pool sizes) in one
+assignment. ``reload_config()`` adds what the running bot needs on top:
+- pools of regions whose DSN or pool size changed (or that were removed)
+  are closed; the next query opens a fresh pool with the new settings
+- the role cache is cleared when the admin lists changed, so new / removed
+  admins apply at once
+- a ``settings_changed`` event goes out on the invalidation bus, so the
+  other bot processes (WORKERS > 1) run the same reload from the shared .env
+
+Triggered by SIGHUP (``install_sighup_handler``, set up in loader.setup_bot)
+or the admin ``/reload_config`` command. Per-region background tasks
+(outbox dispatcher, inbox push listeners) are not restarted: a newly added
+region gets them on the next restart.
+"""
+
+import asyncio
+import logging
+import signal
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_lock = asyncio.Lock()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def reload_config(broadcast: bool = True) -> Dict[str, Any]:
+    """Reload the config snapshot and apply it; returns what changed.
+
+    `broadcast=False` is used when the reload was triggered by another
+    process' event (it must not bounce back).
+    """
+    from config import get_snapshot, reload_settings
+    from database.db_router import router
+    from database.invalidation_bus import SETTINGS_CHANGED, publish
+    from utils.role_cache import invalidate_role_cache
+
+    async with _lock:
+        old = get_snapshot()
+        reload_settings()
+        new = get_snapshot()
+
+        added = sorted(set(new.regions) - set(old.regions))
+        removed = sorted(set(old.regions) - set(new.regions))
+        changed = sorted(code for code in set(old.regions) & set(new.regions) if old.regions[code] != new.regions[code])
+        for code in removed + changed:
+            if router.peek(code) is not None:
+                try:
+                    await router.close_pool(code)
+                except Exception as e:
+                    logger.warning(f"Closing pool '{code}' after config reload failed: {e}")
+
+        admins_changed = old.global_admins != new.global_admins or old.region_admins != new.region_admins
+        if admins_changed:
+            invalidate_role_cache()
+
+    summary = {
+        'regions_added': added,
+        'regions_removed': removed,
+        'regions_changed': changed,
+        'admins_changed': admins_changed,
+    }
+    logger.info(f"Config reloaded: {summary}")
+    if broadcast:
+        # Failures are logged by the bus; this process is reloaded either way
+        await publish(SETTINGS_CHANGED)
+    return summary
+
+
+async def _reload_logged() -> None:
+    try:
+        await reload_config()
+    except Exception as e:
+        logger.error(f"Config reload failed: {e}")
+
+
+def _on_sighup() -> None:
+    task = asyncio.get_running_loop().create_task(_reload_logged())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def install_sighup_handler(loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """Reload the config on SIGHUP; False where signals are unsupported (Windows)"""
+    loop = loop or asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _on_sighup)
+    except (AttributeError, NotImplementedError, RuntimeError) as e:
+        logger.debug(f"SIGHUP config reload not available: {e}")
+        return False
+    return True
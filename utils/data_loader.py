@@ -0,0 +1,133 @@
+"""
+Data Loader - per-update batching of entity lookups (N+1 -> 1 query)
+
+``DataLoaderMiddleware`` gives every update a fresh ``UpdateLoaders``
+(``data['loaders']``, also reachable through ``current_loaders()``). Each
+loader collects the keys requested in the same event-loop tick and resolves
+them with one ``WHERE id = ANY($1)`` query, then memoizes the rows for the
+rest of the update::
+
+    loaders = data['loaders']
+    users = loaders.users(region)
+    client, assignee = await asyncio.gather(users.load(req['client_id']),
+                                            users.load(req['current_assignee_id']))
+    names = await loaders.materials(region).load_many([m['material_id'] for m in rows])
+
+Nothing is shared between updates, so there is no cross-update staleness;
+call ``clear(key)`` after changing a row inside the same update.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+BatchFn = Callable[[List[Any]], Awaitable[Dict[Any, Any]]]
+
+_current: contextvars.ContextVar[Optional["UpdateLoaders"]] = contextvars.ContextVar('update_loaders', default=None)
+
+
+class DataLoader:
+    def __init__(self, batch_fn: BatchFn, max_batch_size: int = 500):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Tuple[Hashable, asyncio.Future]] = []
+        self.batches = 0
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[Any]]":
+        """Row for ``key`` (None if it doesn't exist); same-tick calls share one query"""
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        if key is None:
+            future.set_result(None)
+            return future
+        if not self._queue:
+            loop.call_soon(self._dispatch)
+        self._queue.append((key, future))
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Optional[Any]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Seed the memo with a row the handler already has"""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            asyncio.get_running_loop().create_task(self._run(queue[start:start + self.max_batch_size]))
+
+    async def _run(self, batch: List[Tuple[Hashable, asyncio.Future]]) -> None:
+        self.batches += 1
+        try:
+            rows = await self.batch_fn([key for key, _ in batch])
+        except Exception as e:
+            for key, future in batch:
+                # A failed lookup is not memoized; the next load retries
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch:
+            if not future.done():
+                future.set_result(rows.get(key))
+
+
+class UpdateLoaders:
+    """The loaders of one update, created on first use per (entity, region)"""
+
+    def __init__(self):
+        self._loaders: Dict[Tuple[str, str], DataLoader] = {}
+
+    def _get(self, name: str, region: str, batch_fn: Callable[[str, List[Any]], Awaitable[Dict[Any, Any]]]) -> DataLoader:
+        loader = self._loaders.get((name, region))
+        if loader is None:
+            loader = DataLoader(lambda keys: batch_fn(region, keys))
+            self._loaders[(name, region)] = loader
+        return loader
+
+    def users(self, region: str) -> DataLoader:
+        """users rows by users.id"""
+        from database.core_queries import get_users_by_ids
+        return self._get('users', region, get_users_by_ids)
+
+    def users_by_telegram(self, region: str) -> DataLoader:
+        """users rows by telegram_id"""
+        from database.core_queries import get_users_by_telegram_ids
+        return self._get('users_by_telegram', region, get_users_by_telegram_ids)
+
+    def materials(self, region: str) -> DataLoader:
+        """materials rows by materials.id"""
+        from database.warehouse_queries import get_materials_by_ids
+        return self._get('materials', region, get_materials_by_ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {f"{name}:{region}": loader.batches for (name, region), loader in self._loaders.items()}
+
+
+def current_loaders() -> UpdateLoaders:
+    """Loaders of the update being handled (a throwaway set outside an update)"""
+    return _current.get() or UpdateLoaders()
+
+
+def bind_loaders(loaders: Optional[UpdateLoaders]) -> contextvars.Token:
+    return _current.set(loaders)
+
+
+def reset_loaders(token: contextvars.Token) -> None:
+    _current.reset(token)
@@ -0,0 +1,124 @@
+"""
+Inbox Counters - in-process cache of unread / uncompleted inbox counts
+
+The counts live in the ``inbox_counters`` table (one row per region DB,
+assigned_role and recipient_id; recipient 0 = items for the whole role) and
+are maintained by ``database.inbox_queries`` in the same transaction as the
+inbox change. This module caches them so keyboard builders can show
+"📥 Inbox (12)" without a query:
+- ``badge(region, role, telegram_id)`` is a sync O(1) dict lookup (0 if unknown)
+- ``load(region, role, telegram_id)`` reads the table once and caches it
+- inbox_queries applies its committed deltas with ``apply``; entries expire
+  after ``INBOX_COUNTER_TTL`` so changes made by other processes show up
+"""
+
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import get_settings
+
+# Matches the inbox reply button with or without a badge: "📥 Inbox", "📥 Входящие (3)"
+INBOX_BUTTON_RE = re.compile(r"^📥 (Inbox|Входящие)( \(\d+\+?\))?$")
+
+
+def inbox_button_text(text: str, count: int = 0) -> str:
+    """Inbox reply button text with an unread badge"""
+    if count <= 0:
+        return text
+    return f"{text} ({count if count < 100 else '99+'})"
+
+
+class InboxCounters:
+    def __init__(self, ttl: Optional[float] = None):
+        # None follows config (INBOX_COUNTER_TTL), reloads included
+        self._ttl = ttl
+        # (region, role, recipient_id) -> [unread, uncompleted, expires_at]
+        self._entries: Dict[Tuple[str, str, int], list] = {}
+        # (region, telegram_id) -> users.id in that region
+        self._recipients: Dict[Tuple[str, int], int] = {}
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else get_settings().inbox_counter_ttl
+
+    def get(self, region: str, role: str, recipient_id: int) -> Optional[Tuple[int, int]]:
+        """(unread, uncompleted) for one counter row, None if not cached"""
+        entry = self._entries.get((region, role, recipient_id))
+        if entry is None or time.monotonic() >= entry[2]:
+            return None
+        return entry[0], entry[1]
+
+    def set(self, region: str, role: str, recipient_id: int, unread: int, uncompleted: int) -> None:
+        self._entries[(region, role, recipient_id)] = [unread, uncompleted, time.monotonic() + self.ttl]
+
+    def apply(self, region: str, role: str, recipient_id: int, unread: int = 0, uncompleted: int = 0) -> None:
+        """Apply a committed delta; uncached rows are left to the next load"""
+        entry = self._entries.get((region, role, recipient_id))
+        if entry is not None:
+            entry[0] = max(0, entry[0] + unread)
+            entry[1] = max(0, entry[1] + uncompleted)
+
+    def counts(self, region: str, role: str, telegram_id: int) -> Optional[Tuple[int, int]]:
+        """Own + role-wide (unread, uncompleted) for a user, None if not cached"""
+        shared = self.get(region, role, 0)
+        if shared is None or (region, telegram_id) not in self._recipients:
+            return None
+        recipient_id = self._recipients[(region, telegram_id)]
+        own = self.get(region, role, recipient_id) if recipient_id else (0, 0)
+        if own is None:
+            return None
+        return own[0] + shared[0], own[1] + shared[1]
+
+    def recipient(self, region: str, telegram_id: int) -> Optional[int]:
+        """Cached users.id of a telegram user in a region (0 = no users row), None if unknown"""
+        return self._recipients.get((region, telegram_id))
+
+    def badge(self, region: Optional[str], role: str, telegram_id: int) -> int:
+        """Unread count for the inbox button; 0 when not cached (never queries)"""
+        if not region:
+            return 0
+        counts = self.counts(region, role, telegram_id)
+        return counts[0] if counts else 0
+
+    async def load(self, region: str, role: str, telegram_id: int) -> int:
+        """Return the badge, reading inbox_counters if the cache is cold"""
+        if self.counts(region, role, telegram_id) is None:
+            from database.inbox_queries import get_inbox_counters
+
+            result = await get_inbox_counters(region, role, telegram_id)
+            recipient_id = result["recipient_id"] or 0
+            self._recipients[(region, telegram_id)] = recipient_id
+            self.set(region, role, 0, *result["shared"])
+            if recipient_id:
+                self.set(region, role, recipient_id, *result["own"])
+        return self.badge(region, role, telegram_id)
+
+    def invalidate(self, region: Optional[str] = None) -> None:
+        if region is None:
+            self._entries.clear()
+            self._recipients.clear()
+            return
+        for key in [k for k in self._entries if k[0] == region]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'recipients': len(self._recipients),
+            'ttl': self.ttl,
+        }
+
+
+# Process-wide counters cache
+inbox_counters = InboxCounters()
+
+
+async def load_inbox_badge(region: Optional[str], role: str, telegram_id: int) -> int:
+    """Unread inbox badge for a user (0 on any error so menus always render)"""
+    if not region:
+        return 0
+    try:
+        return await inbox_counters.load(region, role, telegram_id)
+    except Exception:
+        return 0
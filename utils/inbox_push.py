@@ -0,0 +1,255 @@
+"""
+Inbox Push - live inbox updates for online staff (Postgres LISTEN/NOTIFY)
+
+``inbox_queries.create_on_assignment`` sends a NOTIFY on ``INBOX_CHANNEL``
+with the region, role, recipient and inbox id of every new row (delivered on
+commit). This module keeps a single LISTEN connection per region and fans
+the event out to the staff that are online in this process, instead of
+every user polling ``get_role_inbox``:
+- who is online comes from ``utils.activity_tracker`` (ActivityMiddleware
+  touches it on every update, ``ACTIVITY_ONLINE_WINDOW``), the same list the
+  "🟢 Onlayn" staff views show; this module only keeps the pinned message
+- an event for a recipient refreshes that user, a role-wide event (no
+  recipient) refreshes everyone online with that role in the region; users
+  whose users.id this process doesn't know yet are resolved at refresh
+  time (``inbox_counters.load``) and skipped there if it isn't theirs
+- refreshes are coalesced for ``INBOX_PUSH_DEBOUNCE`` seconds, then each
+  user's pinned "📥 Inbox" status message is edited (sent and pinned the
+  first time) in the NOTIFICATION lane of the SendScheduler
+- events from other processes also apply the +1 to the local
+  ``inbox_counters`` cache, so badges stay current without a query
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import asyncpg  # type: ignore
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from config import get_settings
+from utils.activity_tracker import ActivityTracker, activity_tracker
+from utils.inbox_counters import inbox_button_text, inbox_counters
+from utils.send_scheduler import NOTIFICATION, send_priority
+
+logger = logging.getLogger(__name__)
+
+_RECONNECT_DELAY = 5.0
+
+
+class _Pinned:
+    __slots__ = ("role", "message_id")
+
+    def __init__(self, role: str):
+        self.role = role
+        self.message_id: Optional[int] = None
+
+
+class InboxPush:
+    def __init__(self, bot: Any, regions: Optional[List[str]] = None,
+                 tracker: Optional[ActivityTracker] = None, debounce: Optional[float] = None):
+        self.bot = bot
+        self.regions = regions
+        self.tracker = tracker or activity_tracker
+        # None follows config (INBOX_PUSH_DEBOUNCE), reloads included
+        self._debounce = debounce
+        # (region, telegram_id) -> role and status message (private chat: chat id = telegram id)
+        self._pinned: Dict[Tuple[str, int], _Pinned] = {}
+        # (region, telegram_id) -> users.id the events were for (None = refresh regardless)
+        self._dirty: Dict[Tuple[str, int], Optional[Set[int]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._connections: Dict[str, asyncpg.Connection] = {}
+        self._reconnect_tasks: Dict[str, asyncio.Task] = {}
+        self._running = False
+        self.events = 0
+        self.pushed = 0
+
+    @property
+    def debounce(self) -> float:
+        return self._debounce if self._debounce is not None else get_settings().inbox_push_debounce
+
+    # ----- presence -----
+    def forget(self, region: str, telegram_id: int) -> None:
+        self._pinned.pop((region, telegram_id), None)
+        self._dirty.pop((region, telegram_id), None)
+
+    def online(self, region: str, role: Optional[str] = None) -> List[int]:
+        """Telegram ids currently online in a region (optionally of one role), per the activity tracker"""
+        return [
+            telegram_id for _, telegram_id, r, _ in self.tracker.online(region, roles=(role,) if role else None)
+            if r and r != 'client'
+        ]
+
+    # ----- events -----
+    def handle_event(self, event: Dict[str, Any]) -> int:
+        """Mark the online recipients of one new inbox row dirty (users not resolved yet
+        included); return how many"""
+        from database.invalidation_bus import bus
+
+        region, role = event.get("region"), event.get("role")
+        recipient_id = event.get("recipient_id")
+        if not region or not role:
+            return 0
+        self.events += 1
+        if event.get("origin") != bus.origin:
+            # Our own writes were applied to the cache by inbox_queries already
+            inbox_counters.apply(region, role, recipient_id or 0, unread=1, uncompleted=1)
+
+        targets = 0
+        for telegram_id in self.online(region, role):
+            key = (region, telegram_id)
+            known = inbox_counters.recipient(region, telegram_id) if recipient_id else None
+            if known is not None and known != recipient_id:
+                continue
+            pinned = self._pinned.get(key)
+            if pinned is None or pinned.role != role:
+                self._pinned[key] = _Pinned(role)
+            if recipient_id and known is None:
+                # users.id not cached here yet: _refresh checks it after loading
+                if key not in self._dirty:
+                    self._dirty[key] = {recipient_id}
+                elif self._dirty[key] is not None:
+                    self._dirty[key].add(recipient_id)
+            else:
+                self._dirty[key] = None
+            targets += 1
+        if targets:
+            self._schedule_flush()
+        return targets
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except Exception:
+            logger.debug(f"Ignoring malformed inbox payload: {payload!r}")
+            return
+        self.handle_event(event)
+
+    # ----- fan-out -----
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.debounce)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Refresh the pinned status message of every dirty user; return how many were updated"""
+        dirty, self._dirty = self._dirty, {}
+        results = await asyncio.gather(
+            *(self._refresh(*key, recipients) for key, recipients in dirty.items()), return_exceptions=True,
+        )
+        for key, result in zip(dirty, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Inbox push to {key[1]} ({key[0]}) failed: {result}")
+        updated = sum(1 for result in results if result is True)
+        self.pushed += updated
+        return updated
+
+    async def _refresh(self, region: str, telegram_id: int, recipients: Optional[Set[int]] = None) -> bool:
+        pinned = self._pinned.get((region, telegram_id))
+        if pinned is None:
+            return False
+        count = await inbox_counters.load(region, pinned.role, telegram_id)
+        if recipients is not None and inbox_counters.recipient(region, telegram_id) not in recipients:
+            return False  # the events were for someone else
+        text = inbox_button_text("📥 Inbox", count) + (" - yangi arizalar bor" if count else "")
+        with send_priority(NOTIFICATION):
+            if pinned.message_id is not None:
+                try:
+                    await self.bot.edit_message_text(
+                        text=text, chat_id=telegram_id, message_id=pinned.message_id,
+                    )
+                    return True
+                except TelegramBadRequest as e:
+                    if "not modified" in str(e):
+                        return False
+                    pinned.message_id = None  # deleted or too old: send a new one
+            try:
+                message = await self.bot.send_message(
+                    chat_id=telegram_id, text=text, disable_notification=True,
+                )
+            except TelegramForbiddenError:
+                self.forget(region, telegram_id)
+                return False
+            pinned.message_id = message.message_id
+            try:
+                await self.bot.pin_chat_message(
+                    chat_id=telegram_id, message_id=message.message_id, disable_notification=True,
+                )
+            except TelegramBadRequest:
+                pass
+        return True
+
+    # ----- LISTEN connections -----
+    def _on_terminate(self, region: str):
+        def _callback(connection: Any) -> None:
+            self._connections.pop(region, None)
+            if self._running and region not in self._reconnect_tasks:
+                self._reconnect_tasks[region] = asyncio.get_running_loop().create_task(self._reconnect(region))
+        return _callback
+
+    async def _listen(self, region: str) -> None:
+        from database.db_router import get_dsn
+        from database.inbox_queries import INBOX_CHANNEL
+
+        conn = await asyncpg.connect(get_dsn(region))
+        await conn.add_listener(INBOX_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate(region))
+        self._connections[region] = conn
+        logger.info(f"Inbox push listening on {region}")
+
+    async def _reconnect(self, region: str) -> None:
+        try:
+            while self._running and region not in self._connections:
+                await asyncio.sleep(_RECONNECT_DELAY)
+                try:
+                    await self._listen(region)
+                except Exception as e:
+                    logger.warning(f"Inbox push reconnect to {region} failed: {e}")
+        finally:
+            self._reconnect_tasks.pop(region, None)
+
+    async def start(self) -> None:
+        from database.region_config import get_region_codes
+
+        if self._running:
+            return
+        self._running = True
+        regions = self.regions if self.regions is not None else get_region_codes()
+        results = await asyncio.gather(*(self._listen(r) for r in regions), return_exceptions=True)
+        for region, result in zip(regions, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Inbox push listen on {region} failed: {result}")
+                self._reconnect_tasks[region] = asyncio.get_running_loop().create_task(self._reconnect(region))
+
+    async def stop(self) -> None:
+        from database.inbox_queries import INBOX_CHANNEL
+
+        self._running = False
+        tasks = list(self._reconnect_tasks.values())
+        if self._flush_task is not None:
+            tasks.append(self._flush_task)
+        self._reconnect_tasks.clear()
+        self._flush_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for conn in list(self._connections.values()):
+            try:
+                await conn.remove_listener(INBOX_CHANNEL, self._on_notify)
+                await conn.close()
+            except Exception:
+                pass
+        self._connections.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'regions': sorted(self._connections),
+            'pinned': sum(1 for p in self._pinned.values() if p.message_id is not None),
+            'pending': len(self._dirty),
+            'events': self.events,
+            'pushed': self.pushed,
+        }
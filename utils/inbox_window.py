@@ -0,0 +1,376 @@
+"""
+Inbox Window - lazy, windowed prev/next navigation over a role inbox
+
+The inbox handlers used to load the whole request list into FSM data and
+re-render from it on every tap. ``InboxWindow`` keeps only a small ring of
+pages in FSM data instead:
+- pages are fetched from a ``source`` on demand, at most ``max_pages`` pages
+  (``max_pages * page_size`` items) are kept; the far end is dropped and
+  fetched again through its cursor when the user comes back
+- when the current item is within ``prefetch_margin`` of the loaded edge the
+  next page is fetched in the background, so the tap that crosses the edge
+  doesn't wait for the database
+- every role gets the same API: ``open``, ``current``, ``next``, ``prev``,
+  ``replace_current``, ``remove_current``, ``position``
+
+A source is anything with ``fetch(cursor, direction, limit)`` returning
+``{"items", "next_cursor", "prev_cursor"}`` (optionally ``"total"``), i.e.
+the shape of ``database.inbox_queries.get_role_inbox_page``::
+
+    window = InboxWindow(state, 'mgr_inbox', RoleInboxSource(region, 'manager', user_id))
+    item = await window.open()
+    ...
+    item = await window.next()
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram.fsm.context import FSMContext
+
+PAGE_SIZE = 10
+MAX_PAGES = 3
+PREFETCH_MARGIN = 3
+_PREFETCH_LIMIT = 1000
+LIST_CACHE_TTL = 60.0
+_LIST_CACHE_LIMIT = 1000
+
+# (storage key, window key, direction, cursor) -> page being fetched
+_prefetch: "OrderedDict[Tuple[Any, str, str, str], asyncio.Task]" = OrderedDict()
+# (storage key, window key) -> (loaded at, whole list) for ListSource
+_list_cache: "OrderedDict[Tuple[Any, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def jsonable_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of `items` with dates as ISO strings: FSM data must stay JSON-serializable"""
+    return [
+        {k: v.isoformat() if isinstance(v, (datetime, date)) else v for k, v in item.items()}
+        for item in items
+    ]
+
+
+class ListSource:
+    """Source over a loader returning the whole list (offset cursors).
+
+    For inboxes that are not backed by a keyset query yet; the list is
+    sliced per page so FSM data still only holds the window. The window binds
+    ``cache_key``: the list is loaded once per ``open`` and page turns slice
+    the cached copy (at most ``ttl`` seconds old).
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]], ttl: float = LIST_CACHE_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self.cache_key: Optional[Tuple[Any, str]] = None
+
+    def invalidate(self) -> None:
+        _list_cache.pop(self.cache_key, None)
+
+    async def _load(self) -> List[Dict[str, Any]]:
+        if self.cache_key is None:
+            return await self.loader()
+        cached = _list_cache.get(self.cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            _list_cache.move_to_end(self.cache_key)
+            return cached[1]
+        items = await self.loader()
+        _list_cache[self.cache_key] = (time.monotonic(), items)
+        _list_cache.move_to_end(self.cache_key)
+        while len(_list_cache) > _LIST_CACHE_LIMIT:
+            _list_cache.popitem(last=False)
+        return items
+
+    async def fetch(self, cursor: Optional[str], direction: str, limit: int) -> Dict[str, Any]:
+        items = await self._load()
+        if direction == 'prev' and cursor is not None:
+            end = int(cursor)
+            start = max(0, end - limit)
+        else:
+            start = int(cursor) if cursor is not None else 0
+            end = start + limit
+        end = min(end, len(items))
+        return {
+            'items': jsonable_items(items[start:end]),
+            'next_cursor': str(end) if end < len(items) else None,
+            'prev_cursor': str(start) if start > 0 else None,
+            'total': len(items),
+        }
+
+
+class RoleInboxSource:
+    """Keyset source over inbox_messages (database.inbox_queries.get_role_inbox_page)"""
+
+    def __init__(self, region_code: str, role: str, recipient_id: Optional[int] = None):
+        self.region_code = region_code
+        self.role = role
+        self.recipient_id = recipient_id
+
+    async def fetch(self, cursor: Optional[str], direction: str, limit: int) -> Dict[str, Any]:
+        from database.inbox_queries import get_role_inbox_page
+
+        page = await get_role_inbox_page(
+            self.region_code, self.role, self.recipient_id,
+            limit=limit, cursor=cursor, direction=direction,
+        )
+        page['items'] = jsonable_items(page['items'])
+        return page
+
+
+class RequestSearchSource:
+    """Keyset source over service_requests (database.service_requests_queries.search_service_requests_page)"""
+
+    def __init__(self, region_code: str, projection: str = 'list', **filters: Any):
+        self.region_code = region_code
+        self.projection = projection
+        self.filters = filters
+
+    async def fetch(self, cursor: Optional[str], direction: str, limit: int) -> Dict[str, Any]:
+        from database.service_requests_queries import search_service_requests_page
+
+        page = await search_service_requests_page(
+            self.region_code, limit=limit, cursor=cursor, direction=direction,
+            projection=self.projection, **self.filters,
+        )
+        page['items'] = jsonable_items(page['items'])
+        return page
+
+
+class InboxWindow:
+    def __init__(self, state: FSMContext, key: str, source: Any, page_size: int = PAGE_SIZE,
+                 max_pages: int = MAX_PAGES, prefetch_margin: int = PREFETCH_MARGIN):
+        self.state = state
+        self.key = key
+        self.source = source
+        self.page_size = page_size
+        self.max_pages = max(2, max_pages)
+        self.prefetch_margin = prefetch_margin
+        if isinstance(source, ListSource) and source.cache_key is None:
+            source.cache_key = (state.key, key)
+
+    # ----- FSM state -----
+    async def _load(self) -> Optional[Dict[str, Any]]:
+        data = await self.state.get_data()
+        return data.get(self.key)
+
+    async def _save(self, win: Optional[Dict[str, Any]]) -> None:
+        await self.state.update_data({self.key: win})
+
+    @staticmethod
+    def _items(win: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [item for page in win['pages'] for item in page['items']]
+
+    @staticmethod
+    def _end(win: Dict[str, Any]) -> int:
+        return win['start'] + sum(len(page['items']) for page in win['pages'])
+
+    @staticmethod
+    def _page(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {'items': list(result['items']), 'prev': result.get('prev_cursor'), 'next': result.get('next_cursor')}
+
+    # ----- fetching / prefetch -----
+    def _prefetch_key(self, direction: str, cursor: str) -> Tuple[Any, str, str, str]:
+        return (self.state.key, self.key, direction, cursor)
+
+    async def _fetch(self, cursor: Optional[str], direction: str) -> Dict[str, Any]:
+        if cursor is not None:
+            task = _prefetch.pop(self._prefetch_key(direction, cursor), None)
+            if task is not None:
+                try:
+                    return await task
+                except Exception:
+                    pass  # fetch again below
+        return await self.source.fetch(cursor, direction, self.page_size)
+
+    def _schedule(self, cursor: Optional[str], direction: str) -> None:
+        if cursor is None:
+            return
+        key = self._prefetch_key(direction, cursor)
+        if key in _prefetch:
+            return
+        task = asyncio.get_running_loop().create_task(self.source.fetch(cursor, direction, self.page_size))
+        # Never let an unconsumed prefetch log "exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        _prefetch[key] = task
+        while len(_prefetch) > _PREFETCH_LIMIT:
+            _, old = _prefetch.popitem(last=False)
+            old.cancel()
+
+    def _maybe_prefetch(self, win: Dict[str, Any]) -> None:
+        if self._end(win) - 1 - win['pos'] < self.prefetch_margin:
+            self._schedule(win['pages'][-1]['next'], 'next')
+        if win['pos'] - win['start'] < self.prefetch_margin:
+            self._schedule(win['pages'][0]['prev'], 'prev')
+
+    def _append(self, win: Dict[str, Any], result: Dict[str, Any]) -> None:
+        win['pages'].append(self._page(result))
+        if result.get('total') is not None:
+            win['total'] = result['total']
+        while len(win['pages']) > self.max_pages:
+            dropped = win['pages'].pop(0)
+            win['start'] += len(dropped['items'])
+
+    def _prepend(self, win: Dict[str, Any], result: Dict[str, Any]) -> None:
+        page = self._page(result)
+        win['pages'].insert(0, page)
+        win['start'] -= len(page['items'])
+        if result.get('total') is not None:
+            win['total'] = result['total']
+        while len(win['pages']) > self.max_pages:
+            win['pages'].pop()
+
+    # ----- public API -----
+    async def open(self, focus: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Optional[Dict[str, Any]]:
+        """Load the first page and return the first item, or the first ``focus`` match
+        (paging on until it is found; the first item if it isn't); None if the
+        inbox is empty."""
+        if isinstance(self.source, ListSource):
+            self.source.invalidate()
+        first = await self.source.fetch(None, 'next', self.page_size)
+        win: Dict[str, Any] = {'pages': [], 'start': 0, 'pos': 0, 'total': None}
+        self._append(win, first)
+        if focus is not None:
+            while True:
+                items = self._items(win)
+                match = next((i for i, item in enumerate(items) if focus(item)), None)
+                if match is not None:
+                    win['pos'] = win['start'] + match
+                    break
+                if win['pages'][-1]['next'] is None:
+                    # Not in the inbox: start from the top as without focus
+                    win = {'pages': [], 'start': 0, 'pos': 0, 'total': None}
+                    self._append(win, first)
+                    break
+                # Only the ring is kept while searching, older pages are dropped
+                self._append(win, await self._fetch(win['pages'][-1]['next'], 'next'))
+        if not self._items(win):
+            await self._save(None)
+            return None
+        await self._save(win)
+        self._maybe_prefetch(win)
+        return self._items(win)[win['pos'] - win['start']]
+
+    async def current(self) -> Optional[Dict[str, Any]]:
+        win = await self._load()
+        if not win:
+            return None
+        items = self._items(win)
+        index = win['pos'] - win['start']
+        return items[index] if 0 <= index < len(items) else None
+
+    async def next(self) -> Optional[Dict[str, Any]]:
+        """Move forward; None (position unchanged) at the end of the inbox"""
+        win = await self._load()
+        if not win:
+            return None
+        if win['pos'] + 1 >= self._end(win):
+            cursor = win['pages'][-1]['next']
+            if cursor is None:
+                return None
+            result = await self._fetch(cursor, 'next')
+            if not result['items']:
+                win['pages'][-1]['next'] = None
+                await self._save(win)
+                return None
+            self._append(win, result)
+        win['pos'] += 1
+        await self._save(win)
+        self._maybe_prefetch(win)
+        return self._items(win)[win['pos'] - win['start']]
+
+    async def prev(self) -> Optional[Dict[str, Any]]:
+        """Move back; None (position unchanged) at the start of the inbox"""
+        win = await self._load()
+        if not win:
+            return None
+        if win['pos'] - 1 < win['start']:
+            cursor = win['pages'][0]['prev']
+            if cursor is None:
+                return None
+            result = await self._fetch(cursor, 'prev')
+            if not result['items']:
+                win['pages'][0]['prev'] = None
+                await self._save(win)
+                return None
+            self._prepend(win, result)
+        win['pos'] -= 1
+        await self._save(win)
+        self._maybe_prefetch(win)
+        return self._items(win)[win['pos'] - win['start']]
+
+    async def replace_current(self, item: Dict[str, Any]) -> None:
+        """Store a changed copy of the current item (e.g. work_started=True)"""
+        win = await self._load()
+        if not win:
+            return
+        offset = win['pos'] - win['start']
+        for page in win['pages']:
+            if offset < len(page['items']):
+                page['items'][offset] = item
+                break
+            offset -= len(page['items'])
+        await self._save(win)
+
+    async def remove_current(self) -> Optional[Dict[str, Any]]:
+        """Drop the current item (assigned / completed) and return the one now
+        shown in its place: the following item, else the previous, else None."""
+        win = await self._load()
+        if not win:
+            return None
+        offset = win['pos'] - win['start']
+        for index, page in enumerate(win['pages']):
+            if offset < len(page['items']):
+                page['items'].pop(offset)
+                if not page['items'] and len(win['pages']) > 1:
+                    # keep the outer cursors of the ring when an edge page empties
+                    if index == 0:
+                        win['pages'][1]['prev'] = page['prev']
+                    elif index == len(win['pages']) - 1:
+                        win['pages'][index - 1]['next'] = page['next']
+                    win['pages'].pop(index)
+                break
+            offset -= len(page['items'])
+        if win.get('total') is not None:
+            win['total'] = max(0, win['total'] - 1)
+        await self._save(win)
+
+        if win['pos'] < self._end(win):
+            self._maybe_prefetch(win)
+            return self._items(win)[win['pos'] - win['start']]
+        # Removed the last loaded item: pull the next page, else step back
+        cursor = win['pages'][-1]['next']
+        result = await self._fetch(cursor, 'next') if cursor is not None else None
+        if result and result['items']:
+            self._append(win, result)
+        elif win['pos'] - 1 >= win['start']:
+            win['pos'] -= 1
+        else:
+            win['pages'][-1]['next'] = None
+            await self._save(win)
+            return await self.prev()
+        await self._save(win)
+        self._maybe_prefetch(win)
+        return self._items(win)[win['pos'] - win['start']]
+
+    async def position(self) -> Dict[str, Any]:
+        """Current position for rendering: index (0-based), total (None if
+        unknown), has_prev, has_next"""
+        win = await self._load()
+        if not win:
+            return {'index': 0, 'total': 0, 'has_prev': False, 'has_next': False}
+        return {
+            'index': win['pos'],
+            'total': win.get('total'),
+            'has_prev': win['pos'] > win['start'] or win['pages'][0]['prev'] is not None,
+            'has_next': win['pos'] + 1 < self._end(win) or win['pages'][-1]['next'] is not None,
+        }
+
+    async def close(self) -> None:
+        """Forget the window (FSM data and pending prefetches)"""
+        for key in [k for k in _prefetch if k[0] == self.state.key and k[1] == self.key]:
+            _prefetch.pop(key).cancel()
+        if isinstance(self.source, ListSource):
+            self.source.invalidate()
+        await self._save(None)
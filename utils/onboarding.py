@@ -0,0 +1,150 @@
+"""
+Onboarding - /start fast path
+
+``/start`` used to probe the role (up to three queries), look the client up,
+upsert it and then check every region one after another before the first
+reply. ``onboard(user, user_role)`` does it in one concurrent fan-out:
+- the clients DB upsert reports insert vs update itself (``xmax = 0``), so
+  there is no lookup beforehand
+- the role (when RoleMiddleware did not resolve it already) and the
+  per-region roles are probed at the same time as the upsert; the assigned
+  regions are picked from those results
+- upserts from many users (campaign days) are coalesced by
+  ``StartUpsertBatcher``: calls arriving within ``START_UPSERT_WINDOW_MS``
+  (or until ``START_UPSERT_BATCH_SIZE`` are waiting) share one
+  ``INSERT ... SELECT FROM unnest(...)`` statement
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+STAFF_ROLES = frozenset({
+    "admin", "manager", "technician", "controller", "warehouse",
+    "call_center", "call_center_supervisor", "junior_manager",
+})
+
+
+@dataclass
+class Onboarding:
+    role: str
+    regions: List[str] = field(default_factory=list)
+    created: bool = False
+    client_id: Optional[int] = None
+
+
+class StartUpsertBatcher:
+    # None follows config (START_UPSERT_WINDOW_MS, START_UPSERT_BATCH_SIZE), reloads included
+    def __init__(self, window_ms: Optional[int] = None, batch_size: Optional[int] = None):
+        self._window_ms = window_ms
+        self._batch_size = batch_size
+        # telegram_id -> (row, waiters); one row per user, the latest profile wins
+        self._pending: Dict[int, Tuple[Tuple[int, Optional[str], Optional[str], str], List[asyncio.Future]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.rows = 0
+
+    @property
+    def window(self) -> float:
+        ms = self._window_ms if self._window_ms is not None else get_settings().start_upsert_window_ms
+        return max(0, ms) / 1000
+
+    @property
+    def batch_size(self) -> int:
+        return max(1, self._batch_size if self._batch_size is not None else get_settings().start_upsert_batch_size)
+
+    async def upsert(self, telegram_id: int, full_name: Optional[str], username: Optional[str],
+                     language: str) -> Dict[str, Any]:
+        """Upsert one profile in the next batch; returns {"id", "created"}"""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        row = (telegram_id, full_name, username, language)
+        entry = self._pending.get(telegram_id)
+        if entry is None:
+            self._pending[telegram_id] = (row, [fut])
+        else:
+            self._pending[telegram_id] = (row, entry[1] + [fut])
+        if len(self._pending) >= self.batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await fut
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[int, Tuple[Tuple[int, Optional[str], Optional[str], str], List[asyncio.Future]]]) -> None:
+        from database.clients.queries import upsert_global_users
+
+        try:
+            results = await upsert_global_users([row for row, _ in batch.values()])
+        except Exception as e:
+            logger.warning(f"/start upsert batch ({len(batch)} users) failed: {e}")
+            for _, waiters in batch.values():
+                for fut in waiters:
+                    if not fut.done():
+                        fut.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for telegram_id, (_, waiters) in batch.items():
+            result = results.get(telegram_id, {"id": None, "created": False})
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch': round(self.rows / self.batches, 1) if self.batches else 0,
+        }
+
+
+# Process-wide batcher (no background task: batches are scheduled on demand)
+start_upserts = StartUpsertBatcher()
+
+
+def _profile(user: Any) -> Tuple[str, str]:
+    full_name = " ".join(filter(None, [user.first_name, user.last_name])) or (user.first_name or user.username or "")
+    # clients.users.language only accepts 'uz' / 'ru'
+    language = "ru" if (user.language_code or "").lower().startswith("ru") else "uz"
+    return full_name, language
+
+
+async def onboard(user: Any, user_role: Optional[str] = None) -> Onboarding:
+    """Upsert the /start user and resolve role + assigned regions concurrently."""
+    from loader import get_user_role
+    from utils.region_context import get_user_region_roles, pick_user_regions
+
+    full_name, language = _profile(user)
+    probe_regions = user_role is None or user_role in STAFF_ROLES
+    upsert_res, regions_res, role_res = await asyncio.gather(
+        start_upserts.upsert(user.id, full_name, user.username, language),
+        get_user_region_roles(user.id) if probe_regions else asyncio.sleep(0, {}),
+        get_user_role(user.id) if user_role is None else asyncio.sleep(0, user_role),
+        return_exceptions=True,
+    )
+    if isinstance(upsert_res, BaseException):
+        upsert_res = {}
+    if isinstance(regions_res, BaseException):
+        regions_res = {}
+    role = role_res if isinstance(role_res, str) and role_res else "client"
+
+    regions = pick_user_regions(user.id, role, regions_res) if role in STAFF_ROLES else []
+    return Onboarding(role=role, regions=regions, created=bool(upsert_res.get("created")),
+                      client_id=upsert_res.get("id"))
@@ -0,0 +1,146 @@
+"""
+Outbox Dispatcher - delivers notifications queued in notification_outbox
+
+``inbox_queries.create_on_assignment(..., notify_text=...)`` writes the
+notification in the same transaction as the inbox row; this background task
+sends it:
+- one loop per region: claim a batch of due rows (FOR UPDATE SKIP LOCKED with
+  a lease, so several bot processes can run dispatchers side by side)
+- send the batch concurrently in the NOTIFICATION lane of the SendScheduler,
+  which takes care of Telegram rate limits
+- write the Telegram message ids back (outbox + inbox_messages) in one batch
+- failures are retried with backoff; blocked bots / bad chats and invalid
+  messages (Telegram BadRequest, a stored keyboard that doesn't validate)
+  fail for good
+
+Schema: database/migrations/002_notification_outbox.sql
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import InlineKeyboardMarkup
+
+from config import get_settings
+from utils.send_scheduler import NOTIFICATION, send_priority
+
+logger = logging.getLogger(__name__)
+
+_ERROR_BACKOFF = 30.0
+
+
+class OutboxDispatcher:
+    # batch_size / poll_interval / max_attempts left as None follow config
+    # (OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL, OUTBOX_MAX_ATTEMPTS), reloads included
+    def __init__(self, bot: Any, regions: Optional[List[str]] = None,
+                 batch_size: Optional[int] = None, poll_interval: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        self.bot = bot
+        self.regions = regions
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_attempts = max_attempts
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size if self._batch_size is not None else get_settings().outbox_batch_size
+
+    @property
+    def poll_interval(self) -> float:
+        return self._poll_interval if self._poll_interval is not None else get_settings().outbox_poll_interval
+
+    @property
+    def max_attempts(self) -> int:
+        return self._max_attempts if self._max_attempts is not None else get_settings().outbox_max_attempts
+
+    @staticmethod
+    def _reply_markup(item: Dict[str, Any]) -> Optional[InlineKeyboardMarkup]:
+        raw = item.get("reply_markup")
+        if not raw:
+            return None
+        try:
+            return InlineKeyboardMarkup.model_validate(json.loads(raw) if isinstance(raw, str) else raw)
+        except Exception as e:
+            raise ValueError(f"invalid reply_markup: {e}") from e
+
+    async def _send(self, item: Dict[str, Any]) -> Optional[int]:
+        chat_id = item.get("target_chat_id")
+        if chat_id is None:
+            raise LookupError("recipient has no telegram_id")
+        reply_markup = self._reply_markup(item)
+        with send_priority(NOTIFICATION):
+            message = await self.bot.send_message(
+                chat_id=chat_id,
+                text=item["text"],
+                parse_mode=item.get("parse_mode"),
+                reply_markup=reply_markup,
+            )
+        return message.message_id
+
+    async def dispatch_batch(self, region_code: str) -> int:
+        """Claim and send one batch; return the number of rows claimed"""
+        from database.outbox_queries import (
+            claim_pending_notifications, mark_notifications_sent, mark_notification_failed,
+        )
+
+        items = await claim_pending_notifications(region_code, self.batch_size)
+        if not items:
+            return 0
+        results = await asyncio.gather(*(self._send(item) for item in items), return_exceptions=True)
+
+        sent: List[Tuple[int, Optional[int], Optional[int]]] = []
+        for item, result in zip(items, results):
+            if isinstance(result, BaseException):
+                permanent = isinstance(result, (TelegramForbiddenError, TelegramBadRequest, LookupError, ValueError))
+                attempts = self.max_attempts if permanent else item["attempts"]
+                if permanent or attempts >= self.max_attempts:
+                    self.failed += 1
+                logger.warning(f"Outbox {region_code}#{item['id']} not sent: {result}")
+                await mark_notification_failed(region_code, item["id"], str(result), attempts, self.max_attempts)
+            else:
+                sent.append((item["id"], item.get("inbox_id"), result))
+        await mark_notifications_sent(region_code, sent)
+        self.sent += len(sent)
+        return len(items)
+
+    async def _run(self, region_code: str) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_batch(region_code)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox dispatcher for {region_code} failed: {e}")
+                await asyncio.sleep(_ERROR_BACKOFF)
+                continue
+            # A full batch means there is more waiting
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        from database.region_config import get_region_codes
+
+        loop = asyncio.get_running_loop()
+        for region_code in (self.regions if self.regions is not None else get_region_codes()):
+            if region_code not in self._tasks:
+                self._tasks[region_code] = loop.create_task(self._run(region_code))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'regions': sorted(self._tasks),
+            'sent': self.sent,
+            'failed': self.failed,
+        }
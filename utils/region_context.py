@@ -1,35 +1,42 @@
-from typing import List
+import logging
+from typing import Dict, List, Optional
 
 from config import get_admin_regions
-from database.region_config import get_region_codes
+from database.region_fanout import fan_out
 from database.core_queries import get_user_role as get_role_in_region
 
+logger = logging.getLogger(__name__)
 
-async def detect_user_regions(user_id: int, role: str) -> List[str]:
-    """Detect regions assigned to the user for the given role.
 
-    - Adminlar uchun: .env dagi ADMIN_IDS_<REGION> ro'yxatlari BILAN BIRGA
-      regional DB'lardagi `role='admin'` mos tushgan regionlar ham birgalikda olinadi.
-    - Boshqa rollar uchun: faqat regional DB'dagi rol mos kelgan regionlar qaytariladi.
+async def get_user_region_roles(user_id: int) -> Dict[str, Optional[str]]:
+    """Role of the user in every regional DB, probed concurrently (database.region_fanout).
+
+    Regions without such a user are left out; so are regions that time out or
+    fail (logged), to keep /start fast.
     """
-    role = (role or "").lower()
+    res = await fan_out(lambda region: get_role_in_region(region, user_id))
+    if res.partial:
+        logger.warning(f"[{user_id}] Region roles incomplete, skipped: {', '.join(res.missing)}")
+    return {region: str(r).lower() for region, r in res.results.items() if r}
 
-    regions = get_region_codes()
-    assigned: List[str] = []
 
-    # DB bo'yicha rolni tekshirib chiqamiz
-    for region in regions:
-        try:
-            r = await get_role_in_region(region, user_id)
-            if r and str(r).lower() == role:
-                assigned.append(region)
-        except Exception:
-            # Ignore per-region errors to keep /start fast
-            continue
+def pick_user_regions(user_id: int, role: str, region_roles: Dict[str, Optional[str]]) -> List[str]:
+    """Regions assigned to the user for `role`, given `get_user_region_roles` results."""
+    role = (role or "").lower()
+    assigned = [region for region, r in region_roles.items() if r == role]
 
     # Adminlar uchun .env dagi regionlar bilan union
     if role == "admin":
-        env_regions = set(get_admin_regions(user_id))
-        assigned = sorted(set(assigned) | env_regions)
+        assigned = sorted(set(assigned) | set(get_admin_regions(user_id)))
+
+    return assigned
 
-    return assigned
\ No newline at end of file
+
+async def detect_user_regions(user_id: int, role: str) -> List[str]:
+    """Detect regions assigned to the user for the given role.
+
+    - Adminlar uchun: .env dagi ADMIN_IDS_<REGION> ro'yxatlari BILAN BIRGA
+      regional DB'lardagi `role='admin'` mos tushgan regionlar ham birgalikda olinadi.
+    - Boshqa rollar uchun: faqat regional DB'dagi rol mos kelgan regionlar qaytariladi.
+    """
+    return pick_user_regions(user_id, role, await get_user_region_roles(user_id))
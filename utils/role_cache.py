@@ -0,0 +1,160 @@
+"""
+Role Cache - bounded, single-flight cache of telegram_id -> role
+
+- LRU eviction once ``max_size`` entries are stored, TTL expiry per entry
+- negative caching: "no role found" is cached too, with a shorter TTL
+- single-flight: concurrent lookups for the same telegram_id share one load
+- hit/miss/coalesced/eviction counters for monitoring
+- ``invalidate`` runs on role_changed events from the invalidation bus (see
+  database.invalidation_bus) so a role change is visible immediately
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import get_settings
+
+# Result handed to coalesced waiters when the loading caller was cancelled:
+# they retry instead of inheriting a cancellation that was not theirs.
+_LEADER_CANCELLED = object()
+
+
+class RoleCache:
+    # Sizes / TTLs left as None follow config (ROLE_CACHE_MAX_SIZE, ROLE_CACHE_TTL,
+    # ROLE_CACHE_NEGATIVE_TTL), reloads included. Role changes are pushed through
+    # database.invalidation_bus, so the TTL can be raised when several bot
+    # processes share the DBs.
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        # telegram_id -> (role or None, expires_at)
+        self._entries: "OrderedDict[int, Tuple[Optional[str], float]]" = OrderedDict()
+        self._inflight: Dict[int, asyncio.Future] = {}
+        # Bumped on every invalidation so loads started earlier don't store stale roles
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size if self._max_size is not None else get_settings().role_cache_max_size
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else get_settings().role_cache_ttl
+
+    @property
+    def negative_ttl(self) -> float:
+        return self._negative_ttl if self._negative_ttl is not None else get_settings().role_cache_negative_ttl
+
+    def lookup(self, user_id: int) -> Tuple[bool, Optional[str]]:
+        """Return (found, role). ``found`` is True for negative entries as well."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False, None
+        role, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[user_id]
+            return False, None
+        self._entries.move_to_end(user_id)
+        return True, role
+
+    def set(self, user_id: int, role: Optional[str]) -> None:
+        ttl = self.ttl if role is not None else self.negative_ttl
+        self._entries[user_id] = (role, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        self._epoch += 1
+        if user_id is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(user_id, None)
+            self._inflight.pop(user_id, None)
+
+    async def get_or_load(self, user_id: int,
+                          loader: Callable[[int], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Return cached role or load it once, sharing the load with concurrent callers."""
+        found, role = self.lookup(user_id)
+        if found:
+            self.hits += 1
+            return role
+
+        while True:
+            inflight = self._inflight.get(user_id)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            role = await asyncio.shield(inflight)
+            if role is not _LEADER_CANCELLED:
+                return role
+            # The loader's caller went away; the first waiter to get here loads
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        epoch = self._epoch
+        try:
+            role = await loader(user_id)
+        except asyncio.CancelledError:
+            del self._inflight[user_id]
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark as retrieved when nobody else is waiting
+            raise
+        else:
+            if epoch == self._epoch:
+                self.set(user_id, role)
+            future.set_result(role)
+            return role
+        finally:
+            if self._inflight.get(user_id) is future:
+                del self._inflight[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'inflight': len(self._inflight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Process-wide role cache
+role_cache = RoleCache()
+
+
+def get_cached_role(user_id: int) -> Optional[str]:
+    """Get cached role if available and not expired"""
+    return role_cache.lookup(user_id)[1]
+
+
+def cache_role(user_id: int, role: Optional[str]) -> None:
+    """Cache user role (None caches a negative result)"""
+    role_cache.set(user_id, role)
+
+
+def invalidate_role_cache(user_id: Optional[int] = None) -> None:
+    """Invalidate role cache for specific user or all users"""
+    role_cache.invalidate(user_id)
+
+
+def get_role_cache_stats() -> Dict[str, Any]:
+    return role_cache.stats()
@@ -6,51 +6,28 @@ for the Alfa Connect bot.
 """
 
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import Message, CallbackQuery, TelegramObject
 from aiogram.fsm.context import FSMContext
 from loader import get_user_role, get_bot
-import time
-from typing import Dict, Optional
-
-# Global role cache to reduce database queries
-_role_cache: Dict[int, str] = {}
-_role_cache_timestamps: Dict[int, float] = {}
-_cache_duration = 300  # 5 minutes
+from typing import Any, Dict, Optional
+from utils.role_cache import role_cache
 
 def invalidate_role_cache(user_id: int = None):
     """Invalidate role cache for specific user or all users"""
-    global _role_cache, _role_cache_timestamps
-    
+    role_cache.invalidate(user_id)
     if user_id is None:
-        _role_cache.clear()
-        _role_cache_timestamps.clear()
         print("Global role cache cleared")
     else:
-        _role_cache.pop(user_id, None)
-        _role_cache_timestamps.pop(user_id, None)
         print(f"Role cache cleared for user: {user_id}")
 
 def get_cached_role(user_id: int) -> Optional[str]:
     """Get cached role if available and not expired"""
-    global _role_cache, _role_cache_timestamps
-    
-    if user_id in _role_cache:
-        timestamp = _role_cache_timestamps.get(user_id, 0)
-        if time.time() - timestamp < _cache_duration:
-            return _role_cache[user_id]
-        else:
-            # Remove expired cache
-            _role_cache.pop(user_id, None)
-            _role_cache_timestamps.pop(user_id, None)
-    
-    return None
+    return role_cache.lookup(user_id)[1]
 
 def cache_role(user_id: int, role: str):
-    """Cache user role with timestamp"""
-    global _role_cache, _role_cache_timestamps
-    
-    _role_cache[user_id] = role
-    _role_cache_timestamps[user_id] = time.time()
+    """Cache user role"""
+    role_cache.set(user_id, role)
 
 def get_role_router(role: str):
     """Get router for specific role - centralized function to avoid duplicates"""
@@ -112,28 +89,55 @@ def get_optimized_role_router(role: str) -> Router:
     
     return router
 
-async def show_role_menu(message: Message, user_role: str):
-    """Show appropriate menu based on user role"""
+class RoleDispatchRouter(Router):
+    """
+    Top-level router that forwards an event straight to the router of the
+    sender's role. The role is read from ``user_role`` in handler data
+    (set once per update by RoleMiddleware), so only one role router is
+    ever tried instead of every role router in sequence.
+    """
+
+    def __init__(self, *, name: Optional[str] = None) -> None:
+        super().__init__(name=name or "role_dispatch_router")
+        self._role_routers: Dict[str, Router] = {}
+
+    def include_role_router(self, role: str, router: Router) -> Router:
+        """Attach ``router`` as the handler tree for ``role``"""
+        self.include_router(router)
+        self._role_routers[role] = router
+        return router
+
+    def get_role_router(self, role: Optional[str]) -> Optional[Router]:
+        return self._role_routers.get(role or "")
+
+    async def propagate_event(self, update_type: str, event: TelegramObject, **kwargs: Any) -> Any:
+        router = self._role_routers.get(kwargs.get("user_role") or "")
+        if router is None:
+            return UNHANDLED
+        return await router.propagate_event(update_type=update_type, event=event, **kwargs)
+
+async def show_role_menu(message: Message, user_role: str, inbox_count: int = 0):
+    """Show appropriate menu based on user role (inbox_count - unread badge on the Inbox button)"""
     user_id = message.from_user.id
     
     if user_role == 'admin':
         await show_admin_menu(message)
     elif user_role == 'manager':
-        await show_manager_menu(message)
+        await show_manager_menu(message, inbox_count)
     elif user_role == 'client':
         await show_client_menu(message)
     elif user_role == 'technician':
-        await show_technician_menu(message)
+        await show_technician_menu(message, inbox_count)
     elif user_role == 'warehouse':
-        await show_warehouse_menu(message)
+        await show_warehouse_menu(message, inbox_count)
     elif user_role == 'call_center':
-        await show_call_center_menu(message)
+        await show_call_center_menu(message, inbox_count)
     elif user_role == 'call_center_supervisor':
-        await show_call_center_supervisor_menu(message)
+        await show_call_center_supervisor_menu(message, inbox_count)
     elif user_role == 'junior_manager':
-        await show_junior_manager_menu(message)
+        await show_junior_manager_menu(message, inbox_count)
     elif user_role == 'controller':
-        await show_controller_menu(message)
+        await show_controller_menu(message, inbox_count)
     else:
         await show_default_menu(message)
 
@@ -146,12 +150,12 @@ async def show_admin_menu(message: Message):
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_manager_menu(message: Message):
+async def show_manager_menu(message: Message, inbox_count: int = 0):
     """Show manager menu"""
     from keyboards.manager_buttons import get_manager_main_keyboard
     
     text = "👨‍💼 Menejer paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_manager_main_keyboard('uz')
+    keyboard = get_manager_main_keyboard('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
@@ -164,57 +168,57 @@ async def show_client_menu(message: Message):
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_technician_menu(message: Message):
+async def show_technician_menu(message: Message, inbox_count: int = 0):
     """Show technician menu"""
-    from keyboards.technician_buttons import get_technician_main_keyboard
+    from keyboards.technician_buttons import get_technician_main_menu_keyboard
     
     text = "👨‍🔧 Texnik paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_technician_main_keyboard('uz')
+    keyboard = get_technician_main_menu_keyboard('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_warehouse_menu(message: Message):
+async def show_warehouse_menu(message: Message, inbox_count: int = 0):
     """Show warehouse menu"""
     from keyboards.warehouse_buttons import get_warehouse_main_keyboard
     
     text = "📦 Ombor paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_warehouse_main_keyboard('uz')
+    keyboard = get_warehouse_main_keyboard('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_call_center_menu(message: Message):
+async def show_call_center_menu(message: Message, inbox_count: int = 0):
     """Show call center menu"""
     from keyboards.call_center_buttons import get_call_center_main_keyboard
     
     text = "📞 Call Center paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_call_center_main_keyboard('uz')
+    keyboard = get_call_center_main_keyboard('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_call_center_supervisor_menu(message: Message):
+async def show_call_center_supervisor_menu(message: Message, inbox_count: int = 0):
     """Show call center supervisor menu"""
     from keyboards.call_center_supervisor_buttons import get_call_center_supervisor_main_menu
     
     text = "👨‍💼 Call Center Supervisor paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_call_center_supervisor_main_menu('uz')
+    keyboard = get_call_center_supervisor_main_menu('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_junior_manager_menu(message: Message):
+async def show_junior_manager_menu(message: Message, inbox_count: int = 0):
     """Show junior manager menu"""
     from keyboards.junior_manager_buttons import get_junior_manager_main_keyboard
     
     text = "👨‍💼 Kichik Menejer paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_junior_manager_main_keyboard('uz')
+    keyboard = get_junior_manager_main_keyboard('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
-async def show_controller_menu(message: Message):
+async def show_controller_menu(message: Message, inbox_count: int = 0):
     """Show controller menu"""
-    from keyboards.controllers_buttons import get_controller_main_keyboard
+    from keyboards.controllers_buttons import controllers_main_menu
     
     text = "🎛️ Kontroller paneliga xush kelibsiz!\n\nQuyidagi funksiyalardan birini tanlang:"
-    keyboard = get_controller_main_keyboard('uz')
+    keyboard = controllers_main_menu('uz', inbox_count)
     
     await message.answer(text, reply_markup=keyboard)
 
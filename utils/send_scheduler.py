@@ -0,0 +1,249 @@
+"""
+Send Scheduler - global outbound rate limiting for Telegram API calls
+
+Registered as a request middleware on ``bot.session``, so every
+``message.answer`` / ``edit_text`` / group post goes through it without
+touching the handlers.
+
+- token buckets: one global (Telegram's ~30 msg/s) and one per chat
+  (~1 msg/s in private chats, ~20 msg/min in groups)
+- priority lanes: INTERACTIVE replies are granted before NOTIFICATION
+  (e.g. posts to ZAYAVKA_GROUP_ID) and BROADCAST traffic
+- 429 handling: TelegramRetryAfter on a scheduled call pauses that chat
+  for ``retry_after`` and the call is retried; on a call without a
+  ``chat_id`` (not chat-scoped) it pauses the global bucket, i.e. every
+  scheduled send, and is re-raised
+- ``stats()`` exposes queue depth per lane and counters
+
+Only methods with a ``chat_id`` are scheduled; answerCallbackQuery,
+getUpdates and friends pass straight through.
+
+Use ``send_priority`` to mark background traffic::
+
+    with send_priority(BROADCAST):
+        await bot.send_message(chat_id, text)
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType, Response
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+NOTIFICATION = 1
+BROADCAST = 2
+_LANE_NAMES = {INTERACTIVE: 'interactive', NOTIFICATION: 'notification', BROADCAST: 'broadcast'}
+
+_MAX_RETRIES = 3
+_BUCKET_IDLE_TTL = 300.0
+
+_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('send_priority', default=None)
+
+
+@contextmanager
+def send_priority(priority: int) -> Iterator[None]:
+    """Send everything inside the block with the given priority lane"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class SendScheduler(BaseRequestMiddleware):
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 group_rate: float = 20 / 60, group_burst: float = 3.0,
+                 notification_chat_ids: Optional[List[int]] = None):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.notification_chat_ids = set(notification_chat_ids or [])
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._lanes: Dict[int, Deque[Tuple[Any, asyncio.Future]]] = {
+            INTERACTIVE: deque(), NOTIFICATION: deque(), BROADCAST: deque(),
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.retries = 0
+        self.delayed = 0
+
+    # ----- buckets -----
+    def _bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0)
+            if is_group:
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _try_take(self, chat_id: Any, now: float) -> float:
+        """Take a global + chat token if both are available; else return the wait"""
+        wait = max(self._global.wait_time(now), self._bucket(chat_id).wait_time(now))
+        if wait == 0:
+            self._global.consume()
+            self._bucket(chat_id).consume()
+        return wait
+
+    # ----- scheduling -----
+    def _queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def _acquire(self, chat_id: Any, priority: int) -> None:
+        if not self._queued() and self._try_take(chat_id, time.monotonic()) == 0:
+            return
+        self.delayed += 1
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((chat_id, future))
+        self._ensure_loop()
+        self._wakeup.set()
+        await future
+
+    def _ensure_loop(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _grant(self) -> Optional[float]:
+        """Grant tokens in priority order; return the shortest wait, None if idle"""
+        now = time.monotonic()
+        shortest: Optional[float] = None
+        for priority in (INTERACTIVE, NOTIFICATION, BROADCAST):
+            lane = self._lanes[priority]
+            for item in list(lane):
+                chat_id, future = item
+                if future.done():  # caller cancelled
+                    lane.remove(item)
+                    continue
+                global_wait = self._global.wait_time(now)
+                if global_wait > 0:
+                    return global_wait
+                wait = self._try_take(chat_id, now)
+                if wait == 0:
+                    lane.remove(item)
+                    future.set_result(None)
+                elif shortest is None or wait < shortest:
+                    shortest = wait
+        return shortest
+
+    async def _run(self) -> None:
+        while True:
+            wait = self._grant()
+            self._wakeup.clear()
+            if wait is None:
+                self._cleanup()
+                await self._wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _cleanup(self) -> None:
+        now = time.monotonic()
+        if len(self._chats) < 1000:
+            return
+        for chat_id, bucket in list(self._chats.items()):
+            if bucket.idle(now) and now - bucket.updated > _BUCKET_IDLE_TTL:
+                del self._chats[chat_id]
+
+    def _priority_for(self, chat_id: Any) -> int:
+        priority = _priority.get()
+        if priority is not None:
+            return priority
+        if chat_id in self.notification_chat_ids:
+            return NOTIFICATION
+        return INTERACTIVE
+
+    # ----- request middleware -----
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                logger.warning(f"Global flood limit: pausing all sends for {e.retry_after}s")
+                self._global.pause(e.retry_after)
+                if self._wakeup is not None:
+                    self._wakeup.set()
+                raise
+
+        priority = self._priority_for(chat_id)
+        for attempt in range(_MAX_RETRIES + 1):
+            await self._acquire(chat_id, priority)
+            try:
+                response = await make_request(bot, method)
+                self.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                if attempt >= _MAX_RETRIES:
+                    raise
+                self.retries += 1
+                logger.warning(f"Flood limit for chat {chat_id}: retry after {e.retry_after}s")
+                self._bucket(chat_id).pause(e.retry_after)
+                if self._wakeup is not None:
+                    self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': {_LANE_NAMES[p]: len(lane) for p, lane in self._lanes.items()},
+            'chats_tracked': len(self._chats),
+            'sent': self.sent,
+            'delayed': self.delayed,
+            'retries': self.retries,
+        }
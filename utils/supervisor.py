@@ -0,0 +1,233 @@
+"""
+Supervisor - multi-process update processing sharded by user id
+
+The front (supervisor) process only receives updates - by webhook or long
+polling, depending on RUN_MODE - and forwards each raw update to one of N
+worker processes chosen by ``from_user.id % N``. A user therefore always
+lands on the same worker, in the order Telegram delivered the updates.
+
+Each worker is a normal bot process (``loader.setup_bot``: handlers, DB
+pools, invalidation bus) that feeds the forwarded updates to its own
+dispatcher. Workers share FSM state and caches through Postgres
+(FSM_STORAGE=postgres, database.invalidation_bus), so handlers need no
+changes.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import queue as queue_module
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_SIZE = 10000
+_MONITOR_INTERVAL = 5.0
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def extract_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """Find the sender id in a raw update (message, callback_query, ...)"""
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        for field in ("from", "user"):
+            user = event.get(field)
+            if isinstance(user, dict) and "id" in user:
+                return int(user["id"])
+        chat = event.get("chat")
+        if isinstance(chat, dict) and "id" in chat:
+            return int(chat["id"])
+    return None
+
+
+def shard_for(update: Dict[str, Any], workers: int) -> int:
+    user_id = extract_user_id(update)
+    key = user_id if user_id is not None else int(update.get("update_id", 0))
+    return abs(key) % workers
+
+
+# ===== Worker process =====
+def worker_main(index: int, updates: "multiprocessing.Queue") -> None:
+    """Entry point of a worker process"""
+    try:
+        asyncio.run(_run_worker(index, updates))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(index: int, updates: "multiprocessing.Queue") -> None:
+    from loader import setup_bot, get_bot, get_dp
+
+    await setup_bot()
+    bot, dp = get_bot(), get_dp()
+    await dp.emit_startup(bot=bot)
+    logger.info(f"Worker {index} started")
+
+    loop = asyncio.get_running_loop()
+    in_flight: set = set()
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, updates.get)
+            if raw is None:
+                break
+            task = asyncio.create_task(dp.feed_raw_update(bot, json.loads(raw)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+    finally:
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        logger.info(f"Worker {index} stopped")
+
+
+# ===== Supervisor (front) process =====
+class Supervisor:
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queues: List[Any] = [self._ctx.Queue(maxsize=_QUEUE_SIZE) for _ in range(workers)]
+        self._processes: List[Any] = [None] * workers
+        self.forwarded = [0] * workers
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=worker_main, args=(index, self._queues[index]),
+            name=f"bot-worker-{index}", daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+
+    async def monitor(self) -> None:
+        """Restart workers that died; their queue (and pending updates) is kept"""
+        while True:
+            await asyncio.sleep(_MONITOR_INTERVAL)
+            for index, process in enumerate(self._processes):
+                if process is not None and not process.is_alive():
+                    logger.warning(f"Worker {index} exited with {process.exitcode}; restarting")
+                    self._spawn(index)
+
+    async def forward(self, update: Dict[str, Any]) -> None:
+        index = shard_for(update, self.workers)
+        raw = json.dumps(update)
+        try:
+            self._queues[index].put_nowait(raw)
+        except queue_module.Full:
+            # Backpressure: wait for the worker without blocking the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._queues[index].put, raw)
+        self.forwarded[index] += 1
+
+    def stop(self) -> None:
+        for q in self._queues:
+            try:
+                q.put_nowait(None)
+            except queue_module.Full:
+                pass
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+
+    def queue_depths(self) -> List[int]:
+        depths = []
+        for q in self._queues:
+            try:
+                depths.append(q.qsize())
+            except NotImplementedError:  # macOS
+                depths.append(-1)
+        return depths
+
+
+def _allowed_updates() -> List[str]:
+    """Update types the workers handle, as in single-process mode (loader.py).
+
+    The front never runs setup_bot, so the routers are registered here only to
+    resolve the list; updates are still dispatched by the workers.
+    """
+    from handlers import setup_handlers
+    from loader import get_dp
+
+    dp = get_dp()
+    if not dp.sub_routers:
+        setup_handlers(dp)
+    return dp.resolve_used_update_types()
+
+
+async def _front_polling(supervisor: Supervisor, bot: Any) -> None:
+    from aiogram.methods import GetUpdates
+
+    await bot.delete_webhook(drop_pending_updates=False)
+    allowed_updates = _allowed_updates()
+    offset: Optional[int] = None
+    while True:
+        try:
+            updates = await bot(GetUpdates(offset=offset, timeout=30, allowed_updates=allowed_updates))
+        except Exception as e:
+            logger.warning(f"getUpdates failed: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            await supervisor.forward(update.model_dump(mode="json", exclude_none=True, by_alias=True))
+            offset = update.update_id + 1
+
+
+async def _front_webhook(supervisor: Supervisor, bot: Any) -> None:
+    from aiohttp import web
+    from config import settings
+
+    if not settings.webhook_url:
+        raise RuntimeError("RUN_MODE=webhook requires WEBHOOK_URL")
+
+    async def handle(request: "web.Request") -> "web.Response":
+        if settings.webhook_secret and request.headers.get(_SECRET_HEADER) != settings.webhook_secret:
+            return web.Response(status=401)
+        await supervisor.forward(await request.json())
+        return web.Response(status=200)
+
+    app = web.Application()
+    app.router.add_post(settings.webhook_path, handle)
+    await bot.set_webhook(
+        url=f"{settings.webhook_url}{settings.webhook_path}",
+        secret_token=settings.webhook_secret or None,
+        allowed_updates=_allowed_updates(),
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port)
+    await site.start()
+    print(f"🌐 Webhook listening on {settings.webhook_host}:{settings.webhook_port}{settings.webhook_path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_supervisor(workers: int) -> None:
+    """Run the front process with ``workers`` worker processes"""
+    from config import settings
+    from loader import get_bot
+
+    if settings.fsm_storage != 'postgres':
+        logger.warning("WORKERS>1 with in-memory FSM storage: states are per worker and lost on restart")
+
+    bot = get_bot()
+    supervisor = Supervisor(workers)
+    supervisor.start()
+    print(f"👷 Started {workers} workers")
+    monitor = asyncio.create_task(supervisor.monitor())
+    try:
+        if settings.run_mode == 'webhook':
+            await _front_webhook(supervisor, bot)
+        else:
+            await _front_polling(supervisor, bot)
+    finally:
+        monitor.cancel()
+        supervisor.stop()
+        await bot.session.close()
@@ -0,0 +1,106 @@
+"""
+Update Executor - per-user serialized, cross-user parallel processing
+
+Every update goes through ``UpdateExecutor.slot(user_id)`` before the
+dispatcher touches it:
+- updates of one user wait on that user's lane (FIFO lock), so a double tap
+  on "next" runs after the previous callback finished its state.update_data
+- different users run in parallel, bounded by a global semaphore
+- a lane exists only while the user has updates queued or running
+
+``SerialDispatcher.feed_update`` wraps the whole dispatch (including aiogram's
+FSM context middleware, which reads the state) in the slot, so it covers
+polling, webhook and supervisor workers alike.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+
+class _Lane:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class UpdateExecutor:
+    def __init__(self, max_concurrency: int = 100):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lanes: Dict[int, _Lane] = {}
+        self.active = 0
+        self.processed = 0
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[int]) -> AsyncIterator[None]:
+        if user_id is None:
+            async with self._run():
+                yield
+            return
+
+        lane = self._lanes.get(user_id)
+        if lane is None:
+            lane = self._lanes[user_id] = _Lane()
+        lane.pending += 1
+        try:
+            # Per-user order first, then a global slot, so one user's backlog
+            # never holds global capacity while waiting on itself
+            async with lane.lock:
+                async with self._run():
+                    yield
+        finally:
+            lane.pending -= 1
+            if lane.pending == 0 and self._lanes.get(user_id) is lane:
+                del self._lanes[user_id]
+
+    @asynccontextmanager
+    async def _run(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+                self.processed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'active': self.active,
+            'max_concurrency': self.max_concurrency,
+            'users_queued': len(self._lanes),
+            'pending': sum(lane.pending for lane in self._lanes.values()),
+            'processed': self.processed,
+        }
+
+
+def get_update_user_id(update: Update) -> Optional[int]:
+    """Sender id of an update (falls back to chat id), None if there is none"""
+    try:
+        event = update.event
+    except Exception:
+        return None
+    user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, 'chat', None)
+    if chat is not None:
+        return chat.id
+    return None
+
+
+class SerialDispatcher(Dispatcher):
+    """Dispatcher that runs every update inside an UpdateExecutor slot"""
+
+    def __init__(self, *args: Any, executor: Optional[UpdateExecutor] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.executor = executor or UpdateExecutor()
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any:
+        async with self.executor.slot(get_update_user_id(update)):
+            return await super().feed_update(bot, update, **kwargs)